@@ -10,6 +10,7 @@ from admin.utils.common import (
     get_course_by_id, get_group_by_id, get_courses_selection_kb, get_student_groups_selection_kb
 )
 from common.keyboards import get_home_kb
+from common.pagination import parse_page_callback
 
 router = Router()
 
@@ -324,6 +325,19 @@ async def select_group_for_student_deletion(callback: CallbackQuery, state: FSMC
         reply_markup=await get_students_list_kb("delete_student", group_id=group_id)
     )
 
+@router.callback_query(AdminStudentsStates.select_student_to_delete, F.data.startswith("page_delete_student_"))
+async def paginate_students_to_delete(callback: CallbackQuery, state: FSMContext):
+    """Перелистнуть страницу списка учеников для удаления"""
+    direction, cursor = parse_page_callback(callback.data, "page_delete_student")
+    data = await state.get_data()
+
+    await callback.message.edit_reply_markup(
+        reply_markup=await get_students_list_kb(
+            "delete_student", group_id=data.get("deletion_group_id"), direction=direction, cursor=cursor
+        )
+    )
+    await callback.answer()
+
 @router.callback_query(AdminStudentsStates.select_student_to_delete, F.data.startswith("delete_student_"))
 async def select_student_to_delete(callback: CallbackQuery, state: FSMContext):
     """Выбрать ученика для удаления"""
@@ -1,7 +1,9 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from common.keyboards import back_to_main_button
+from common.pagination import fetch_page, get_pagination_buttons
+from common.question_sampler import question_sampler
 from database import CourseRepository, SubjectRepository, GroupRepository, UserRepository, StudentRepository, CuratorRepository, TeacherRepository, ManagerRepository
 
 
@@ -13,7 +15,9 @@ curators_db = {}
 teachers_db = {}
 managers_db = {}
 
-def get_entity_list_kb(items: List[Any], callback_prefix: str, id_field: str = "id", name_field: str = "name") -> InlineKeyboardMarkup:
+def get_entity_list_kb(items: List[Any], callback_prefix: str, id_field: str = "id", name_field: str = "name",
+                       page_prefix: str = None, prev_cursor: Optional[int] = None,
+                       next_cursor: Optional[int] = None) -> InlineKeyboardMarkup:
     """
     Универсальная клавиатура для выбора из списка сущностей
     
@@ -22,6 +26,9 @@ def get_entity_list_kb(items: List[Any], callback_prefix: str, id_field: str = "
         callback_prefix: Префикс для callback_data
         id_field: Поле для ID (если элементы - словари)
         name_field: Поле для отображаемого имени (если элементы - словари)
+        page_prefix: Префикс callback_data кнопок "Назад"/"Далее" (для постраничных списков)
+        prev_cursor: Курсор предыдущей страницы (см. common.pagination.fetch_page)
+        next_cursor: Курсор следующей страницы
     """
     buttons = []
     
@@ -46,6 +53,9 @@ def get_entity_list_kb(items: List[Any], callback_prefix: str, id_field: str = "
                     callback_data=callback_data
                 )
             ])
+
+    if page_prefix:
+        buttons.extend(get_pagination_buttons(page_prefix, prev_cursor, next_cursor))
     
     buttons.append(back_to_main_button())
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -139,7 +149,9 @@ async def remove_course(course_id: int) -> bool:
     """Удалить курс (связи с предметами удалятся автоматически)"""
     try:
         # При Many-to-Many связи удаление курса автоматически удалит связи
-        return await CourseRepository.delete(course_id)
+        success = await CourseRepository.delete(course_id)
+        await question_sampler.invalidate_all()
+        return success
     except Exception as e:
         print(f"Ошибка при удалении курса: {e}")
         return False
@@ -154,7 +166,9 @@ async def add_subject(name: str) -> bool:
 
 async def remove_subject(subject_id: int) -> bool:
     """Удалить предмет"""
-    return await SubjectRepository.delete(subject_id)
+    success = await SubjectRepository.delete(subject_id)
+    await question_sampler.invalidate_subject(subject_id)
+    return success
 
 # Функции для получения данных
 async def get_courses_list():
@@ -382,11 +396,21 @@ async def remove_student(student_id: int) -> bool:
         await session.commit()
         return result.rowcount > 0
 
-async def get_students_list_kb(callback_prefix: str = "select_student", course_id: int = None, group_id: int = None) -> InlineKeyboardMarkup:
-    """Клавиатура со списком студентов (опционально отфильтрованных по курсу и группе)"""
-    students = await StudentRepository.get_by_course_and_group(course_id, group_id)
+async def get_students_list_kb(callback_prefix: str = "select_student", course_id: int = None, group_id: int = None,
+                               direction: str = None, cursor: int = None) -> InlineKeyboardMarkup:
+    """
+    Постраничная клавиатура со списком студентов (опционально отфильтрованных по курсу и группе)
+
+    Кнопки перехода имеют callback_data "page_{callback_prefix}_{next|prev}_{cursor}",
+    direction и cursor берутся из нее через common.pagination.parse_page_callback
+    """
+    students, prev_cursor, next_cursor = await fetch_page(
+        lambda **page: StudentRepository.get_by_course_and_group(course_id, group_id, **page),
+        direction, cursor
+    )
     students_list = [{"id": student.id, "name": student.user.name} for student in students]
-    return get_entity_list_kb(students_list, callback_prefix)
+    return get_entity_list_kb(students_list, callback_prefix, page_prefix=f"page_{callback_prefix}",
+                              prev_cursor=prev_cursor, next_cursor=next_cursor)
 
 async def get_groups_by_course_kb(callback_prefix: str = "select_group", course_id: int = None) -> InlineKeyboardMarkup:
     """Клавиатура со списком групп для курса"""
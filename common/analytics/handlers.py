@@ -9,6 +9,9 @@ from .keyboards import (
     get_back_to_general_analytics_kb, get_group_analytics_kb
 )
 from common.utils import check_if_id_in_callback_data
+from common.analytics_snapshots import analytics_snapshots, format_as_of
+from common.render_cache import render_cache, student_scope, kind_scope
+from common.result_events import HOMEWORK
 from common.statistics import (
     get_student_microtopics_detailed,
     get_student_strong_weak_summary,
@@ -194,7 +197,11 @@ async def show_microtopics_detailed(callback: CallbackQuery, state: FSMContext):
         subject_id = int(parts[3])
 
         # Получаем детальную статистику
-        result_text = await get_student_microtopics_detailed(student_id, subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "student_microtopics_detailed", (student_id, subject_id),
+            lambda: get_student_microtopics_detailed(student_id, subject_id),
+            [student_scope(student_id)]
+        )
 
         await callback.message.edit_text(
             result_text,
@@ -223,7 +230,11 @@ async def show_microtopics_summary(callback: CallbackQuery, state: FSMContext):
         subject_id = int(parts[3])
 
         # Получаем сводку по сильным и слабым темам
-        result_text = await get_student_strong_weak_summary(student_id, subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "student_microtopics_summary", (student_id, subject_id),
+            lambda: get_student_strong_weak_summary(student_id, subject_id),
+            [student_scope(student_id)]
+        )
 
         await callback.message.edit_text(
             result_text,
@@ -288,8 +299,8 @@ async def show_subject_analytics(callback: CallbackQuery, state: FSMContext, rol
     """
     subject_id = await check_if_id_in_callback_data("analytics_subject_", callback, state, "subject")
 
-    # Получаем данные о предмете
-    subject_data = await get_subject_stats(subject_id)
+    # Получаем снимок статистики предмета
+    subject_data, generated_at = await analytics_snapshots.get_subject(int(subject_id))
 
     # Формируем базовую информацию о предмете
     result_text = f"📚 Предмет: {subject_data['name']}\n\n"
@@ -307,6 +318,7 @@ async def show_subject_analytics(callback: CallbackQuery, state: FSMContext, rol
     else:
         result_text += "❌ Группы не найдены\n"
 
+    result_text += f"\n{format_as_of(generated_at)}\n"
     result_text += "\nВыберите, что хотите посмотреть:"
 
     await callback.message.edit_text(
@@ -330,7 +342,11 @@ async def show_subject_microtopics_detailed(callback: CallbackQuery, state: FSMC
         subject_id = int(parts[3])
 
         # Получаем детальную статистику
-        result_text = await get_subject_microtopics_detailed(subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "subject_microtopics_detailed", (subject_id,),
+            lambda: get_subject_microtopics_detailed(subject_id),
+            [kind_scope(HOMEWORK)]
+        )
 
         await callback.message.edit_text(
             result_text,
@@ -358,7 +374,11 @@ async def show_subject_microtopics_summary(callback: CallbackQuery, state: FSMCo
         subject_id = int(parts[3])
 
         # Получаем сводку по сильным и слабым темам
-        result_text = await get_subject_microtopics_summary(subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "subject_microtopics_summary", (subject_id,),
+            lambda: get_subject_microtopics_summary(subject_id),
+            [kind_scope(HOMEWORK)]
+        )
 
         await callback.message.edit_text(
             result_text,
@@ -1,5 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from common.keyboards import get_main_menu_back_button, get_universal_back_button
+from common.report_export import get_export_buttons, GROUP_REPORT
 import asyncio
 import sys
 import os
@@ -328,6 +329,7 @@ def get_group_analytics_kb(group_id: int) -> InlineKeyboardMarkup:
             text="📋 Рейтинг по баллам",
             callback_data=f"group_rating_{group_id}"
         )],
+        *get_export_buttons(GROUP_REPORT, group_id),
         *get_main_menu_back_button()
     ])
 
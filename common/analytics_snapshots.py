@@ -0,0 +1,214 @@
+"""
+Снимки аналитики менеджера: общая статистика, предметы и группы
+
+Тяжелые отчеты (get_general_stats, get_subject_stats, get_group_stats) не
+считаются по клику: фоновая задача пересчитывает их по расписанию и после
+всплесков сохраненных результатов, а обработчики отдают готовый снимок с
+временем формирования. Снимки хранятся в Redis (общие для всех воркеров),
+без Redis - в памяти процесса. Менеджер может обновить снимок вручную.
+
+Полный пересчет считает каждую группу один раз: снимки групп и общий снимок
+строятся из уже посчитанной статистики предметов. Пересчет выполняет один
+воркер: блокировка хранит случайный токен, и снимает ее только владелец.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from common.result_events import subscribe
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Интервал планового пересчета всех снимков (в секундах)
+REFRESH_INTERVAL = 900
+# Пауза после сохранения результата, чтобы собрать всплеск в один пересчет
+BURST_DEBOUNCE = 60
+# Время жизни снимка в Redis
+SNAPSHOT_TTL = REFRESH_INTERVAL * 4
+# Блокировка пересчета, чтобы снимки пересчитывал только один воркер
+REFRESH_LOCK_KEY = "analytics_snapshot:refresh_lock"
+REFRESH_LOCK_TTL = 300
+# Снять блокировку, только если она все еще наша (истекшую мог взять другой воркер)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+GENERAL = "general"
+SUBJECT = "subject"
+GROUP = "group"
+
+
+def format_as_of(generated_at: datetime) -> str:
+    """Строка "по состоянию на" для отчета"""
+    return f"🕒 Данные на {generated_at.strftime('%d.%m %H:%M')}"
+
+
+class AnalyticsSnapshots:
+    """Хранилище и фоновый пересчет снимков аналитики"""
+
+    def __init__(self):
+        self._local: Dict[str, str] = {}
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock_token: Optional[str] = None
+
+    @staticmethod
+    def _key(kind: str, entity_id: Any = None) -> str:
+        return f"analytics_snapshot:{kind}" if entity_id is None else f"analytics_snapshot:{kind}:{entity_id}"
+
+    async def _store(self, key: str, data: dict) -> Tuple[dict, datetime]:
+        generated_at = datetime.now()
+        payload = json.dumps({"generated_at": generated_at.isoformat(), "data": data}, ensure_ascii=False)
+        if not await redis_manager.set(key, payload, ttl=SNAPSHOT_TTL):
+            self._local[key] = payload
+        return data, generated_at
+
+    async def _load(self, key: str) -> Optional[Tuple[dict, datetime]]:
+        payload = await redis_manager.get(key) or self._local.get(key)
+        if not payload:
+            return None
+        snapshot = json.loads(payload)
+        return snapshot["data"], datetime.fromisoformat(snapshot["generated_at"])
+
+    # === ПЕРЕСЧЕТ ===
+
+    async def refresh_general(self, subjects_data: list = None) -> Tuple[dict, datetime]:
+        """Пересчитать снимок общей статистики (из готовой статистики предметов, если передана)"""
+        from common.statistics import get_general_stats
+        return await self._store(self._key(GENERAL), await get_general_stats(subjects_data))
+
+    async def refresh_subject(self, subject_id: int) -> Tuple[dict, datetime]:
+        """Пересчитать снимок предмета и снимки всех его групп"""
+        from common.statistics import get_subject_stats
+        subject_data = await get_subject_stats(str(subject_id))
+
+        # Статистика групп уже посчитана внутри get_subject_stats
+        for group in subject_data["groups"]:
+            await self._store(self._key(GROUP, group["group_id"]), {
+                "name": group["name"],
+                "subject": subject_data["name"],
+                "homework_completion": group["homework_completion"],
+                "topics": group["topics"],
+                "rating": group["rating"]
+            })
+
+        return await self._store(self._key(SUBJECT, subject_id), subject_data)
+
+    async def refresh_group(self, group_id: int) -> Tuple[dict, datetime]:
+        """Пересчитать снимок группы"""
+        from common.statistics import get_group_stats
+        return await self._store(self._key(GROUP, group_id), await get_group_stats(str(group_id)))
+
+    async def refresh_all(self):
+        """Пересчитать все снимки (общий, предметы и их группы)"""
+        from database.repositories import SubjectRepository
+
+        started = datetime.now()
+        subjects_data = []
+        for subject in await SubjectRepository.get_all():
+            subject_data, _ = await self.refresh_subject(subject.id)
+            subjects_data.append(subject_data)
+        # Общий снимок - из уже посчитанных групп, без повторного прохода по ним
+        await self.refresh_general(subjects_data)
+        logger.info(f"📊 Снимки аналитики пересчитаны за {(datetime.now() - started).total_seconds():.1f}с")
+
+    # === ЧТЕНИЕ ===
+
+    async def _get(self, key: str, refresh) -> Tuple[dict, datetime]:
+        snapshot = await self._load(key)
+        if snapshot:
+            return snapshot
+        # Снимка еще нет - считаем сразу и сохраняем
+        return await refresh()
+
+    async def get_general(self) -> Tuple[dict, datetime]:
+        """Снимок общей статистики: (данные get_general_stats, время формирования)"""
+        return await self._get(self._key(GENERAL), self.refresh_general)
+
+    async def get_subject(self, subject_id: int) -> Tuple[dict, datetime]:
+        """Снимок статистики предмета: (данные get_subject_stats, время формирования)"""
+        return await self._get(self._key(SUBJECT, subject_id), lambda: self.refresh_subject(subject_id))
+
+    async def get_group(self, group_id: int) -> Tuple[dict, datetime]:
+        """Снимок статистики группы: (данные get_group_stats, время формирования)"""
+        return await self._get(self._key(GROUP, group_id), lambda: self.refresh_group(group_id))
+
+    # === ФОНОВЫЙ ПЕРЕСЧЕТ ===
+
+    async def notify_results_changed(self, kind: str = None, student_id: int = None):
+        """Отметить, что появились новые результаты (пересчет после паузы BURST_DEBOUNCE)"""
+        self._dirty.set()
+
+    async def _acquire_refresh_lock(self) -> bool:
+        self._lock_token = None
+        if not await redis_manager.is_connected():
+            return True
+        token = uuid.uuid4().hex
+        try:
+            if await redis_manager.redis.set(REFRESH_LOCK_KEY, token, nx=True, ex=REFRESH_LOCK_TTL):
+                self._lock_token = token
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"❌ Ошибка блокировки пересчета снимков: {e}")
+            return False
+
+    async def _release_refresh_lock(self):
+        if self._lock_token is None or not await redis_manager.is_connected():
+            return
+        try:
+            await redis_manager.redis.eval(RELEASE_LOCK_SCRIPT, 1, REFRESH_LOCK_KEY, self._lock_token)
+        except Exception as e:
+            logger.error(f"❌ Ошибка снятия блокировки пересчета снимков: {e}")
+        finally:
+            self._lock_token = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=REFRESH_INTERVAL)
+                # Результаты сохраняются пачками - ждем окончания всплеска
+                await asyncio.sleep(BURST_DEBOUNCE)
+            except asyncio.TimeoutError:
+                pass
+
+            if not await self._acquire_refresh_lock():
+                # Пересчитывает другой воркер, флаг оставляем для следующего цикла
+                continue
+
+            self._dirty.clear()
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                logger.error(f"❌ Ошибка пересчета снимков аналитики: {e}")
+            finally:
+                await self._release_refresh_lock()
+
+    def start(self):
+        """Запустить фоновый пересчет"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("📊 Фоновый пересчет снимков аналитики запущен")
+
+    async def stop(self):
+        """Остановить фоновый пересчет"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Глобальный экземпляр снимков аналитики
+analytics_snapshots = AnalyticsSnapshots()
+
+subscribe(analytics_snapshots.notify_results_changed)
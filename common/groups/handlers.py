@@ -116,17 +116,16 @@ async def show_student_profile(callback: CallbackQuery, state: FSMContext, role:
         if student_obj:
             print(f"✅ Студент найден: {student_obj.user.name}")
 
-            # Получаем статистику студента
-            homework_results = await HomeworkResultRepository.get_by_student(student_id)
-            print(f"📊 Найдено результатов ДЗ: {len(homework_results)}")
+            # Матрица выполнения ДЗ по предметам групп студента (один запрос)
+            matrix = await HomeworkResultRepository.get_completion_matrix(student_id=student_id)
+            print(f"📊 ДЗ по предметам студента: {len(matrix.homework_ids)}")
 
             # Подсчитываем статистику
             # Считаем уникальные ДЗ (не повторные попытки)
-            unique_homework_ids = set(result.homework_id for result in homework_results)
-            unique_homeworks_count = len(unique_homework_ids)
+            unique_homeworks_count = matrix.completed_count(student_id)
 
-            total_homeworks = len(homework_results)  # Всего попыток (включая повторные)
-            total_points = sum(result.points_earned for result in homework_results)
+            total_homeworks = matrix.attempts(student_id)  # Всего попыток (включая повторные)
+            total_points = matrix.points(student_id)
             print(f"📊 Общая статистика: Всего попыток={total_homeworks}, Уникальных ДЗ={unique_homeworks_count}, Баллы={total_points}")
 
             # Определяем уровень на основе баллов
@@ -141,38 +140,17 @@ async def show_student_profile(callback: CallbackQuery, state: FSMContext, role:
 
             # Последнее выполненное ДЗ
             last_homework_date = "Нет данных"
-            if homework_results:
-                last_result = max(homework_results, key=lambda x: x.completed_at)
-                last_homework_date = last_result.completed_at.strftime("%d.%m.%Y")
-
-            # Процент выполнения (правильный расчет)
-            # Получаем общее количество доступных ДЗ для студента
-            try:
-                from database import HomeworkRepository
-
-                # Получаем все ДЗ по предметам студента
-                all_available_homeworks = 0
-                if student_obj.groups:
-                    subject_ids = []
-                    for group in student_obj.groups:
-                        if group.subject and group.subject.id not in subject_ids:
-                            subject_ids.append(group.subject.id)
-
-                    for subject_id in subject_ids:
-                        subject_homeworks = await HomeworkRepository.get_by_subject(subject_id)
-                        all_available_homeworks += len(subject_homeworks)
-
-                # Рассчитываем процент: (уникальных выполнено / всего доступных) * 100
-                if all_available_homeworks > 0:
-                    completion_percentage = round((unique_homeworks_count / all_available_homeworks) * 100, 1)
-                else:
-                    completion_percentage = 0
-
-                print(f"📊 Расчет процента: {unique_homeworks_count} уникальных выполнено / {all_available_homeworks} доступно = {completion_percentage}%")
-
-            except Exception as e:
-                print(f"❌ Ошибка при расчете процента выполнения: {e}")
+            last_completed_at = matrix.last_completed_at(student_id)
+            if last_completed_at:
+                last_homework_date = last_completed_at.strftime("%d.%m.%Y")
+
+            # Процент выполнения: (уникальных выполнено / всего доступных по предметам групп) * 100
+            all_available_homeworks = len(matrix.homework_ids)
+            if all_available_homeworks > 0:
+                completion_percentage = round((unique_homeworks_count / all_available_homeworks) * 100, 1)
+            else:
                 completion_percentage = 0
+            print(f"📊 Расчет процента: {unique_homeworks_count} уникальных выполнено / {all_available_homeworks} доступно = {completion_percentage}%")
 
             # Получаем предметы из групп студента
             subjects = []
@@ -1,5 +1,6 @@
 import logging
 from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
@@ -82,3 +83,69 @@ async def keyboard_start_handler(message: Message, state: FSMContext, user_role:
     else:  # По умолчанию считаем пользователя студентом
         from student.handlers.main import show_student_main_menu
         await show_student_main_menu(message, user_role=user_role)
+
+# Выгрузка статистики групп и тестов в файл
+@router.callback_query(F.data.startswith("export_"))
+async def export_report_handler(callback: CallbackQuery, state: FSMContext, user_role: str = None):
+    """Отправить отчет документом CSV/XLSX"""
+    await log("export_report_handler", user_role, state)
+    if user_role not in ["admin", "manager", "curator", "teacher"]:
+        await callback.answer("❌ Выгрузка недоступна", show_alert=True)
+        return
+
+    from common.report_export import parse_export_callback, send_report
+    parsed = parse_export_callback(callback.data)
+    if not parsed:
+        await callback.answer("❌ Ошибка в данных запроса", show_alert=True)
+        return
+
+    report, file_format, ids = parsed
+    await callback.answer("⏳ Формирую файл...")
+    try:
+        if not await send_report(callback.bot, callback.message.chat.id, report, file_format, ids):
+            await callback.message.answer("❌ Группа не найдена")
+    except Exception as e:
+        logging.error(f"Ошибка выгрузки отчета {callback.data}: {e}")
+        await callback.message.answer("❌ Ошибка при формировании файла")
+
+# Прогрев фото вопросов перед занятием: /prewarm_photos homework <id> или /prewarm_photos bonus <id>
+@router.message(Command("prewarm_photos"))
+async def prewarm_photos_handler(message: Message, state: FSMContext, command: CommandObject, user_role: str = None):
+    """Заранее загрузить в Telegram фото вопросов ДЗ или бонусного теста"""
+    await log("prewarm_photos_handler", user_role, state)
+    if user_role not in ["admin", "manager"]:
+        return
+
+    args = (command.args or "").split()
+    if len(args) != 2 or args[0] not in ("homework", "bonus") or not args[1].isdigit():
+        await message.answer(
+            "Использование:\n"
+            "/prewarm_photos homework <ID ДЗ>\n"
+            "/prewarm_photos bonus <ID бонусного теста>"
+        )
+        return
+
+    from common.question_bank import question_bank
+    from common.media_registry import media_registry
+
+    kind, entity_id = args[0], int(args[1])
+    if kind == "homework":
+        questions = await question_bank.get_homework_questions(entity_id)
+    else:
+        questions = await question_bank.get_bonus_test_questions(entity_id)
+
+    if not questions:
+        await message.answer("❌ Вопросы не найдены")
+        return
+
+    status = await message.answer("⏳ Загружаю фото вопросов...")
+    result = await media_registry.prewarm(
+        message.bot, message.chat.id, [question['photo_path'] for question in questions]
+    )
+    await status.edit_text(
+        f"✅ Фото вопросов готовы ({len(questions)} вопросов)\n"
+        f"📤 Загружено: {result['uploaded']}\n"
+        f"♻️ Уже были загружены: {result['cached']}\n"
+        f"🆔 Уже file_id Telegram: {result['skipped']}\n"
+        f"❌ Ошибок: {result['failed']}"
+    )
@@ -0,0 +1,168 @@
+"""
+Рейтинги по баллам в отсортированных множествах Redis (группа, предмет, курс)
+
+Для каждой группы, предмета и курса хранится множество
+"leaderboard:{вид}:{ID}" с участниками student_id и баллами в качестве веса.
+Баллы студента (сумма заработанных за ДЗ, как в рейтинге группы) обновляются
+во всех его рейтингах при сохранении результата ДЗ, поэтому топ-N и место
+студента читаются за O(log n) без перебора статистики всех студентов.
+
+Отсутствующий рейтинг (первое обращение, очистка Redis) пересобирается из
+Postgres одним запросом. Изменения состава групп и курсов попадают в рейтинг
+при следующем изменении баллов студента или после пересборки по истечении
+LEADERBOARD_TTL. Без Redis рейтинг считается запросом к БД при каждом чтении.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from common.result_events import subscribe, HOMEWORK
+from database import StudentRepository, HomeworkResultRepository
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+GROUP = "group"
+SUBJECT = "subject"
+COURSE = "course"
+
+# Время жизни рейтинга до полной пересборки из БД (в секундах)
+LEADERBOARD_TTL = 6 * 3600
+# Размер топа по умолчанию
+TOP_SIZE = 10
+
+
+class Leaderboards:
+    """Рейтинги студентов по баллам"""
+
+    @staticmethod
+    def _key(board: str, entity_id: int) -> str:
+        return f"leaderboard:{board}:{entity_id}"
+
+    @staticmethod
+    async def _load_points(board: str, entity_id: int) -> List[Tuple[int, int]]:
+        """Баллы участников рейтинга из БД: [(student_id, баллы)]"""
+        return await HomeworkResultRepository.get_members_points(**{f"{board}_id": entity_id})
+
+    async def rebuild(self, board: str, entity_id: int) -> List[Tuple[int, int]]:
+        """Пересобрать рейтинг из БД и вернуть баллы участников"""
+        rows = await self._load_points(board, entity_id)
+        if rows and await redis_manager.is_connected():
+            key = self._key(board, entity_id)
+            try:
+                pipe = redis_manager.redis.pipeline(transaction=True)
+                pipe.delete(key)
+                pipe.zadd(key, {str(student_id): points for student_id, points in rows})
+                pipe.expire(key, LEADERBOARD_TTL)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"❌ Ошибка пересборки рейтинга {key}: {e}")
+        return rows
+
+    async def _ensure_redis_board(self, board: str, entity_id: int) -> Optional[str]:
+        """Ключ рейтинга в Redis (пересобирается при отсутствии) или None без Redis"""
+        if not await redis_manager.is_connected():
+            return None
+        key = self._key(board, entity_id)
+        if not await redis_manager.redis.exists(key):
+            await self.rebuild(board, entity_id)
+        return key
+
+    async def top(self, board: str, entity_id: int, limit: int = TOP_SIZE) -> List[Dict]:
+        """
+        Топ студентов рейтинга
+
+        Returns:
+            List[Dict]: [{"student_id", "name", "points"}] по убыванию баллов
+        """
+        entries = None
+        try:
+            key = await self._ensure_redis_board(board, entity_id)
+            if key:
+                members = await redis_manager.redis.zrevrange(key, 0, limit - 1, withscores=True)
+                entries = [(int(member), int(score)) for member, score in members]
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения рейтинга {board}:{entity_id}: {e}")
+
+        if entries is None:
+            rows = await self._load_points(board, entity_id)
+            entries = sorted(rows, key=lambda row: (-row[1], row[0]))[:limit]
+
+        names = await StudentRepository.get_names([student_id for student_id, _ in entries])
+        return [
+            {"student_id": student_id, "name": names.get(student_id, "Неизвестный студент"), "points": points}
+            for student_id, points in entries
+        ]
+
+    async def get_place(self, board: str, entity_id: int, student_id: int) -> Optional[Dict]:
+        """
+        Место студента в рейтинге (студенты с равными баллами делят место)
+
+        Returns:
+            Optional[Dict]: {"place", "points", "total"} или None, если студента нет в рейтинге
+        """
+        try:
+            key = await self._ensure_redis_board(board, entity_id)
+            if key:
+                score = await redis_manager.redis.zscore(key, str(student_id))
+                if score is None:
+                    return None
+                pipe = redis_manager.redis.pipeline()
+                pipe.zcount(key, f"({score}", "+inf")
+                pipe.zcard(key)
+                higher, total = await pipe.execute()
+                return {"place": higher + 1, "points": int(score), "total": total}
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения места в рейтинге {board}:{entity_id}: {e}")
+
+        rows = dict(await self._load_points(board, entity_id))
+        if student_id not in rows:
+            return None
+        points = rows[student_id]
+        return {
+            "place": sum(1 for other in rows.values() if other > points) + 1,
+            "points": points,
+            "total": len(rows)
+        }
+
+    async def update_student(self, student_id: int):
+        """Обновить баллы студента во всех его рейтингах (группы, предметы групп, курсы)"""
+        if not await redis_manager.is_connected():
+            return
+
+        student = await StudentRepository.get_by_id(student_id)
+        if not student:
+            return
+        points = await HomeworkResultRepository.get_earned_points(student_id)
+
+        keys = {self._key(GROUP, group.id) for group in student.groups}
+        keys |= {self._key(SUBJECT, group.subject_id) for group in student.groups if group.subject_id}
+        keys |= {self._key(COURSE, course.id) for course in student.courses}
+        if not keys:
+            return
+
+        keys = sorted(keys)
+        try:
+            # Отсутствующие рейтинги не создаем: неполный рейтинг из одного
+            # студента помешал бы пересборке при первом чтении
+            pipe = redis_manager.redis.pipeline()
+            for key in keys:
+                pipe.exists(key)
+            existing = [key for key, exists in zip(keys, await pipe.execute()) if exists]
+
+            pipe = redis_manager.redis.pipeline()
+            for key in existing:
+                pipe.zadd(key, {str(student_id): points})
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления рейтингов студента {student_id}: {e}")
+
+    async def on_result_saved(self, kind: str, student_id: int):
+        """Баллы начисляются только за ДЗ"""
+        if kind == HOMEWORK:
+            await self.update_student(student_id)
+
+
+# Глобальный экземпляр рейтингов
+leaderboards = Leaderboards()
+
+subscribe(leaderboards.on_result_saved)
@@ -0,0 +1,183 @@
+"""
+Реестр загруженных в Telegram фото вопросов
+
+photo_path вопроса - это file_id Telegram (вопросы, созданные через бота)
+или путь к файлу/URL (засеянный и импортированный контент). Файл по пути
+загружается в Telegram один раз: полученный file_id сохраняется по хэшу
+содержимого (одинаковые картинки в разных вопросах - одна загрузка), URL -
+по самому адресу. Дальше всем студентам отправляется file_id. Реестр
+хранится в Redis (общий для воркеров) и дублируется в памяти процесса.
+
+Одновременные первые отправки одного фото (класс начинает ДЗ вместе) не
+загружают файл каждая: загружает первая, остальные ждут ее file_id
+(single_flight_group). prewarm() загружает фото ДЗ или бонусного теста
+заранее, до начала занятия.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from database.single_flight import single_flight_group
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+FILE_IDS_KEY = "media:file_ids"
+# Размер блока чтения файла при подсчете хэша
+HASH_CHUNK_SIZE = 1 << 16
+
+
+class MediaRegistry:
+    """Соответствие содержимого фото и file_id в Telegram"""
+
+    def __init__(self):
+        self._file_ids: Dict[str, str] = {}
+        # Хэши файлов по пути: (mtime, размер, хэш) - файл не перечитывается при каждой отправке
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+        self._stats = {"uploads": 0, "reused": 0}
+
+    @staticmethod
+    def _is_url(photo_path: str) -> bool:
+        return photo_path.startswith(("http://", "https://"))
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        self._hashes[path] = (stat.st_mtime, stat.st_size, file_hash)
+        return file_hash
+
+    async def _registry_key(self, photo_path: str) -> Optional[str]:
+        """Ключ реестра для пути/URL; None - photo_path уже file_id"""
+        if self._is_url(photo_path):
+            return f"url:{photo_path}"
+        if os.path.isfile(photo_path):
+            return f"sha256:{await asyncio.to_thread(self._file_hash, photo_path)}"
+        return None
+
+    async def _get(self, key: str) -> Optional[str]:
+        file_id = self._file_ids.get(key)
+        if file_id is None and await redis_manager.is_connected():
+            try:
+                value = await redis_manager.redis.hget(FILE_IDS_KEY, key)
+                if value:
+                    file_id = self._file_ids[key] = value.decode("utf-8")
+            except Exception as e:
+                logger.error(f"❌ Ошибка чтения реестра фото: {e}")
+        return file_id
+
+    async def _put(self, key: str, file_id: str):
+        self._file_ids[key] = file_id
+        if await redis_manager.is_connected():
+            try:
+                await redis_manager.redis.hset(FILE_IDS_KEY, key, file_id)
+            except Exception as e:
+                logger.error(f"❌ Ошибка сохранения file_id в реестр фото: {e}")
+
+    async def _forget(self, key: str):
+        self._file_ids.pop(key, None)
+        if await redis_manager.is_connected():
+            try:
+                await redis_manager.redis.hdel(FILE_IDS_KEY, key)
+            except Exception:
+                pass
+
+    async def send_photo(self, bot: Bot, chat_id: int, photo_path: str, **kwargs) -> Message:
+        """Отправить фото вопроса, загружая файл в Telegram только в первый раз"""
+        key = await self._registry_key(photo_path)
+        if key is None:
+            return await bot.send_photo(chat_id=chat_id, photo=photo_path, **kwargs)
+
+        file_id = await self._get(key)
+        if file_id:
+            try:
+                message = await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+                self._stats["reused"] += 1
+                return message
+            except TelegramBadRequest as e:
+                # file_id другого бота или устаревший - загружаем заново
+                logger.warning(f"⚠️ file_id для {photo_path} не принят Telegram: {e}")
+                await self._forget(key)
+
+        is_uploader = False
+
+        async def upload() -> Message:
+            nonlocal is_uploader
+            is_uploader = True
+            return await self._upload(bot, chat_id, photo_path, key, **kwargs)
+
+        try:
+            uploaded = await single_flight_group.do("media_registry.upload", key, upload)
+        except Exception:
+            if is_uploader:
+                raise
+            # Загрузка в чужой чат не удалась (например, бот заблокирован) - загружаем сами
+            return await self._upload(bot, chat_id, photo_path, key, **kwargs)
+        if is_uploader:
+            return uploaded
+
+        # Файл загрузил другой студент - отправляем полученный file_id
+        message = await bot.send_photo(chat_id=chat_id, photo=uploaded.photo[-1].file_id, **kwargs)
+        self._stats["reused"] += 1
+        return message
+
+    async def _upload(self, bot: Bot, chat_id: int, photo_path: str, key: str, **kwargs) -> Message:
+        photo = photo_path if self._is_url(photo_path) else FSInputFile(photo_path)
+        message = await bot.send_photo(chat_id=chat_id, photo=photo, **kwargs)
+        self._stats["uploads"] += 1
+        await self._put(key, message.photo[-1].file_id)
+        return message
+
+    async def prewarm(self, bot: Bot, chat_id: int, photo_paths: Iterable[str]) -> Dict[str, int]:
+        """
+        Загрузить фото заранее: каждое незагруженное фото отправляется в чат и удаляется
+
+        Args:
+            bot: Экземпляр бота
+            chat_id: Служебный чат для загрузки (чат того, кто запустил прогрев)
+            photo_paths: photo_path вопросов
+
+        Returns:
+            dict: uploaded (загружено), cached (уже были), skipped (file_id), failed
+        """
+        result = {"uploaded": 0, "cached": 0, "skipped": 0, "failed": 0}
+        for photo_path in dict.fromkeys(path for path in photo_paths if path):
+            try:
+                key = await self._registry_key(photo_path)
+                if key is None:
+                    result["skipped"] += 1
+                    continue
+                if await self._get(key):
+                    result["cached"] += 1
+                    continue
+
+                message = await self.send_photo(bot, chat_id, photo_path, disable_notification=True)
+                result["uploaded"] += 1
+                try:
+                    await bot.delete_message(chat_id=chat_id, message_id=message.message_id)
+                except Exception:
+                    pass
+            except Exception as e:
+                logger.error(f"❌ Ошибка загрузки фото {photo_path}: {e}")
+                result["failed"] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, "known": len(self._file_ids)}
+
+
+# Глобальный реестр фото
+media_registry = MediaRegistry()
@@ -0,0 +1,127 @@
+"""
+Матрица понимания микротем "студент × микротема" для отчетов менеджера
+
+Ответы всех студентов предмета (или всей школы) загружаются одним агрегирующим
+запросом и раскладываются в NumPy-матрицу процентов понимания. Средние по
+предмету и по группам и классификация сильных/слабых тем считаются
+векторными операциями, все варианты отчетов строятся из одной матрицы.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from database.repositories import HomeworkResultRepository
+
+# Пороги классификации тем (в процентах)
+STRONG_THRESHOLD = 80
+WEAK_THRESHOLD = 40
+
+
+class MicrotopicMatrix:
+    """Проценты понимания микротем предмета: строка - студент в группе, столбец - микротема"""
+
+    def __init__(self, subject_id: int, row_keys: List[Tuple[int, int]], microtopic_numbers: List[int],
+                 percentages: np.ndarray):
+        self.subject_id = subject_id
+        # (group_id, student_id) для каждой строки
+        self.row_keys = row_keys
+        # Номер микротемы для каждого столбца (по возрастанию)
+        self.microtopic_numbers = np.asarray(microtopic_numbers)
+        # Проценты понимания, NaN - студент не отвечал на вопросы микротемы
+        self.percentages = percentages
+
+    @classmethod
+    def from_aggregates(cls, subject_id: int, rows: List[tuple]) -> "MicrotopicMatrix":
+        """
+        Построить матрицу из строк HomeworkResultRepository.get_microtopic_answer_aggregates
+
+        Args:
+            subject_id: ID предмета
+            rows: строки (subject_id, group_id, student_id, microtopic_number, total, correct)
+        """
+        row_keys = sorted({(row[1], row[2]) for row in rows})
+        microtopic_numbers = sorted({row[3] for row in rows})
+        row_index = {key: i for i, key in enumerate(row_keys)}
+        column_index = {number: j for j, number in enumerate(microtopic_numbers)}
+
+        totals = np.zeros((len(row_keys), len(microtopic_numbers)))
+        correct = np.zeros_like(totals)
+        for _, group_id, student_id, microtopic_number, total, correct_answered in rows:
+            i, j = row_index[(group_id, student_id)], column_index[microtopic_number]
+            totals[i, j] = total
+            correct[i, j] = correct_answered or 0
+
+        # Процент студента по микротеме округляется до целого, как в get_microtopic_understanding
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentages = np.where(totals > 0, np.round(correct / totals * 100), np.nan)
+
+        return cls(subject_id, row_keys, microtopic_numbers, percentages)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.percentages.size == 0
+
+    def _averages(self) -> np.ndarray:
+        """Средний процент по каждой микротеме (NaN - нет данных)"""
+        values = self.percentages
+        answered = ~np.isnan(values)
+        counts = answered.sum(axis=0)
+        sums = np.where(answered, values, 0).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def subject_averages(self) -> Dict[int, float]:
+        """Средний % понимания по микротемам предмета: {номер микротемы: процент}"""
+        return self._to_dict(self._averages())
+
+    def group_averages(self) -> Dict[int, Dict[int, float]]:
+        """Средний % понимания по микротемам каждой группы: {group_id: {номер микротемы: процент}}"""
+        if self.is_empty:
+            return {}
+        group_ids, row_groups = np.unique([group_id for group_id, _ in self.row_keys], return_inverse=True)
+        values = self.percentages
+        answered = ~np.isnan(values)
+
+        # Суммы и количества по группам за один проход по строкам
+        sums = np.zeros((len(group_ids), values.shape[1]))
+        counts = np.zeros_like(sums)
+        np.add.at(sums, row_groups, np.where(answered, values, 0))
+        np.add.at(counts, row_groups, answered)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averages = np.where(counts > 0, sums / counts, np.nan)
+
+        return {int(group_id): self._to_dict(row) for group_id, row in zip(group_ids, averages)}
+
+    def classify(self) -> Tuple[List[int], List[int]]:
+        """Номера сильных (≥80%) и слабых (≤40%) микротем по средним предмета"""
+        averages = np.round(self._averages(), 1)
+        strong = self.microtopic_numbers[averages >= STRONG_THRESHOLD]
+        weak = self.microtopic_numbers[averages <= WEAK_THRESHOLD]
+        return strong.tolist(), weak.tolist()
+
+    def _to_dict(self, averages: np.ndarray) -> Dict[int, float]:
+        return {
+            int(number): round(float(value), 1)
+            for number, value in zip(self.microtopic_numbers, averages)
+            if not np.isnan(value)
+        }
+
+
+async def load_microtopic_matrices(subject_id: int = None) -> Dict[int, MicrotopicMatrix]:
+    """
+    Загрузить матрицы понимания одним запросом
+
+    Args:
+        subject_id: ID предмета (None - все предметы школы)
+
+    Returns:
+        Dict[int, MicrotopicMatrix]: матрицы по ID предмета (только предметы с ответами)
+    """
+    rows_by_subject: Dict[int, List[tuple]] = {}
+    for row in await HomeworkResultRepository.get_microtopic_answer_aggregates(subject_id):
+        rows_by_subject.setdefault(row[0], []).append(row)
+
+    return {
+        subject: MicrotopicMatrix.from_aggregates(subject, rows)
+        for subject, rows in rows_by_subject.items()
+    }
@@ -0,0 +1,73 @@
+"""
+Постраничные inline-клавиатуры поверх keyset-пагинации репозиториев
+
+Курсор страницы передается прямо в callback_data кнопок "Назад"/"Далее":
+"{page_prefix}_next_{last_id}" и "{page_prefix}_prev_{first_id}", поэтому
+состояние страницы не нужно хранить в FSM.
+"""
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardButton
+
+# Количество элементов на одной странице клавиатуры
+PAGE_SIZE = 20
+
+NEXT = "next"
+PREV = "prev"
+
+
+async def fetch_page(fetch: Callable[..., Awaitable[List[Any]]], direction: Optional[str] = None,
+                     cursor: Optional[int] = None,
+                     page_size: int = PAGE_SIZE) -> Tuple[List[Any], Optional[int], Optional[int]]:
+    """
+    Загрузить одну страницу через репозиторий с keyset-пагинацией
+
+    Args:
+        fetch: Метод репозитория, принимающий after_id, before_id и limit
+        direction: NEXT, PREV или None для первой страницы
+        cursor: ID из callback_data кнопки перехода
+        page_size: Размер страницы
+
+    Returns:
+        Tuple[List, Optional[int], Optional[int]]: элементы страницы,
+        курсор предыдущей страницы и курсор следующей (None - страницы нет)
+    """
+    # Запрашиваем на одну строку больше, чтобы узнать, есть ли страница дальше
+    if direction == PREV and cursor is not None:
+        rows = await fetch(before_id=cursor, limit=page_size + 1)
+        has_prev = len(rows) > page_size
+        rows = rows[-page_size:]
+        has_next = True
+    else:
+        after_id = cursor if direction == NEXT else None
+        rows = await fetch(after_id=after_id, limit=page_size + 1)
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev = after_id is not None
+
+    if not rows:
+        return rows, None, None
+
+    prev_cursor = rows[0].id if has_prev else None
+    next_cursor = rows[-1].id if has_next else None
+    return rows, prev_cursor, next_cursor
+
+
+def get_pagination_buttons(page_prefix: str, prev_cursor: Optional[int] = None,
+                           next_cursor: Optional[int] = None) -> List[List[InlineKeyboardButton]]:
+    """Строка кнопок "Назад"/"Далее" (пустой список, если страница единственная)"""
+    row = []
+    if prev_cursor is not None:
+        row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"{page_prefix}_{PREV}_{prev_cursor}"))
+    if next_cursor is not None:
+        row.append(InlineKeyboardButton(text="Далее ➡️", callback_data=f"{page_prefix}_{NEXT}_{next_cursor}"))
+    return [row] if row else []
+
+
+def parse_page_callback(callback_data: str, page_prefix: str) -> Tuple[Optional[str], Optional[int]]:
+    """Разобрать callback_data кнопки перехода на (направление, курсор)"""
+    try:
+        direction, cursor = callback_data.replace(f"{page_prefix}_", "", 1).split("_")
+        return direction, int(cursor)
+    except ValueError:
+        return None, None
@@ -0,0 +1,88 @@
+"""
+Банк скомпилированных наборов вопросов для quiz системы
+
+Домашнее задание или бонусный тест компилируется один раз в упорядоченный список
+вопросов с отсортированными вариантами ответов и индексом правильного ответа.
+Наборы и отдельные вопросы хранятся в справочном кэше (database.reference_cache),
+поэтому показ вопроса студенту не обращается к базе данных. Редакторы ДЗ и бонусных
+тестов вызывают invalidate(), версия набора увеличивается во всех воркерах.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from database import QuestionRepository, BonusQuestionRepository
+from database.reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+# Тип сущности в справочном кэше
+QUESTION_SET = "question_set"
+
+HOMEWORK = "homework"
+BONUS = "bonus"
+
+
+def compile_question(question) -> Dict[str, Any]:
+    """Скомпилировать ORM-вопрос в словарь для quiz_registrator"""
+    answer_options = sorted(question.answer_options, key=lambda option: option.order_number)
+    return {
+        'id': question.id,
+        'text': question.text,
+        'photo_path': question.photo_path,
+        'time_limit': question.time_limit,
+        'microtopic_number': getattr(question, 'microtopic_number', None),  # У бонусных вопросов нет микротем
+        'answer_options': [
+            {
+                'id': option.id,
+                'text': option.text,
+                'is_correct': option.is_correct,
+                'order_number': option.order_number
+            }
+            for option in answer_options
+        ],
+        'correct_index': next((i for i, option in enumerate(answer_options) if option.is_correct), None)
+    }
+
+
+class QuestionBank:
+    """Кэш скомпилированных наборов вопросов ДЗ и бонусных тестов"""
+
+    async def _get_set(self, kind: str, parent_id: int, loader) -> List[Dict[str, Any]]:
+        async def load():
+            questions = [compile_question(question) for question in await loader()]
+            # Прогреваем кэш отдельных вопросов этого набора
+            for question in questions:
+                reference_cache.put(QUESTION_SET, ("question", kind, question['id']), question)
+            return questions
+
+        return await reference_cache.get(QUESTION_SET, ("set", kind, parent_id), load) or []
+
+    async def get_homework_questions(self, homework_id: int) -> List[Dict[str, Any]]:
+        """Получить упорядоченные вопросы домашнего задания"""
+        return await self._get_set(HOMEWORK, homework_id, lambda: QuestionRepository().get_by_parent(homework_id))
+
+    async def get_bonus_test_questions(self, bonus_test_id: int) -> List[Dict[str, Any]]:
+        """Получить упорядоченные вопросы бонусного теста"""
+        return await self._get_set(BONUS, bonus_test_id, lambda: BonusQuestionRepository().get_by_bonus_test(bonus_test_id))
+
+    async def get_question(self, question_id: int, bonus: bool = False) -> Optional[Dict[str, Any]]:
+        """Получить скомпилированный вопрос по ID (для тестов, собранных из разных ДЗ)"""
+        kind = BONUS if bonus else HOMEWORK
+
+        async def load():
+            if bonus:
+                question = await BonusQuestionRepository().get_by_id(question_id)
+            else:
+                questions = await QuestionRepository.get_by_ids([question_id])
+                question = questions[0] if questions else None
+            return compile_question(question) if question else None
+
+        return await reference_cache.get(QUESTION_SET, ("question", kind, question_id), load)
+
+    async def invalidate(self):
+        """Сбросить все скомпилированные наборы (после изменения ДЗ или бонусных тестов)"""
+        await reference_cache.invalidate(QUESTION_SET)
+
+
+# Глобальный экземпляр банка вопросов
+question_bank = QuestionBank()
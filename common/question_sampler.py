@@ -0,0 +1,181 @@
+"""
+Сервис случайной выборки вопросов для пробного ЕНТ и входных тестов курса
+
+Держит в памяти пулы ID вопросов (по предмету и по курсу+предмету),
+сначала выбирает случайные ID, а затем одним запросом загружает
+только выбранные вопросы вместе с вариантами ответов.
+
+Пулы в памяти каждого воркера. При изменении вопросов invalidate_subject() и
+invalidate_all() увеличивают версию в Redis (как reference_cache), и
+остальные воркеры сбрасывают свои пулы не позже чем через VERSION_SYNC_INTERVAL.
+"""
+import random
+import time
+import logging
+from typing import Dict, List, Tuple, Callable, Awaitable
+
+from database import QuestionRepository, Question
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Время жизни пула ID (в секундах) - страховка на случай изменений в обход инвалидации
+POOL_TTL = 600
+# Ключ Redis-хэша с версиями пулов: поле "subject:<ID>" или ALL_VERSION
+VERSIONS_KEY = "question_sampler:versions"
+ALL_VERSION = "all"
+# Как часто сверять версии с Redis (в секундах)
+VERSION_SYNC_INTERVAL = 5
+
+
+class QuestionSampler:
+    """Выборка случайных вопросов через пулы ID"""
+
+    def __init__(self, ttl: int = POOL_TTL):
+        self.ttl = ttl
+        # Ключ пула -> (время загрузки, список ID вопросов)
+        self._pools: Dict[Tuple, Tuple[float, List[int]]] = {}
+        # Известные версии пулов и счетчик локальных сбросов
+        self._versions: Dict[str, int] = {}
+        self._generation = 0
+        self._last_sync = 0.0
+
+    @staticmethod
+    def _get_redis():
+        """Получить подключенный Redis клиент (или None)"""
+        if redis_manager.connected and redis_manager.redis:
+            return redis_manager.redis
+        return None
+
+    def _drop_subject(self, subject_id: int):
+        for key in list(self._pools):
+            if key[-1] == subject_id:
+                del self._pools[key]
+        self._generation += 1
+
+    def _drop_all(self):
+        self._pools.clear()
+        self._generation += 1
+
+    async def _sync_versions(self):
+        """Сверить версии с Redis и сбросить пулы, измененные в других воркерах"""
+        now = time.monotonic()
+        if now - self._last_sync < VERSION_SYNC_INTERVAL:
+            return
+        self._last_sync = now
+
+        redis = self._get_redis()
+        if not redis:
+            return
+
+        try:
+            remote_versions = await redis.hgetall(VERSIONS_KEY)
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения версий пулов вопросов: {e}")
+            return
+
+        for field, version in remote_versions.items():
+            field = field.decode('utf-8') if isinstance(field, bytes) else field
+            version = int(version)
+            if self._versions.get(field) == version:
+                continue
+            self._versions[field] = version
+            if field == ALL_VERSION:
+                self._drop_all()
+            else:
+                self._drop_subject(int(field.split(":", 1)[1]))
+
+    async def _bump_version(self, field: str):
+        """Увеличить версию в Redis, чтобы остальные воркеры сбросили пулы"""
+        redis = self._get_redis()
+        if not redis:
+            return
+        try:
+            self._versions[field] = await redis.hincrby(VERSIONS_KEY, field, 1)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления версий пулов вопросов: {e}")
+
+    async def _get_pool(self, key: Tuple, loader: Callable[[], Awaitable[List[int]]]) -> List[int]:
+        """Получить пул ID из памяти или загрузить его из БД"""
+        await self._sync_versions()
+
+        cached = self._pools.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        generation = self._generation
+        question_ids = await loader()
+        # Не сохраняем пул, если во время загрузки пулы были сброшены
+        if self._generation == generation:
+            self._pools[key] = (time.monotonic(), question_ids)
+        return question_ids
+
+    async def _load_sample(self, pool: List[int], count: int) -> Tuple[List[Question], bool]:
+        """
+        Выбрать случайные ID из пула и загрузить вопросы
+
+        Returns:
+            Tuple[List[Question], bool]: вопросы и признак того, что все выбранные ID найдены
+        """
+        selected_ids = random.sample(pool, count) if len(pool) > count else list(pool)
+        questions = await QuestionRepository.get_by_ids(selected_ids)
+        return questions, len(questions) == len(selected_ids)
+
+    async def _sample(self, keys: List[Tuple], loaders: List[Callable[[], Awaitable[List[int]]]],
+                      count: int) -> List[Question]:
+        """Выборка из объединения пулов с повторной загрузкой при устаревших ID"""
+        for attempt in range(2):
+            pool = []
+            for key, loader in zip(keys, loaders):
+                pool.extend(await self._get_pool(key, loader))
+            if not pool:
+                return []
+
+            questions, complete = await self._load_sample(pool, count)
+            if complete or attempt:
+                return questions
+
+            # Часть вопросов удалена - сбрасываем пулы и выбираем заново
+            logger.info(f"Пулы вопросов {keys} устарели, перезагружаем")
+            for key in keys:
+                self._pools.pop(key, None)
+
+        return []
+
+    async def sample_by_subject(self, subject_id: int, count: int) -> List[Question]:
+        """Получить случайные вопросы предмета (из всех курсов)"""
+        return await self._sample(
+            [("subject", subject_id)],
+            [lambda: QuestionRepository.get_ids_by_subject(subject_id)],
+            count
+        )
+
+    async def sample_by_courses(self, course_ids: List[int], subject_id: int, count: int) -> List[Question]:
+        """Получить случайные вопросы предмета из домашних заданий указанных курсов"""
+        keys = [("course", course_id, subject_id) for course_id in course_ids]
+        loaders = [
+            (lambda course_id=course_id: QuestionRepository.get_ids_by_course_and_subject(course_id, subject_id))
+            for course_id in course_ids
+        ]
+        return await self._sample(keys, loaders, count)
+
+    async def invalidate_subject(self, subject_id: int):
+        """Сбросить все пулы предмета во всех воркерах (после изменения вопросов, ДЗ или уроков)"""
+        self._drop_subject(subject_id)
+        await self._bump_version(f"subject:{subject_id}")
+
+    async def invalidate_all(self):
+        """Сбросить все пулы во всех воркерах"""
+        self._drop_all()
+        await self._bump_version(ALL_VERSION)
+
+    def get_pool_info(self) -> Dict[str, int]:
+        """Информация о пулах"""
+        return {
+            "pools": len(self._pools),
+            "question_ids": sum(len(ids) for _, ids in self._pools.values())
+        }
+
+
+# Глобальный экземпляр сервиса выборки
+question_sampler = QuestionSampler()
@@ -9,23 +9,51 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 from aiogram.filters import Command, StateFilter
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from datetime import datetime, timedelta
 import logging
 import asyncio
+import importlib
+import time
 import uuid
 from typing import Dict, Set, Callable, Optional, Any
 
-from database import (
-    QuestionRepository, AnswerOptionRepository, BonusAnswerOptionRepository
-)
+from common.quiz_session import QuizSession, compile_session, quiz_sessions
+from common.quiz_timers import RecentQuestions, quiz_timers
+from common.media_registry import media_registry
+from middlewares.rate_limit_middleware import QUIZ, BULK, with_outbound_priority
 
-# Глобальный словарь для отслеживания активных вопросов
-# Структура: {question_uuid: {"chat_id": int, "state": FSMContext, "bot": Bot, "answered": bool}}
-active_questions: Dict[str, Dict] = {}
+# Сроки ответа на активные вопросы хранятся в quiz_timers (Redis), а текущий
+# вопрос и прогресс теста - в FSM, поэтому тест переживает перезапуск бота
 
-# Множество для отслеживания завершенных вопросов (для избежания дублирования)
-completed_questions: Set[str] = set()
+# Недавно завершенные по таймауту вопросы (для избежания дублирования)
+completed_questions = RecentQuestions()
+
+
+def _callback_name(func: Optional[Callable]) -> Optional[str]:
+    """Имя функции завершения теста для сохранения в FSM (модуль:функция)"""
+    if func is None:
+        return None
+    if "<locals>" in func.__qualname__:
+        logging.warning(f"⚠️ QUIZ: Функция завершения {func.__qualname__} не переживет перезапуск - нужна функция модуля")
+        return None
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def _resolve_callback(name: Optional[str]) -> Optional[Callable]:
+    """Функция завершения теста по имени из FSM"""
+    if not name:
+        return None
+    try:
+        module_name, qualname = name.split(":", 1)
+        func = importlib.import_module(module_name)
+        for attr in qualname.split("."):
+            func = getattr(func, attr)
+        return func
+    except Exception as e:
+        logging.error(f"❌ QUIZ: Не найдена функция завершения теста {name}: {e}")
+        return None
 
 
 def register_quiz_handlers(
@@ -62,8 +90,13 @@ def register_quiz_handlers(
             )
             return
         
-        if not current_question_uuid or current_question_uuid not in active_questions:
-
+        # Забираем вопрос: после этого таймаут по нему не сработает ни на одном воркере
+        if not current_question_uuid or not await quiz_timers.claim_answer(current_question_uuid):
+            # Вопрос уже закрыт по таймауту - запоздалый ответ не учитываем
+            # (отметка в FSM появляется после отправки сообщения о таймауте, отметка таймера - сразу)
+            if current_question_uuid and (data.get("closed_question_uuid") == current_question_uuid
+                                          or await quiz_timers.timed_out(current_question_uuid)):
+                return
 
             # Проверяем, есть ли данные состояния
             current_state = await state.get_state()
@@ -83,10 +116,6 @@ def register_quiz_handlers(
 
             return
         
-        # Отмечаем вопрос как отвеченный
-        active_questions[current_question_uuid]["answered"] = True
-
-        
         # Если есть кастомный обработчик, вызываем его
         if poll_answer_handler:
             await poll_answer_handler(poll, state, current_question_uuid)
@@ -116,13 +145,17 @@ def register_quiz_handlers(
             
             # Проверяем активность основного таймера
             if current_question_uuid:
-                if current_question_uuid in active_questions:
+                if await quiz_timers.is_scheduled(current_question_uuid):
 
                     return
                 
                 if current_question_uuid in completed_questions:
 
                     return
+
+                if data.get("closed_question_uuid") == current_question_uuid:
+
+                    return
             
 
             
@@ -137,14 +170,80 @@ def register_quiz_handlers(
             logging.error(f"❌ QUIZ: Ошибка в резервном обработчике опроса: {e}")
 
 
+async def _load_session(state: FSMContext, data: dict) -> Optional[QuizSession]:
+    """Сессия текущей попытки; при старте попытки - компиляция вопросов из FSM"""
+    questions = data.get("questions")
+    if not questions:
+        return await quiz_sessions.get(data.get("quiz_session_id"))
+
+    # Старт попытки: компилируем тест один раз и убираем его из FSM
+    session = await compile_session(questions, bonus=data.get("bonus_test_id") is not None)
+    await quiz_sessions.save(session)
+    count = len(session.questions)
+    answers, times = [None] * count, [None] * count
+
+    # Попытка, начатая до компиляции сессий, продолжается с уже данными ответами
+    for index, result in enumerate((data.get("question_results") or [])[:count]):
+        option_ids = session.questions[index].option_ids
+        selected_id = result.get("selected_answer_id")
+        answers[index] = option_ids.index(selected_id) if selected_id in option_ids else None
+        times[index] = result.get("time_spent")
+
+    await state.update_data(
+        questions=None,
+        quiz_session_id=session.id,
+        quiz_answers=answers,
+        quiz_times=times
+    )
+    data.update(quiz_session_id=session.id, quiz_answers=answers, quiz_times=times)
+    return session
+
+
+async def _finish_session(state: FSMContext, data: dict, session: QuizSession):
+    """Вернуть в FSM вопросы и результаты в прежнем формате для обработчика завершения"""
+    await state.update_data(
+        questions=session.source,
+        question_results=session.build_results(
+            data.get("quiz_answers") or [], data.get("quiz_times") or [], data.get("q_index", 0)
+        ),
+        quiz_session_id=None,
+        quiz_answers=None,
+        quiz_times=None
+    )
+    await quiz_sessions.discard(session.id)
+
+
+def _time_spent(data: dict) -> Optional[int]:
+    started_at = data.get("question_started_at")
+    return int(time.time() - started_at) if started_at else None
+
+
+async def _record_answer(state: FSMContext, data: dict, index: int, selected: Optional[int],
+                         time_spent: Optional[int], is_correct: bool, **extra):
+    """Записать ответ (selected=None - таймаут) в массивы попытки и перейти к следующему вопросу"""
+    answers = data.get("quiz_answers") or []
+    times = data.get("quiz_times") or []
+    if index < len(answers):
+        answers[index] = selected
+        times[index] = time_spent
+    await state.update_data(
+        score=data.get("score", 0) + (1 if is_correct else 0),
+        q_index=index + 1,
+        quiz_answers=answers,
+        quiz_times=times,
+        **extra
+    )
+
+
+@with_outbound_priority(QUIZ)
 async def send_next_question(chat_id: int, state: FSMContext, bot: Bot, finish_callback: Optional[Callable] = None):
     """Универсальная функция отправки следующего вопроса"""
     data = await state.get_data()
     index = data.get("q_index", 0)
-    questions = data.get("questions", [])
+    session = await _load_session(state, data) if data else None
 
     # Проверяем валидность данных состояния
-    if not data or not questions:
+    if not session or not session.questions:
 
         await bot.send_message(
             chat_id,
@@ -153,51 +252,24 @@ async def send_next_question(chat_id: int, state: FSMContext, bot: Bot, finish_c
         await state.clear()
         return
 
-    if index >= len(questions):
+    if index >= len(session.questions):
         # Завершаем тест
+        await _finish_session(state, data, session)
         if finish_callback:
             await finish_callback(chat_id, state, bot)
         return
     
-    question_data = questions[index]
-    question_id = question_data['id']
-    
-    # Определяем тип теста и получаем варианты ответов
-    # Проверяем, есть ли в данных состояния информация о бонусном тесте
-    is_bonus_test = data.get("bonus_test_id") is not None
-
-
+    question = session.questions[index]
 
-    if is_bonus_test:
-        # Для бонусных тестов используем BonusAnswerOptionRepository
-        answer_options = await BonusAnswerOptionRepository.get_by_bonus_question(question_id)
-
-    else:
-        # Для обычных тестов используем AnswerOptionRepository
-        answer_options = await AnswerOptionRepository.get_by_question(question_id)
-
-
-    if not answer_options:
-        error_msg = f"❌ QUIZ: Варианты ответов не найдены для вопроса ID {question_id}"
+    if not question.options:
+        error_msg = f"❌ QUIZ: Варианты ответов не найдены для вопроса ID {question.id}"
         logging.error(error_msg)
 
         await bot.send_message(chat_id, "❌ Ошибка: варианты ответов не найдены")
         return
     
-    # Сортируем варианты по порядковому номеру
-    answer_options.sort(key=lambda x: x.order_number)
-    
-    # Формируем список вариантов ответов и находим правильный
-    options = []
-    correct_option_id = None
-    
-    for i, option in enumerate(answer_options):
-        options.append(option.text)
-        if option.is_correct:
-            correct_option_id = i
-    
-    if correct_option_id is None:
-        error_msg = f"❌ QUIZ: Правильный ответ не найден для вопроса ID {question_id}"
+    if question.correct_index is None:
+        error_msg = f"❌ QUIZ: Правильный ответ не найден для вопроса ID {question.id}"
         logging.error(error_msg)
 
         await bot.send_message(chat_id, "❌ Ошибка: правильный ответ не найден")
@@ -208,55 +280,37 @@ async def send_next_question(chat_id: int, state: FSMContext, bot: Bot, finish_c
     
     # Сохраняем информацию о текущем вопросе
     await state.update_data(
-        current_question_id=question_id,
+        current_question_id=question.id,
         current_question_uuid=question_uuid,
-        current_answer_options=[{
-            'id': opt.id,
-            'text': opt.text,
-            'is_correct': opt.is_correct,
-            'order_number': opt.order_number
-        } for opt in answer_options],
-        question_start_time=datetime.now().isoformat(),
-        question_answered=False
+        question_started_at=time.time(),
+        question_answered=False,
+        quiz_finish_callback=_callback_name(finish_callback)
     )
     
-    # Регистрируем активный вопрос
-    active_questions[question_uuid] = {
-        "chat_id": chat_id,
-        "state": state,
-        "bot": bot,
-        "answered": False,
-        "question_id": question_id,
-        "start_time": datetime.now(),
-        "finish_callback": finish_callback
-    }
+    # Регистрируем срок ответа на вопрос (таймаут обработает любой воркер)
+    await quiz_timers.schedule(question_uuid, question.time_limit, state.key)
     
     # Используем индивидуальный таймер для каждого вопроса
-    close_date = int((datetime.now() + timedelta(seconds=question_data['time_limit'])).timestamp())
+    close_date = int((datetime.now() + timedelta(seconds=question.time_limit)).timestamp())
     
-    # Формируем текст вопроса
-    question_text = question_data['text']
     photo_message = None
     
-    if question_data['photo_path']:
+    if question.photo_path:
         # Если есть фото, сначала отправляем его
-        photo_message = await bot.send_photo(
-            chat_id=chat_id,
-            photo=question_data['photo_path'],
-        )
+        # Файл загружается в Telegram один раз, дальше отправляется file_id
+        photo_message = await media_registry.send_photo(bot, chat_id, question.photo_path)
     
     poll_message = await bot.send_poll(
         chat_id=chat_id,
-        question=f"{question_text}",
-        options=options,
+        question=question.text,
+        options=list(question.options),
         type="quiz",
-        correct_option_id=correct_option_id,
+        correct_option_id=question.correct_index,
         is_anonymous=False,
         close_date=close_date
     )
     
     # Сохраняем ID сообщений для последующего удаления
-    data = await state.get_data()
     messages_to_delete = data.get("messages_to_delete", [])
     
     if photo_message:
@@ -268,78 +322,33 @@ async def send_next_question(chat_id: int, state: FSMContext, bot: Bot, finish_c
         current_poll_message_id=poll_message.message_id,
         messages_to_delete=messages_to_delete
     )
-    
-
-    
-    # Запускаем надежный таймер для обработки таймаута
-    asyncio.create_task(handle_question_timeout_reliable(
-        question_uuid, question_data['time_limit'], finish_callback
-    ))
 
 
 async def default_poll_answer_handler(poll: PollAnswer, state: FSMContext, question_uuid: str):
     """Стандартный обработчик ответа на вопрос"""
     data = await state.get_data()
     index = data.get("q_index", 0)
-    questions = data.get("questions", [])
-    current_question_id = data.get("current_question_id")
-    current_answer_options = data.get("current_answer_options", [])
-    question_start_time_str = data.get("question_start_time")
+    session = await quiz_sessions.get(data.get("quiz_session_id"))
     
-    if index >= len(questions) or not current_question_id:
+    if not session or index >= len(session.questions) or not data.get("current_question_id"):
         return
     
-    selected_option_index = poll.option_ids[0]
-    selected_answer = current_answer_options[selected_option_index] if selected_option_index < len(current_answer_options) else None
+    # Проверяем правильность ответа по индексу, скомпилированному при старте
+    question = session.questions[index]
+    selected = poll.option_ids[0] if poll.option_ids else None
+    is_correct = selected is not None and selected == question.correct_index
     
-    # Проверяем правильность ответа
-    is_correct = selected_answer and selected_answer['is_correct']
-    
-    # Вычисляем время, потраченное на ответ
-    time_spent = None
-    if question_start_time_str:
-        question_start_time = datetime.fromisoformat(question_start_time_str)
-        time_spent = int((datetime.now() - question_start_time).total_seconds())
-    
-    # Получаем данные текущего вопроса
-    current_question_data = questions[index]
-    
-    # Сохраняем результат ответа на вопрос
-    question_results = data.get("question_results", [])
-    question_results.append({
-        "question_id": current_question_id,
-        "selected_answer_id": selected_answer['id'] if selected_answer else None,
-        "is_correct": is_correct,
-        "time_spent": time_spent,
-        "microtopic_number": current_question_data['microtopic_number']
-    })
-    
-    # Отмечаем, что на вопрос ответили
-    await state.update_data(question_answered=True)
-    
-    # Обновляем счетчик правильных ответов
-    score = data.get("score", 0)
-    if is_correct:
-        score += 1
-    
-    # Обновляем состояние
-    await state.update_data(
-        score=score,
-        q_index=index + 1,
-        question_results=question_results
-    )
-    
-
+    # Сохраняем ответ и переходим к следующему вопросу
+    await _record_answer(state, data, index, selected, _time_spent(data), is_correct, question_answered=True)
 
-    # Получаем finish_callback из активного вопроса
-    finish_callback = None
-    if question_uuid in active_questions:
-        finish_callback = active_questions[question_uuid].get("finish_callback")
+    # Функция завершения теста сохранена в FSM
+    finish_callback = _resolve_callback(data.get("quiz_finish_callback"))
 
     # Отправляем следующий вопрос
     await send_next_question(poll.user.id, state, poll.bot, finish_callback)
 
 
+@with_outbound_priority(QUIZ)
 async def default_timeout_handler(poll: Poll, state: FSMContext, bot: Bot, question_uuid: str):
     """Стандартный обработчик таймаута"""
 
@@ -350,224 +359,143 @@ async def default_timeout_handler(poll: Poll, state: FSMContext, bot: Bot, quest
         logging.error("❌ QUIZ: Нет user_id в данных состояния")
         return
     
+    index = data.get("q_index", 0)
+    session = await quiz_sessions.get(data.get("quiz_session_id"))
+    if not session or index >= len(session.questions) or not data.get("current_question_id"):
+        return
+    question = session.questions[index]
+
     # Показываем сообщение о таймауте
-    current_answer_options = data.get("current_answer_options", [])
-    correct_answer = next((opt for opt in current_answer_options if opt['is_correct']), None)
-    
-    if correct_answer:
+    if question.correct_text:
         timeout_message = await bot.send_message(
             user_id,
             f"⏰ Время вышло! (резервная обработка)\n\n"
-            f"✅ Правильный ответ: {correct_answer['text']}"
+            f"✅ Правильный ответ: {question.correct_text}"
         )
         
         # Добавляем сообщение о таймауте в список для удаления
-        messages_to_delete = data.get("messages_to_delete", [])
-        messages_to_delete.append(timeout_message.message_id)
-        await state.update_data(messages_to_delete=messages_to_delete)
+        data.setdefault("messages_to_delete", []).append(timeout_message.message_id)
     
-    # Сохраняем результат таймаута
-    index = data.get("q_index", 0)
-    questions = data.get("questions", [])
-    current_question_id = data.get("current_question_id")
+    # Сохраняем результат таймаута и переходим к следующему вопросу
+    await _record_answer(
+        state, data, index, None, None, False,
+        question_answered=False, messages_to_delete=data.get("messages_to_delete", [])
+    )
     
-    if index < len(questions) and current_question_id:
-        current_question_data = questions[index]
-        question_results = data.get("question_results", [])
-        
-        question_results.append({
-            "question_id": current_question_id,
-            "selected_answer_id": None,
-            "is_correct": False,
-            "time_spent": None,
-            "microtopic_number": current_question_data['microtopic_number']
-        })
-        
-        # Переходим к следующему вопросу
-        await state.update_data(
-            q_index=index + 1,
-            question_results=question_results,
-            question_answered=False
-        )
-        
-        await asyncio.sleep(2)
-        # Получаем finish_callback из активного вопроса (если есть)
-        finish_callback = None
-        if question_uuid and question_uuid in active_questions:
-            finish_callback = active_questions[question_uuid].get("finish_callback")
-        await send_next_question(user_id, state, bot, finish_callback)
-
+    await asyncio.sleep(2)
+    # Функция завершения теста сохранена в FSM
+    finish_callback = _resolve_callback(data.get("quiz_finish_callback"))
+    await send_next_question(user_id, state, bot, finish_callback)
 
-async def handle_question_timeout_reliable(question_uuid: str, timeout_seconds: int, finish_callback: Optional[Callable] = None):
-    """Надежная обработка таймаута вопроса через уникальный UUID"""
-    try:
-
-        await asyncio.sleep(timeout_seconds)
-        
-        # Проверяем, что вопрос еще активен
-        if question_uuid not in active_questions:
-
-            return
-        
-        question_info = active_questions[question_uuid]
-        
-        # Проверяем, был ли уже дан ответ
-        if question_info["answered"]:
-
-            del active_questions[question_uuid]
-            return
-        
-
-        
-        # Обрабатываем таймаут
-        await process_question_timeout_reliable(question_uuid, finish_callback)
-        
-    except Exception as e:
-        logging.error(f"❌ QUIZ: Ошибка в обработчике таймаута для {question_uuid}: {e}")
-        if question_uuid in active_questions:
-            del active_questions[question_uuid]
 
+@with_outbound_priority(QUIZ)
+async def process_question_timeout_reliable(question_uuid: str, state: FSMContext, bot: Bot):
+    """
+    Надежная обработка таймаута вопроса (вызывается quiz_timers после захвата срока)
 
-async def process_question_timeout_reliable(question_uuid: str, finish_callback: Optional[Callable] = None):
-    """Надежная обработка таймаута вопроса"""
+    Повторный вызов после перезапуска (истекла аренда таймаута) продолжает с
+    того же места: если таймаут уже записан, остается отправить следующий вопрос.
+    """
     try:
-        if question_uuid not in active_questions:
-            logging.error(f"❌ QUIZ: Вопрос {question_uuid} не найден в активных")
-            return
-
-        question_info = active_questions[question_uuid]
-        chat_id = question_info["chat_id"]
-        state = question_info["state"]
-        bot = question_info["bot"]
+        chat_id = state.key.chat_id
 
         # Отмечаем как завершенный
         completed_questions.add(question_uuid)
 
         data = await state.get_data()
         index = data.get("q_index", 0)
-        questions = data.get("questions", [])
-        current_question_id = data.get("current_question_id")
-        question_start_time_str = data.get("question_start_time")
 
-
-
-        if index >= len(questions) or not current_question_id:
-            logging.error(f"❌ QUIZ: Некорректные данные вопроса для {question_uuid}")
-            del active_questions[question_uuid]
+        if data.get("current_question_uuid") != question_uuid:
+            # Тест уже завершен, прерван или следующий вопрос уже отправлен
             return
 
-        # Вычисляем время
-        time_spent = None
-        if question_start_time_str:
-            question_start_time = datetime.fromisoformat(question_start_time_str)
-            time_spent = int((datetime.now() - question_start_time).total_seconds())
-
-        # Получаем данные текущего вопроса
-        current_question_data = questions[index]
-
-        # Сохраняем результат как неправильный ответ (таймаут)
-        question_results = data.get("question_results", [])
-        question_results.append({
-            "question_id": current_question_id,
-            "selected_answer_id": None,
-            "is_correct": False,
-            "time_spent": time_spent,
-            "microtopic_number": current_question_data['microtopic_number']
-        })
-
-        # Показываем правильный ответ
-        current_answer_options = data.get("current_answer_options", [])
-        correct_answer = next((opt for opt in current_answer_options if opt['is_correct']), None)
-
-        if correct_answer:
-            timeout_message = await bot.send_message(
-                chat_id,
-                f"⏰ Время вышло!\n\n"
-                f"✅ Правильный ответ: {correct_answer['text']}"
-            )
-
-            # Добавляем сообщение о таймауте в список для удаления
-            data = await state.get_data()
-            messages_to_delete = data.get("messages_to_delete", [])
-            messages_to_delete.append(timeout_message.message_id)
-            await state.update_data(messages_to_delete=messages_to_delete)
-
-
-
-        # Переходим к следующему вопросу
-        await state.update_data(
-            q_index=index + 1,
-            question_results=question_results,
-            question_answered=False
-        )
-
-
+        if data.get("closed_question_uuid") != question_uuid:
+            session = await quiz_sessions.get(data.get("quiz_session_id"))
+            if not session or index >= len(session.questions) or not data.get("current_question_id"):
+                logging.error(f"❌ QUIZ: Некорректные данные вопроса для {question_uuid}")
+                return
 
-        # Очищаем из активных вопросов
-        del active_questions[question_uuid]
+            question = session.questions[index]
+
+            # Показываем правильный ответ
+            if question.correct_text:
+                timeout_message = await bot.send_message(
+                    chat_id,
+                    f"⏰ Время вышло!\n\n"
+                    f"✅ Правильный ответ: {question.correct_text}"
+                )
+
+                # Добавляем сообщение о таймауте в список для удаления
+                data.setdefault("messages_to_delete", []).append(timeout_message.message_id)
+
+            # Сохраняем результат как неправильный ответ (таймаут) и переходим к следующему вопросу
+            await _record_answer(
+                state, data, index, None, _time_spent(data), False,
+                question_answered=False,
+                closed_question_uuid=question_uuid,
+                messages_to_delete=data.get("messages_to_delete", [])
+            )
 
-        # Небольшая задержка перед следующим вопросом
-        await asyncio.sleep(2)
+            # Небольшая задержка перед следующим вопросом
+            await asyncio.sleep(2)
 
         # Отправляем следующий вопрос или завершаем тест
+        finish_callback = _resolve_callback(data.get("quiz_finish_callback"))
         await send_next_question(chat_id, state, bot, finish_callback)
 
 
     except Exception as e:
         logging.error(f"❌ QUIZ: Ошибка в process_question_timeout_reliable для {question_uuid}: {e}")
-        import traceback
 
 
-        # Очищаем из активных вопросов при ошибке
-        if question_uuid in active_questions:
-            del active_questions[question_uuid]
+# Максимум сообщений в одном вызове deleteMessages (ограничение Bot API)
+DELETE_MESSAGES_BATCH = 100
+# Параллельных удалений по одному, если пакетное удаление не удалось
+DELETE_FALLBACK_CONCURRENCY = 10
 
+# Фоновые задачи очистки (ссылки нужны, чтобы задачи не собрал сборщик мусора)
+_cleanup_tasks: Set[asyncio.Task] = set()
 
-async def cleanup_test_messages(chat_id: int, data: dict, bot: Bot):
-    """Удаление всех сообщений теста"""
-    import time
-    start_time = time.time()
 
-    try:
-        messages_to_delete = data.get("messages_to_delete", [])
-
-        if not messages_to_delete:
-
-            return
-
-
-
-        # Удаляем сообщения пакетами для ускорения
-        deleted_count = 0
-        batch_size = 10
-
-        for i in range(0, len(messages_to_delete), batch_size):
-            batch = messages_to_delete[i:i + batch_size]
-
-            # Создаем задачи для параллельного удаления
-            tasks = []
-            for message_id in batch:
-                task = asyncio.create_task(delete_message_safe(bot, chat_id, message_id))
-                tasks.append(task)
-
-            # Ждем завершения всех задач в пакете
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Подсчитываем успешные удаления
-            for result in results:
-                if result is True:
-                    deleted_count += 1
+async def cleanup_test_messages(chat_id: int, data: dict, bot: Bot):
+    """Удаление всех сообщений теста в фоне (не задерживает сообщение с результатами)"""
+    message_ids = list(dict.fromkeys(data.get("messages_to_delete", [])))
+    if not message_ids:
+        return
 
-            # Небольшая задержка между пакетами для избежания rate limit
-            if i + batch_size < len(messages_to_delete):
-                await asyncio.sleep(0.05)
+    task = asyncio.create_task(delete_test_messages(bot, chat_id, message_ids))
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
 
-        end_time = time.time()
-        duration = end_time - start_time
 
+@with_outbound_priority(BULK)
+async def delete_test_messages(bot: Bot, chat_id: int, message_ids: list) -> int:
+    """Удалить сообщения пакетами deleteMessages по DELETE_MESSAGES_BATCH"""
+    deleted_count = 0
+    try:
+        for i in range(0, len(message_ids), DELETE_MESSAGES_BATCH):
+            batch = message_ids[i:i + DELETE_MESSAGES_BATCH]
+            try:
+                await bot.delete_messages(chat_id=chat_id, message_ids=batch)
+                deleted_count += len(batch)
+            except TelegramBadRequest as e:
+                # Сообщения старше 48 часов Telegram удалить не дает - удаляем по одному
+                # то, что еще можно, остальные пропускаем
+                logging.debug(f"QUIZ: Пакетное удаление не удалось ({e}), удаляем по одному")
+                for j in range(0, len(batch), DELETE_FALLBACK_CONCURRENCY):
+                    results = await asyncio.gather(*(
+                        delete_message_safe(bot, chat_id, message_id)
+                        for message_id in batch[j:j + DELETE_FALLBACK_CONCURRENCY]
+                    ))
+                    deleted_count += sum(1 for result in results if result)
+
+        skipped = len(message_ids) - deleted_count
+        if skipped:
+            logging.info(f"QUIZ: Не удалено {skipped} из {len(message_ids)} сообщений теста в чате {chat_id}")
 
     except Exception as e:
         logging.error(f"❌ QUIZ: Ошибка при удалении сообщений теста: {e}")
+    return deleted_count
 
 
 async def delete_message_safe(bot: Bot, chat_id: int, message_id: int) -> bool:
@@ -581,43 +509,33 @@ async def delete_message_safe(bot: Bot, chat_id: int, message_id: int) -> bool:
 
 
 async def cleanup_orphaned_quiz_states():
-    """Очистка зависших состояний quiz после перезагрузки системы"""
+    """Проверка незавершенных вопросов после перезагрузки системы"""
     try:
-        # Очищаем все активные вопросы (они потеряли актуальность после перезагрузки)
-        active_questions.clear()
+        # Сроки вопросов хранятся в Redis: просроченные за время перезагрузки
+        # обработает цикл таймеров, остальные тесты продолжатся с ответа студента
         completed_questions.clear()
+        pending = await quiz_timers.pending_count()
+        if pending:
+            logging.info(f"⏱️ QUIZ: {pending} вопросов ожидают ответа, тесты будут продолжены")
 
     except Exception as e:
-        logging.error(f"❌ QUIZ: Ошибка при очистке зависших состояний: {e}")
+        logging.error(f"❌ QUIZ: Ошибка при проверке незавершенных вопросов: {e}")
 
 
 async def cleanup_test_data(user_id: int):
     """Очистка данных завершенного теста"""
     try:
-        # Очищаем активные вопросы для этого пользователя
-        questions_to_remove = []
-        for question_uuid, question_info in active_questions.items():
-            if question_info.get("chat_id") == user_id:
-                questions_to_remove.append(question_uuid)
-
-        for question_uuid in questions_to_remove:
-            del active_questions[question_uuid]
-
-
-        # Очищаем старые завершенные вопросы (оставляем только последние 100)
-        if len(completed_questions) > 100:
-            completed_list = list(completed_questions)
-            completed_questions.clear()
-            completed_questions.update(completed_list[-50:])
-
+        # Снимаем ожидающий вопрос пользователя через индекс чата (без перебора)
+        # Завершенные вопросы ограничены RecentQuestions и удаляются сами
+        await quiz_timers.cancel_chat(user_id)
 
     except Exception as e:
         logging.error(f"❌ QUIZ: Ошибка при очистке данных теста: {e}")
 
 
-def get_active_questions_count() -> int:
+async def get_active_questions_count() -> int:
     """Получить количество активных вопросов (для мониторинга)"""
-    return len(active_questions)
+    return await quiz_timers.pending_count()
 
 
 def get_completed_questions_count() -> int:
@@ -0,0 +1,182 @@
+"""
+Скомпилированная сессия прохождения теста
+
+При старте попытки вопросы теста компилируются один раз: тексты вариантов
+ответов в порядке показа, их ID, индекс правильного ответа, лимит времени и
+микротема. Сессия хранится отдельно от FSM (Redis, без Redis - память
+процесса) и кэшируется в процессе, а в FSM остаются только ID сессии,
+номер вопроса, счет и массивы ответов фиксированной длины. Поэтому ответ на
+вопрос не сортирует варианты и не пересохраняет весь тест в FSM.
+
+При завершении теста в FSM восстанавливаются questions и question_results
+в прежнем формате - обработчики завершения тестов не меняются.
+"""
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.question_bank import question_bank
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Время жизни сессии в Redis (как у данных FSM)
+SESSION_TTL = 86400
+# Сколько сессий держать в памяти процесса
+LOCAL_SESSIONS_LIMIT = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledQuestion:
+    """Вопрос в порядке показа: варианты уже отсортированы"""
+    id: int
+    text: str
+    photo_path: Optional[str]
+    time_limit: int
+    microtopic_number: Optional[int]
+    options: Tuple[str, ...]
+    option_ids: Tuple[Optional[int], ...]
+    correct_index: Optional[int]
+
+    @property
+    def correct_text(self) -> Optional[str]:
+        return self.options[self.correct_index] if self.correct_index is not None else None
+
+
+@dataclass(slots=True)
+class QuizSession:
+    """Скомпилированные вопросы попытки и исходные данные вопросов"""
+    id: str
+    questions: List[CompiledQuestion]
+    source: List[Dict[str, Any]]
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "q": [
+                [q.id, q.text, q.photo_path, q.time_limit, q.microtopic_number,
+                 list(q.options), list(q.option_ids), q.correct_index]
+                for q in self.questions
+            ],
+            "source": self.source
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, session_id: str, payload: str) -> "QuizSession":
+        data = json.loads(payload)
+        questions = [
+            CompiledQuestion(q[0], q[1], q[2], q[3], q[4], tuple(q[5]), tuple(q[6]), q[7])
+            for q in data["q"]
+        ]
+        return cls(session_id, questions, data["source"])
+
+    def build_results(self, answers: List[Optional[int]], times: List[Optional[int]], count: int) -> List[dict]:
+        """Результаты ответов в формате question_results для обработчиков завершения"""
+        results = []
+        for index in range(min(count, len(self.questions))):
+            question = self.questions[index]
+            selected = answers[index]
+            has_answer = selected is not None and selected < len(question.option_ids)
+            results.append({
+                "question_id": question.id,
+                "selected_answer_id": question.option_ids[selected] if has_answer else None,
+                "is_correct": has_answer and selected == question.correct_index,
+                "time_spent": times[index],
+                "microtopic_number": question.microtopic_number
+            })
+        return results
+
+
+async def compile_session(questions: List[Dict[str, Any]], bonus: bool = False) -> QuizSession:
+    """
+    Скомпилировать вопросы попытки
+
+    Варианты ответов берутся из данных вопроса (входные тесты, пробный ЕНТ)
+    или из банка вопросов (ДЗ и бонусные тесты).
+    """
+    compiled = []
+    for question in questions:
+        answer_options = question.get("answer_options")
+        if not answer_options:
+            bank_question = await question_bank.get_question(question["id"], bonus=bonus)
+            answer_options = bank_question["answer_options"] if bank_question else []
+
+        answer_options = sorted(answer_options, key=lambda option: option["order_number"])
+        compiled.append(CompiledQuestion(
+            id=question["id"],
+            text=question["text"],
+            photo_path=question.get("photo_path"),
+            time_limit=question["time_limit"],
+            microtopic_number=question.get("microtopic_number"),
+            options=tuple(option["text"] for option in answer_options),
+            option_ids=tuple(option.get("id") for option in answer_options),
+            correct_index=next((i for i, option in enumerate(answer_options) if option["is_correct"]), None)
+        ))
+    return QuizSession(str(uuid.uuid4()), compiled, questions)
+
+
+class QuizSessionStore:
+    """Хранилище скомпилированных сессий: Redis и LRU в памяти процесса"""
+
+    def __init__(self, maxsize: int = LOCAL_SESSIONS_LIMIT):
+        self.maxsize = maxsize
+        self._local: "OrderedDict[str, QuizSession]" = OrderedDict()
+        self._stats = {"hits": 0, "loads": 0, "compiled": 0}
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"quiz:session:{session_id}"
+
+    def _remember(self, session: QuizSession):
+        self._local[session.id] = session
+        self._local.move_to_end(session.id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def save(self, session: QuizSession):
+        """Сохранить новую сессию (один раз при старте попытки)"""
+        self._stats["compiled"] += 1
+        self._remember(session)
+        if await redis_manager.is_connected():
+            try:
+                await redis_manager.redis.setex(self._key(session.id), SESSION_TTL, session.to_json())
+            except Exception as e:
+                logger.error(f"❌ QUIZ: Ошибка сохранения сессии {session.id}: {e}")
+
+    async def get(self, session_id: Optional[str]) -> Optional[QuizSession]:
+        """Сессия по ID: из памяти процесса или из Redis (после перезапуска или на другом воркере)"""
+        if not session_id:
+            return None
+        session = self._local.get(session_id)
+        if session:
+            self._stats["hits"] += 1
+            self._local.move_to_end(session_id)
+            return session
+
+        if not await redis_manager.is_connected():
+            return None
+        try:
+            payload = await redis_manager.redis.get(self._key(session_id))
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка загрузки сессии {session_id}: {e}")
+            return None
+        if not payload:
+            return None
+        self._stats["loads"] += 1
+        session = QuizSession.from_json(session_id, payload.decode("utf-8"))
+        self._remember(session)
+        return session
+
+    async def discard(self, session_id: str):
+        """Удалить сессию завершенной попытки"""
+        self._local.pop(session_id, None)
+        await redis_manager.delete(self._key(session_id))
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, "local": len(self._local)}
+
+
+# Глобальное хранилище сессий тестов
+quiz_sessions = QuizSessionStore()
@@ -0,0 +1,402 @@
+"""
+Надежные таймеры вопросов quiz
+
+Сроки ответа на вопросы хранятся в Redis: sorted set DEADLINES_KEY
+(question_uuid -> время окончания) и хэш TIMERS_KEY с ключом FSM студента.
+Фоновый цикл каждого воркера забирает наступившие сроки. Вопрос достается
+тому, чей ZREM вернул 1, поэтому таймаут обрабатывается ровно один раз, даже
+если воркеров несколько. Ответ студента забирает вопрос тем же ZREM, так что
+ответ и таймаут одного вопроса не обрабатываются оба. Вопрос, забранный по
+таймауту, отмечается (timed_out), и опоздавший ответ на него игнорируется.
+
+Таймаут обрабатывается с паузой перед следующим вопросом, поэтому вместе с
+ZREM вопроса в DEADLINES_KEY ставится аренда "lease:<uuid>" на TIMEOUT_LEASE
+секунд. Она снимается, когда следующий вопрос отправлен. Если воркер
+перезапустился или упал посреди обработки, аренда истекает и таймаут
+продолжается на любом воркере с того же места. Задачи обработки хранятся в
+_fire_tasks, stop() дожидается их или отменяет, не снимая аренду.
+
+Состояние теста целиком хранится в FSM, поэтому после перезапуска или на
+другом воркере тест продолжается: вопросы, срок которых истек во время
+перезапуска, обрабатываются как таймаут, ответы на текущий вопрос
+принимаются. Без Redis сроки хранятся в памяти процесса: у каждого вопроса
+свой таймер loop.call_later, который отменяется при ответе.
+
+У студента в каждый момент не больше одного ожидающего вопроса, поэтому
+индекс CHATS_KEY (chat_id -> question_uuid) позволяет снять вопросы
+завершенного теста без перебора всех таймеров.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+DEADLINES_KEY = "quiz:deadlines"
+TIMERS_KEY = "quiz:timers"
+CHATS_KEY = "quiz:chat_questions"
+# Период проверки наступивших сроков (в секундах)
+POLL_INTERVAL = 0.5
+# Сколько наступивших сроков забирается за одну проверку
+CLAIM_BATCH = 100
+# Отметка вопроса, закрытого по таймауту (ответ на него игнорируется, а не сбрасывает тест)
+TIMED_OUT_KEY = "quiz:timed_out:{}"
+# Аренда обработки таймаута: префикс члена DEADLINES_KEY и срок (в секундах)
+LEASE_PREFIX = "lease:"
+TIMEOUT_LEASE = 30
+# Сколько stop() ждет незавершенные обработки таймаутов перед отменой (в секундах)
+STOP_DRAIN_TIMEOUT = 5
+
+# Сколько закрытых вопросов помнить и как долго (дольше самого длинного time_limit)
+COMPLETED_QUESTIONS_LIMIT = 10000
+COMPLETED_QUESTIONS_TTL = 600
+
+
+class RecentQuestions:
+    """Ограниченное множество недавно завершенных вопросов (LRU с TTL)"""
+
+    def __init__(self, maxsize: int = COMPLETED_QUESTIONS_LIMIT, ttl: float = COMPLETED_QUESTIONS_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+
+    def _expire(self, now: float):
+        # Записи упорядочены по времени добавления - удаляем с начала
+        while self._items:
+            question_uuid, added_at = next(iter(self._items.items()))
+            if now - added_at < self.ttl and len(self._items) <= self.maxsize:
+                break
+            self._items.popitem(last=False)
+
+    def add(self, question_uuid: str):
+        now = time.monotonic()
+        self._items[question_uuid] = now
+        self._items.move_to_end(question_uuid)
+        self._expire(now)
+
+    def __contains__(self, question_uuid) -> bool:
+        added_at = self._items.get(question_uuid)
+        return added_at is not None and time.monotonic() - added_at < self.ttl
+
+    def __len__(self) -> int:
+        self._expire(time.monotonic())
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+
+class _LocalTimer:
+    __slots__ = ("key", "handle")
+
+    def __init__(self, key: dict, handle: asyncio.TimerHandle):
+        self.key = key
+        self.handle = handle
+
+
+class QuizTimers:
+    """Очередь сроков ответа на вопросы и фоновая обработка таймаутов"""
+
+    def __init__(self):
+        self._local: Dict[str, _LocalTimer] = {}
+        self._local_chats: Dict[int, str] = {}
+        self._timed_out = RecentQuestions()
+        self._bot: Optional[Bot] = None
+        self._storage: Optional[BaseStorage] = None
+        self._task: Optional[asyncio.Task] = None
+        # Задачи обработки таймаутов (ссылки нужны, чтобы stop() их дождался)
+        self._fire_tasks: Set[asyncio.Task] = set()
+        self._stats = {"scheduled": 0, "answered": 0, "timeouts": 0, "resumed": 0}
+
+    @staticmethod
+    def _pack_key(key: StorageKey) -> str:
+        return json.dumps({
+            "bot_id": key.bot_id,
+            "chat_id": key.chat_id,
+            "user_id": key.user_id,
+            "thread_id": key.thread_id,
+            "destiny": key.destiny
+        })
+
+    @staticmethod
+    def _unpack_key(payload) -> StorageKey:
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        return StorageKey(**json.loads(payload))
+
+    # === РЕГИСТРАЦИЯ И ЗАХВАТ ВОПРОСОВ ===
+
+    async def schedule(self, question_uuid: str, timeout_seconds: float, key: StorageKey):
+        """Зарегистрировать вопрос со сроком ответа timeout_seconds"""
+        deadline = time.time() + timeout_seconds
+        payload = self._pack_key(key)
+        self._stats["scheduled"] += 1
+
+        if await redis_manager.is_connected():
+            try:
+                pipe = redis_manager.redis.pipeline()
+                pipe.hset(TIMERS_KEY, question_uuid, payload)
+                pipe.hset(CHATS_KEY, key.chat_id, question_uuid)
+                pipe.zadd(DEADLINES_KEY, {question_uuid: deadline})
+                await pipe.execute()
+                return
+            except Exception as e:
+                logger.error(f"❌ QUIZ: Ошибка сохранения срока вопроса {question_uuid}: {e}")
+
+        handle = asyncio.get_running_loop().call_later(
+            timeout_seconds, lambda: self._spawn(self._fire_local(question_uuid))
+        )
+        self._local[question_uuid] = _LocalTimer(json.loads(payload), handle)
+        self._local_chats[key.chat_id] = question_uuid
+
+    async def claim(self, question_uuid: str, timeout: bool = False) -> Optional[StorageKey]:
+        """
+        Забрать вопрос для обработки (ответ или таймаут)
+
+        Args:
+            question_uuid: ID вопроса
+            timeout: Вопрос забирается по таймауту - отметить его закрытым (timed_out)
+                и взять аренду обработки (снимается release())
+
+        Returns:
+            StorageKey студента, если вопрос забран этим вызовом; None, если
+            вопрос уже обработан другим обработчиком или воркером
+        """
+        local = self._local.pop(question_uuid, None)
+        if local:
+            # Ответ отменяет таймер, чтобы он не висел до конца time_limit
+            local.handle.cancel()
+            if self._local_chats.get(local.key["chat_id"]) == question_uuid:
+                del self._local_chats[local.key["chat_id"]]
+            if timeout:
+                self._timed_out.add(question_uuid)
+            return StorageKey(**local.key)
+
+        if not await redis_manager.is_connected():
+            return None
+        try:
+            if timeout:
+                # Отметка и аренда ставятся вместе с ZREM (MULTI): ответ, проигравший
+                # захват, всегда видит отметку, а срок вопроса сразу заменяется сроком
+                # аренды. Ключ студента остается в TIMERS_KEY до release()
+                marker = TIMED_OUT_KEY.format(question_uuid)
+                lease = LEASE_PREFIX + question_uuid
+                pipe = redis_manager.redis.pipeline()
+                pipe.setex(marker, COMPLETED_QUESTIONS_TTL, 1)
+                pipe.zrem(DEADLINES_KEY, question_uuid)
+                pipe.zadd(DEADLINES_KEY, {lease: time.time() + TIMEOUT_LEASE}, nx=True)
+                pipe.hget(TIMERS_KEY, question_uuid)
+                _, removed, leased, payload = await pipe.execute()
+                if not removed:
+                    # Захват проиграл: снимаем свою отметку и аренду (чужую аренду nx не трогал)
+                    pipe = redis_manager.redis.pipeline()
+                    pipe.delete(marker)
+                    if leased:
+                        pipe.zrem(DEADLINES_KEY, lease)
+                    await pipe.execute()
+                    return None
+                if not payload:
+                    await self.release(question_uuid)
+                    return None
+            else:
+                if not await redis_manager.redis.zrem(DEADLINES_KEY, question_uuid):
+                    return None
+                pipe = redis_manager.redis.pipeline()
+                pipe.hget(TIMERS_KEY, question_uuid)
+                pipe.hdel(TIMERS_KEY, question_uuid)
+                payload, _ = await pipe.execute()
+                if not payload:
+                    return None
+            key = self._unpack_key(payload)
+            # Следующий вопрос чата регистрируется только после захвата текущего
+            await redis_manager.redis.hdel(CHATS_KEY, key.chat_id)
+            return key
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка захвата вопроса {question_uuid}: {e}")
+            return None
+
+    async def _claim_lease(self, lease: str) -> Optional[StorageKey]:
+        """Забрать истекшую аренду (обработка таймаута прервана) и продлить ее на себя"""
+        question_uuid = lease[len(LEASE_PREFIX):]
+        try:
+            if not await redis_manager.redis.zrem(DEADLINES_KEY, lease):
+                return None
+            pipe = redis_manager.redis.pipeline()
+            pipe.zadd(DEADLINES_KEY, {lease: time.time() + TIMEOUT_LEASE})
+            pipe.hget(TIMERS_KEY, question_uuid)
+            _, payload = await pipe.execute()
+            if not payload:
+                await self.release(question_uuid)
+                return None
+            return self._unpack_key(payload)
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка захвата аренды {lease}: {e}")
+            return None
+
+    async def release(self, question_uuid: str):
+        """Снять аренду таймаута: следующий вопрос отправлен или тест завершен"""
+        if not await redis_manager.is_connected():
+            return
+        try:
+            pipe = redis_manager.redis.pipeline()
+            pipe.zrem(DEADLINES_KEY, LEASE_PREFIX + question_uuid)
+            pipe.hdel(TIMERS_KEY, question_uuid)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка снятия аренды вопроса {question_uuid}: {e}")
+
+    async def claim_answer(self, question_uuid: str) -> bool:
+        """Забрать вопрос для обработки ответа (таймаут этого вопроса больше не сработает)"""
+        claimed = await self.claim(question_uuid) is not None
+        if claimed:
+            self._stats["answered"] += 1
+        return claimed
+
+    async def timed_out(self, question_uuid: str) -> bool:
+        """Забран ли вопрос по таймауту (ответ на него опоздал)"""
+        if question_uuid in self._timed_out:
+            return True
+        if not await redis_manager.is_connected():
+            return False
+        try:
+            return bool(await redis_manager.redis.exists(TIMED_OUT_KEY.format(question_uuid)))
+        except Exception:
+            return False
+
+    async def is_scheduled(self, question_uuid: str) -> bool:
+        """Ожидает ли вопрос ответа или таймаута (или таймаут вопроса еще обрабатывается)"""
+        if question_uuid in self._local:
+            return True
+        if not await redis_manager.is_connected():
+            return False
+        try:
+            pipe = redis_manager.redis.pipeline()
+            pipe.zscore(DEADLINES_KEY, question_uuid)
+            pipe.zscore(DEADLINES_KEY, LEASE_PREFIX + question_uuid)
+            return any(score is not None for score in await pipe.execute())
+        except Exception:
+            return False
+
+    async def cancel_chat(self, chat_id: int) -> bool:
+        """Снять ожидающий вопрос чата (завершение теста)"""
+        question_uuid = self._local_chats.get(chat_id)
+        if question_uuid:
+            return await self.claim(question_uuid) is not None
+
+        if not await redis_manager.is_connected():
+            return False
+        try:
+            question_uuid = await redis_manager.redis.hget(CHATS_KEY, chat_id)
+            if question_uuid:
+                return await self.claim(question_uuid.decode("utf-8")) is not None
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка снятия вопроса чата {chat_id}: {e}")
+        return False
+
+    async def pending_count(self) -> int:
+        """Количество вопросов, ожидающих ответа"""
+        count = len(self._local)
+        if await redis_manager.is_connected():
+            try:
+                count += await redis_manager.redis.zcard(DEADLINES_KEY)
+            except Exception:
+                pass
+        return count
+
+    def get_stats(self) -> Dict[str, int]:
+        """Счетчики таймеров этого воркера"""
+        return {**self._stats, "local_pending": len(self._local), "processing": len(self._fire_tasks)}
+
+    # === ФОНОВАЯ ОБРАБОТКА ТАЙМАУТОВ ===
+
+    async def _due(self) -> List[str]:
+        if not await redis_manager.is_connected():
+            return []
+        try:
+            members = await redis_manager.redis.zrangebyscore(
+                DEADLINES_KEY, "-inf", time.time(), start=0, num=CLAIM_BATCH
+            )
+            return [member.decode("utf-8") for member in members]
+        except Exception as e:
+            logger.error(f"❌ QUIZ: Ошибка чтения сроков вопросов: {e}")
+            return []
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._fire_tasks.add(task)
+        task.add_done_callback(self._fire_tasks.discard)
+
+    async def _fire_local(self, question_uuid: str):
+        key = await self.claim(question_uuid, timeout=True)
+        if key:
+            await self._fire(question_uuid, key)
+
+    async def _fire(self, question_uuid: str, key: StorageKey):
+        from common.quiz_registrator import process_question_timeout_reliable
+
+        self._stats["timeouts"] += 1
+        state = FSMContext(storage=self._storage, key=key)
+        # При отмене (остановка воркера) аренда остается - таймаут продолжится после перезапуска
+        await process_question_timeout_reliable(question_uuid, state, self._bot)
+        await self.release(question_uuid)
+
+    async def _run(self):
+        while True:
+            try:
+                for member in await self._due():
+                    if member.startswith(LEASE_PREFIX):
+                        # Обработка таймаута прервана перезапуском - продолжаем ее
+                        key = await self._claim_lease(member)
+                        question_uuid = member[len(LEASE_PREFIX):]
+                        if key:
+                            self._stats["resumed"] += 1
+                    else:
+                        question_uuid = member
+                        key = await self.claim(question_uuid, timeout=True)
+                    if key:
+                        # Таймаут содержит паузу перед следующим вопросом - не задерживаем остальные
+                        self._spawn(self._fire(question_uuid, key))
+                await asyncio.sleep(POLL_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ QUIZ: Ошибка цикла таймеров: {e}")
+                await asyncio.sleep(POLL_INTERVAL)
+
+    def start(self, bot: Bot, storage: BaseStorage):
+        """Запустить обработку таймаутов (вызывается при старте бота)"""
+        self._bot = bot
+        self._storage = storage
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить обработку таймаутов (сроки и аренды в Redis сохраняются)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Даем начатым таймаутам отправить следующий вопрос, остальные отменяем:
+        # их аренды истекут, и обработку продолжит воркер после перезапуска
+        if self._fire_tasks:
+            _, pending = await asyncio.wait(set(self._fire_tasks), timeout=STOP_DRAIN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# Глобальные таймеры вопросов
+quiz_timers = QuizTimers()
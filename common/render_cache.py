@@ -0,0 +1,175 @@
+"""
+Кэш отрисованных отчетов (текст + клавиатура) с версиями данных
+
+Экраны аналитики и статистики тестов при каждом нажатии (в том числе при
+переходах "назад") заново собирают один и тот же текст по студенту, группе или
+тесту. Кэш хранит готовый текст и клавиатуру по ключу
+"тип отчета + ID сущностей + версии данных". Версии - счетчики в Redis,
+которые увеличиваются при сохранении результата (ДЗ, входной/контрольный тест,
+пробный ЕНТ): после сохранения ключ отчета меняется, и старая запись просто
+перестает читаться, поэтому повторные просмотры бесплатны и не устаревают.
+
+Версии бывают трех видов:
+    student_scope(student_id)     - любые результаты студента
+    group_scope(group_id, kind)   - результаты вида kind у студентов группы
+    kind_scope(kind)              - результаты вида kind у всех студентов
+
+Изменения состава групп версии не увеличивают - такие отчеты обновятся по
+истечении RENDER_TTL. Тексты ошибок ("❌ ...") не кэшируются.
+
+Без Redis отчеты хранятся в памяти процесса в LRU на LOCAL_RENDER_LIMIT
+записей с тем же RENDER_TTL, поэтому записи старых версий вытесняются.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from common.result_events import subscribe
+from utils.redis_manager import redis_manager
+
+logger = logging.getLogger(__name__)
+
+# Время жизни отрисованного отчета
+RENDER_TTL = 1800
+# Хэш счетчиков версий в Redis
+VERSIONS_KEY = "render_cache:versions"
+# Начало текста отчетов об ошибках - такие отчеты не кэшируются
+ERROR_PREFIX = "❌"
+# Сколько отчетов хранить в памяти процесса (без Redis)
+LOCAL_RENDER_LIMIT = 1000
+
+Rendered = Tuple[str, Optional[InlineKeyboardMarkup]]
+
+
+def student_scope(student_id: int) -> str:
+    return f"student:{student_id}"
+
+
+def group_scope(group_id: int, kind: str) -> str:
+    return f"group:{group_id}:{kind}"
+
+
+def kind_scope(kind: str) -> str:
+    return f"kind:{kind}"
+
+
+class RenderCache:
+    """Кэш отрисованных отчетов с точной инвалидацией по версиям данных"""
+
+    def __init__(self):
+        # Без Redis версии и отчеты хранятся в памяти процесса (отчеты - LRU с TTL)
+        self._local_versions: Dict[str, int] = {}
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _local_get(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return payload
+
+    def _local_put(self, key: str, payload: str):
+        self._local[key] = (time.monotonic() + RENDER_TTL, payload)
+        self._local.move_to_end(key)
+        while len(self._local) > LOCAL_RENDER_LIMIT:
+            self._local.popitem(last=False)
+
+    async def _get_versions(self, scopes: Tuple[str, ...]) -> Tuple[int, ...]:
+        if await redis_manager.is_connected():
+            try:
+                values = await redis_manager.redis.hmget(VERSIONS_KEY, *scopes)
+                return tuple(int(value) if value else 0 for value in values)
+            except Exception as e:
+                logger.error(f"❌ Ошибка чтения версий отчетов: {e}")
+        return tuple(self._local_versions.get(scope, 0) for scope in scopes)
+
+    async def bump(self, *scopes: str):
+        """Увеличить версии данных (все отчеты, зависящие от них, станут неактуальными)"""
+        for scope in scopes:
+            self._local_versions[scope] = self._local_versions.get(scope, 0) + 1
+
+        if scopes and await redis_manager.is_connected():
+            try:
+                pipe = redis_manager.redis.pipeline()
+                for scope in scopes:
+                    pipe.hincrby(VERSIONS_KEY, scope, 1)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"❌ Ошибка увеличения версий отчетов: {e}")
+
+    async def get_or_render(self, report: str, ids: tuple, render: Callable[[], Awaitable[Rendered]],
+                            scopes: Iterable[str]) -> Rendered:
+        """
+        Вернуть отчет из кэша или отрисовать и сохранить его
+
+        Args:
+            report: Тип отчета
+            ids: ID сущностей отчета (студент, группа, тест...)
+            render: Корутина отрисовки, возвращает (текст, клавиатура)
+            scopes: Версии данных, от которых зависит отчет
+
+        Returns:
+            Tuple[str, Optional[InlineKeyboardMarkup]]: текст и клавиатура
+        """
+        scopes = tuple(scopes)
+        versions = await self._get_versions(scopes)
+        key = f"render_cache:{report}:{':'.join(map(str, ids))}:{'.'.join(map(str, versions))}"
+
+        payload = await redis_manager.get(key) or self._local_get(key)
+        if payload:
+            self._stats["hits"] += 1
+            cached = json.loads(payload)
+            markup = cached["markup"]
+            return cached["text"], InlineKeyboardMarkup.model_validate(markup) if markup else None
+
+        self._stats["misses"] += 1
+        text, markup = await render()
+        if not text or text.startswith(ERROR_PREFIX):
+            # Сообщение об ошибке (например, недоступна БД) не кэшируем - следующий просмотр повторит отрисовку
+            return text, markup
+        payload = json.dumps({
+            "text": text,
+            "markup": markup.model_dump(mode="json", exclude_none=True) if markup else None
+        }, ensure_ascii=False)
+        if not await redis_manager.set(key, payload, ttl=RENDER_TTL):
+            self._local_put(key, payload)
+        return text, markup
+
+    async def get_or_render_text(self, report: str, ids: tuple, render: Callable[[], Awaitable[str]],
+                                 scopes: Iterable[str]) -> str:
+        """То же, что get_or_render, для отчетов из одного текста"""
+        async def render_text() -> Rendered:
+            return await render(), None
+
+        text, _ = await self.get_or_render(report, ids, render_text, scopes)
+        return text
+
+    async def on_result_saved(self, kind: str, student_id: int):
+        """Увеличить версии студента, его групп и вида результата"""
+        from database import StudentRepository
+
+        scopes = [student_scope(student_id), kind_scope(kind)]
+        student = await StudentRepository.get_by_id(student_id)
+        if student:
+            scopes.extend(group_scope(group.id, kind) for group in student.groups)
+        # Отчеты с прежними версиями больше не прочитаются и вытесняются из LRU
+        await self.bump(*scopes)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Попадания и промахи кэша отчетов, записей в памяти процесса"""
+        return {**self._stats, "local": len(self._local)}
+
+
+# Глобальный экземпляр кэша отчетов
+render_cache = RenderCache()
+
+subscribe(render_cache.on_result_saved)
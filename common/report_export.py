@@ -0,0 +1,181 @@
+"""
+Выгрузка статистики групп и тестов в CSV/XLSX
+
+Строки отчета приходят из ExportRepository (серверный курсор) и сразу
+записываются во временный файл пачками: CSV - через aiofiles, XLSX - в
+потоковом режиме openpyxl (write_only) в отдельном потоке, чтобы запись не
+блокировала event loop. Готовый файл отправляется документом
+и удаляется, поэтому память не зависит от размера группы.
+"""
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+from aiogram import Bot
+from aiogram.types import FSInputFile, InlineKeyboardButton
+
+from database import ExportRepository, GroupRepository, MonthTestRepository
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+XLSX = "xlsx"
+FORMATS = (CSV, XLSX)
+
+# Виды отчетов: заголовки столбцов и название файла
+GROUP_REPORT = "group"
+TEST_REPORTS = ("course_entry", "month_entry", "month_control", "trial_ent")
+
+GROUP_HEADERS = ["Ученик", "Выполнено ДЗ", "Всего ДЗ", "% выполнения", "Баллы за эти ДЗ"]
+# Область отчета группы - как в статистике группы на экране
+GROUP_SCOPE = "ДЗ по предметам всех групп ученика"
+TEST_HEADERS = ["Ученик", "Верных", "Всего вопросов", "%", "Дата прохождения"]
+
+REPORT_TITLES = {
+    GROUP_REPORT: "Статистика группы",
+    "course_entry": "Входной тест курса",
+    "month_entry": "Входной тест месяца",
+    "month_control": "Контрольный тест месяца",
+    "trial_ent": "Пробный ЕНТ",
+}
+
+# Количество строк, записываемых в файл за одну операцию
+FLUSH_ROWS = 500
+
+
+def get_export_buttons(report: str, *ids: int) -> List[List[InlineKeyboardButton]]:
+    """Ряд кнопок выгрузки отчета в CSV и XLSX"""
+    suffix = "_".join(str(entity_id) for entity_id in ids)
+    return [[
+        InlineKeyboardButton(text="📥 CSV", callback_data=f"export_{report}_{CSV}_{suffix}"),
+        InlineKeyboardButton(text="📥 Excel", callback_data=f"export_{report}_{XLSX}_{suffix}")
+    ]]
+
+
+def parse_export_callback(data: str) -> Optional[tuple]:
+    """Разобрать callback выгрузки: (отчет, формат, [ID...]) или None"""
+    payload = data[len("export_"):]
+    for report in (GROUP_REPORT, *TEST_REPORTS):
+        if payload.startswith(f"{report}_"):
+            parts = payload[len(report) + 1:].split("_")
+            if len(parts) >= 2 and parts[0] in FORMATS:
+                try:
+                    return report, parts[0], [int(part) for part in parts[1:]]
+                except ValueError:
+                    return None
+    return None
+
+
+def _format_cell(value):
+    if isinstance(value, datetime):
+        return value.strftime("%d.%m.%Y %H:%M")
+    return "" if value is None else value
+
+
+async def _group_rows(group_id: int) -> AsyncIterator[list]:
+    async for name, completed, available, points in ExportRepository.stream_group_students(group_id):
+        percentage = round(completed / available * 100, 1) if available else 0
+        yield [name, completed, available, percentage, points]
+
+
+async def _test_rows(report: str, group_id: int, month_test_id: int = None) -> AsyncIterator[list]:
+    async for row in ExportRepository.stream_test_results(report, group_id, month_test_id):
+        yield [_format_cell(value) for value in row]
+
+
+async def _write_csv(path: str, headers: List[str], rows: AsyncIterator[list]) -> int:
+    count = 0
+    # utf-8-sig, чтобы Excel правильно открыл кириллицу
+    async with aiofiles.open(path, "w", encoding="utf-8-sig", newline="") as file:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=";")
+        writer.writerow(headers)
+        async for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % FLUSH_ROWS == 0:
+                await file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        await file.write(buffer.getvalue())
+    return count
+
+
+async def _write_xlsx(path: str, title: str, headers: List[str], rows: AsyncIterator[list]) -> int:
+    from openpyxl import Workbook
+
+    def append_rows(sheet, batch: List[list]):
+        for row in batch:
+            sheet.append(row)
+
+    # write_only: строки сразу сбрасываются во временный XML, а не держатся в памяти.
+    # openpyxl синхронный - пачки строк и сохранение выполняются в отдельном потоке
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    count = 0
+    batch = [headers]
+    async for row in rows:
+        batch.append(row)
+        count += 1
+        if len(batch) >= FLUSH_ROWS:
+            await asyncio.to_thread(append_rows, sheet, batch)
+            batch = []
+    await asyncio.to_thread(append_rows, sheet, batch)
+    await asyncio.to_thread(workbook.save, path)
+    return count
+
+
+async def send_report(bot: Bot, chat_id: int, report: str, file_format: str, ids: List[int]) -> bool:
+    """
+    Сформировать отчет в файл и отправить его документом
+
+    Args:
+        bot: Экземпляр бота
+        chat_id: ID чата получателя
+        report: Вид отчета (group или тип теста)
+        file_format: csv или xlsx
+        ids: [group_id] или [group_id, month_test_id] для тестов месяца
+
+    Returns:
+        bool: True, если файл отправлен
+    """
+    group_id = ids[0]
+    group = await GroupRepository.get_by_id(group_id)
+    if not group:
+        return False
+
+    title = REPORT_TITLES[report]
+    caption = f"📥 {title}\n👥 Группа: {group.name}"
+    if report == GROUP_REPORT:
+        headers, rows = GROUP_HEADERS, _group_rows(group_id)
+        caption += f"\n📚 {GROUP_SCOPE}"
+    else:
+        month_test_id = ids[1] if len(ids) > 1 else None
+        if month_test_id:
+            month_test = await MonthTestRepository.get_by_id(month_test_id)
+            caption += f"\n📝 Тест: {month_test.name if month_test else month_test_id}"
+        headers, rows = TEST_HEADERS, _test_rows(report, group_id, month_test_id)
+
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}", prefix="report_")
+    os.close(fd)
+    try:
+        if file_format == XLSX:
+            count = await _write_xlsx(path, title, headers, rows)
+        else:
+            count = await _write_csv(path, headers, rows)
+
+        filename = f"{title} - {group.name} {datetime.now():%Y-%m-%d}.{file_format}"
+        await bot.send_document(
+            chat_id,
+            FSInputFile(path, filename=filename),
+            caption=f"{caption}\n📋 Строк: {count}"
+        )
+        return True
+    finally:
+        os.remove(path)
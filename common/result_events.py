@@ -0,0 +1,37 @@
+"""
+События сохранения результатов (ДЗ, входные/контрольные тесты, пробный ЕНТ)
+
+Обработчики, сохраняющие результаты, вызывают publish_result_saved(), а
+подсистемы, зависящие от результатов (снимки аналитики, кэши отчетов),
+подписываются через subscribe(). Ошибка подписчика не мешает сохранению.
+"""
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+# Типы результатов
+HOMEWORK = "homework"
+COURSE_ENTRY = "course_entry"
+MONTH_ENTRY = "month_entry"
+MONTH_CONTROL = "month_control"
+TRIAL_ENT = "trial_ent"
+
+ResultListener = Callable[[str, int], Awaitable[None]]
+
+_listeners: List[ResultListener] = []
+
+
+def subscribe(listener: ResultListener):
+    """Подписаться на сохранение результатов: listener(kind, student_id)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+async def publish_result_saved(kind: str, student_id: int):
+    """Сообщить подписчикам о сохраненном результате студента"""
+    for listener in _listeners:
+        try:
+            await listener(kind, student_id)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработчика события результата {kind}: {e}")
@@ -7,6 +7,8 @@ from aiogram.types import CallbackQuery
 from common.utils import check_if_id_in_callback_data
 
 from common.analytics.keyboards import get_back_to_analytics_kb
+from common.analytics_snapshots import analytics_snapshots, format_as_of
+from common.leaderboards import leaderboards, GROUP, SUBJECT
 
 # Добавляем путь к корневой папке проекта для импорта database
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -202,18 +204,44 @@ async def get_student_topics_stats(student_id: str) -> Dict:
         print(f"Ошибка при получении статистики студента {student_id}: {e}")
         return {"name": "Ошибка загрузки", "topics": {}}
 
-async def get_group_stats(group_id: str) -> Dict:
+def _summarize_students(students: list) -> Dict:
+    """Сумма баллов и процентов выполнения ДЗ студентов (для средних по группам и предметам)"""
+    points = 0
+    completion = 0
+    for student_stats in students:
+        points += student_stats.get('total_points', 0)
+        # Используем unique_completed (уникальные выполненные) / total_available (всего доступных)
+        if student_stats.get('total_available', 0) > 0:
+            completion += (student_stats.get('unique_completed', 0) / student_stats['total_available']) * 100
+    return {"students": len(students), "points": points, "completion": completion}
+
+
+def _group_topic_averages(group_id: int, subject_id: int, microtopics: Dict) -> Dict[int, float]:
+    """Средние % понимания по микротемам группы через MicrotopicMatrix (из get_group_student_stats)"""
+    from common.microtopic_matrix import MicrotopicMatrix
+
+    rows = [
+        (subject_id, group_id, student_id, number, stats['total_answered'], stats['correct_answered'])
+        for student_id, student_topics in microtopics.items()
+        for number, stats in student_topics.items()
+    ]
+    return MicrotopicMatrix.from_aggregates(subject_id, rows).group_averages().get(group_id, {})
+
+
+async def get_group_stats(group_id: str, topic_averages: Dict[int, float] = None) -> Dict:
     """
     Получить статистику по группе
 
     Args:
         group_id: ID группы
+        topic_averages: Уже посчитанные средние по микротемам группы
+            (MicrotopicMatrix.group_averages предмета) - без отдельного запроса
 
     Returns:
         Dict: Словарь с данными о группе и статистике
     """
     try:
-        from database.repositories import GroupRepository, StudentRepository
+        from database.repositories import GroupRepository
 
         # Получаем группу
         group = await GroupRepository.get_by_id(int(group_id))
@@ -226,42 +254,24 @@ async def get_group_stats(group_id: str) -> Dict:
                 "rating": []
             }
 
-        # Получаем студентов группы
-        students = await StudentRepository.get_by_group(int(group_id))
+        # Статистика всех студентов группы одним набором агрегирующих запросов
+        from database.repositories import HomeworkResultRepository
+        # (понимание по микротемам запрашивается, только если средние не переданы)
+        subject_id = group.subject.id if group.subject else None
+        group_student_stats = await HomeworkResultRepository.get_group_student_stats(
+            group.id, subject_id if topic_averages is None else None
+        )
+        students = group_student_stats['students']
 
         # Вычисляем статистику
-        student_ratings = []
-        topics_stats = {}
-        total_homework_percentage = 0
-
-        for student in students:
-            # Получаем общую статистику студента
-            student_stats = await StudentRepository.get_general_stats(student.id)
-
-            # Вычисляем средний процент выполнения ДЗ для студента
-            # Используем unique_completed (уникальные выполненные) / total_available (всего доступных)
-            if student_stats.get('total_available', 0) > 0:
-                student_homework_percentage = (student_stats.get('unique_completed', 0) / student_stats.get('total_available', 1)) * 100
-            else:
-                student_homework_percentage = 0
-            total_homework_percentage += student_homework_percentage
+        summary = _summarize_students(students)
 
-            # Добавляем в рейтинг
-            student_ratings.append({
-                "name": student.user.name,
-                "points": student_stats.get('total_points', 0)
-            })
-
-            # Получаем статистику по микротемам для предмета группы
-            if group.subject:
-                microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, group.subject.id)
-                for microtopic_number, stats in microtopic_stats.items():
-                    if microtopic_number not in topics_stats:
-                        topics_stats[microtopic_number] = []
-                    topics_stats[microtopic_number].append(stats['percentage'])
+        # Средние проценты понимания по микротемам предмета группы
+        if topic_averages is None:
+            topic_averages = _group_topic_averages(group.id, subject_id, group_student_stats['microtopics'])
 
         # Вычисляем средние значения
-        avg_homework_completion = round(total_homework_percentage / len(students), 1) if students else 0
+        avg_homework_completion = round(summary["completion"] / len(students), 1) if students else 0
 
         # Получаем названия микротем
         from database.repositories import MicrotopicRepository
@@ -270,19 +280,17 @@ async def get_group_stats(group_id: str) -> Dict:
             microtopics = await MicrotopicRepository.get_by_subject(group.subject.id)
             microtopic_names = {mt.number: mt.name for mt in microtopics}
 
-            for microtopic_number, percentages in topics_stats.items():
+            for microtopic_number, percentage in sorted(topic_averages.items()):
                 microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
-                avg_topics[microtopic_name] = round(sum(percentages) / len(percentages), 1) if percentages else 0
-
-        # Сортируем рейтинг по баллам
-        student_ratings.sort(key=lambda x: x["points"], reverse=True)
+                avg_topics[microtopic_name] = percentage
 
         return {
             "name": group.name,
             "subject": group.subject.name if group.subject else "Неизвестный предмет",
             "homework_completion": avg_homework_completion,
             "topics": avg_topics,
-            "rating": student_ratings[:10]  # Топ 10 студентов
+            "rating": await leaderboards.top(GROUP, group.id),  # Топ 10 студентов
+            "summary": summary  # Суммы для средних по предмету (get_general_stats)
         }
 
     except Exception as e:
@@ -387,21 +395,24 @@ async def get_general_microtopics_detailed() -> str:
         str: Отформатированный текст с детальной статистикой
     """
     try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
+        from database.repositories import SubjectRepository, MicrotopicRepository
+        from common.microtopic_matrix import load_microtopic_matrices
 
         # Получаем все предметы
         all_subjects = await SubjectRepository.get_all()
         if not all_subjects:
             return "❌ Предметы не найдены"
 
+        # Матрицы понимания всех предметов одним запросом
+        matrices = await load_microtopic_matrices()
+
         result_text = "📊 Общая статистика по микротемам\n📈 Средний % понимания по всем предметам:\n\n"
 
         has_data = False
 
         for subject in all_subjects:
-            # Получаем группы предмета
-            groups = await GroupRepository.get_by_subject(subject.id)
-            if not groups:
+            matrix = matrices.get(subject.id)
+            if not matrix or matrix.is_empty:
                 continue
 
             # Получаем микротемы предмета
@@ -409,38 +420,21 @@ async def get_general_microtopics_detailed() -> str:
             if not microtopics:
                 continue
 
-            # Собираем статистику по всем микротемам предмета
-            microtopic_stats = {}
-
-            for group in groups:
-                students = await StudentRepository.get_by_group(group.id)
+            has_data = True
+            result_text += f"📚 {subject.name}:\n"
 
-                for student in students:
-                    student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject.id)
-
-                    for microtopic_number, stats in student_microtopic_stats.items():
-                        if microtopic_number not in microtopic_stats:
-                            microtopic_stats[microtopic_number] = []
-                        microtopic_stats[microtopic_number].append(stats['percentage'])
-
-            if microtopic_stats:
-                has_data = True
-                result_text += f"📚 {subject.name}:\n"
-
-                # Создаем словарь названий микротем
-                microtopic_names = {mt.number: mt.name for mt in microtopics}
+            # Создаем словарь названий микротем
+            microtopic_names = {mt.number: mt.name for mt in microtopics}
 
-                # Сортируем по номеру микротемы
-                for microtopic_number in sorted(microtopic_stats.keys()):
-                    percentages = microtopic_stats[microtopic_number]
-                    avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
-                    microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
+            # Микротемы отсортированы по номеру
+            for microtopic_number, avg_percentage in matrix.subject_averages().items():
+                microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
 
-                    # Определяем статус
-                    status = "✅" if avg_percentage >= 80 else "❌" if avg_percentage <= 40 else "⚠️"
-                    result_text += f"  • {microtopic_name} — {avg_percentage}% {status}\n"
+                # Определяем статус
+                status = "✅" if avg_percentage >= 80 else "❌" if avg_percentage <= 40 else "⚠️"
+                result_text += f"  • {microtopic_name} — {avg_percentage}% {status}\n"
 
-                result_text += "\n"
+            result_text += "\n"
 
         if not has_data:
             return "📊 Общая статистика по микротемам\n❌ Пока не выполнено ни одного задания по микротемам"
@@ -460,13 +454,17 @@ async def get_general_microtopics_summary() -> str:
         str: Отформатированный текст со сводкой
     """
     try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
+        from database.repositories import SubjectRepository, MicrotopicRepository
+        from common.microtopic_matrix import load_microtopic_matrices
 
         # Получаем все предметы
         all_subjects = await SubjectRepository.get_all()
         if not all_subjects:
             return "❌ Предметы не найдены"
 
+        # Матрицы понимания всех предметов одним запросом
+        matrices = await load_microtopic_matrices()
+
         result_text = "📊 Общая сводка по микротемам\n"
 
         all_strong_topics = []
@@ -474,9 +472,8 @@ async def get_general_microtopics_summary() -> str:
         has_data = False
 
         for subject in all_subjects:
-            # Получаем группы предмета
-            groups = await GroupRepository.get_by_subject(subject.id)
-            if not groups:
+            matrix = matrices.get(subject.id)
+            if not matrix or matrix.is_empty:
                 continue
 
             # Получаем микротемы предмета
@@ -484,35 +481,17 @@ async def get_general_microtopics_summary() -> str:
             if not microtopics:
                 continue
 
-            # Собираем статистику по всем микротемам предмета
-            microtopic_stats = {}
-
-            for group in groups:
-                students = await StudentRepository.get_by_group(group.id)
-
-                for student in students:
-                    student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject.id)
-
-                    for microtopic_number, stats in student_microtopic_stats.items():
-                        if microtopic_number not in microtopic_stats:
-                            microtopic_stats[microtopic_number] = []
-                        microtopic_stats[microtopic_number].append(stats['percentage'])
-
-            if microtopic_stats:
-                has_data = True
-                # Создаем словарь названий микротем
-                microtopic_names = {mt.number: mt.name for mt in microtopics}
-
-                # Вычисляем средние значения и определяем сильные/слабые темы
-                for microtopic_number, percentages in microtopic_stats.items():
-                    avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
-                    microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
-                    topic_with_subject = f"{microtopic_name} ({subject.name})"
+            has_data = True
+            # Создаем словарь названий микротем
+            microtopic_names = {mt.number: mt.name for mt in microtopics}
 
-                    if avg_percentage >= 80:
-                        all_strong_topics.append(topic_with_subject)
-                    elif avg_percentage <= 40:
-                        all_weak_topics.append(topic_with_subject)
+            strong_numbers, weak_numbers = matrix.classify()
+            for microtopic_number in strong_numbers:
+                microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
+                all_strong_topics.append(f"{microtopic_name} ({subject.name})")
+            for microtopic_number in weak_numbers:
+                microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
+                all_weak_topics.append(f"{microtopic_name} ({subject.name})")
 
         if not has_data:
             return "📊 Общая сводка по микротемам\n❌ Пока не выполнено ни одного задания для анализа"
@@ -540,63 +519,60 @@ async def get_general_microtopics_summary() -> str:
         return "❌ Ошибка при получении сводки"
 
 
-async def get_subject_microtopics_detailed(subject_id: int) -> str:
+async def _load_subject_matrix(subject_id: int):
     """
-    Получить детальную статистику по микротемам для предмета
-
-    Args:
-        subject_id: ID предмета
+    Загрузить предмет, его микротемы и матрицу понимания
 
     Returns:
-        str: Отформатированный текст с детальной статистикой
+        Tuple: (subject, microtopic_names, matrix, error_text) - error_text заполнен,
+        если отчет строить не из чего
     """
-    try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
+    from database.repositories import SubjectRepository, GroupRepository, MicrotopicRepository
+    from common.microtopic_matrix import load_microtopic_matrices
 
-        # Получаем предмет
-        subject = await SubjectRepository.get_by_id(subject_id)
-        if not subject:
-            return "❌ Предмет не найден"
+    # Получаем предмет
+    subject = await SubjectRepository.get_by_id(subject_id)
+    if not subject:
+        return None, {}, None, "❌ Предмет не найден"
 
-        # Получаем группы предмета
-        groups = await GroupRepository.get_by_subject(subject_id)
-        if not groups:
-            return f"📚 {subject.name}\n❌ Группы по данному предмету не найдены"
+    # Получаем группы предмета
+    groups = await GroupRepository.get_by_subject(subject_id)
+    if not groups:
+        return subject, {}, None, f"📚 {subject.name}\n❌ Группы по данному предмету не найдены"
 
-        # Получаем микротемы предмета
-        microtopics = await MicrotopicRepository.get_by_subject(subject_id)
-        if not microtopics:
-            return f"📚 {subject.name}\n❌ Микротемы по данному предмету не найдены"
+    # Получаем микротемы предмета
+    microtopics = await MicrotopicRepository.get_by_subject(subject_id)
+    if not microtopics:
+        return subject, {}, None, f"📚 {subject.name}\n❌ Микротемы по данному предмету не найдены"
 
-        # Собираем статистику по всем микротемам
-        microtopic_stats = {}
-        total_students = 0
+    matrices = await load_microtopic_matrices(subject_id)
+    microtopic_names = {mt.number: mt.name for mt in microtopics}
+    return subject, microtopic_names, matrices.get(subject_id), None
 
-        for group in groups:
-            students = await StudentRepository.get_by_group(group.id)
-            total_students += len(students)
 
-            for student in students:
-                student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject_id)
+async def get_subject_microtopics_detailed(subject_id: int) -> str:
+    """
+    Получить детальную статистику по микротемам для предмета
 
-                for microtopic_number, stats in student_microtopic_stats.items():
-                    if microtopic_number not in microtopic_stats:
-                        microtopic_stats[microtopic_number] = []
-                    microtopic_stats[microtopic_number].append(stats['percentage'])
+    Args:
+        subject_id: ID предмета
 
-        if not microtopic_stats:
-            return f"📚 {subject.name}\n❌ Пока не выполнено ни одного задания по микротемам этого предмета"
+    Returns:
+        str: Отформатированный текст с детальной статистикой
+    """
+    try:
+        subject, microtopic_names, matrix, error_text = await _load_subject_matrix(subject_id)
+        if error_text:
+            return error_text
 
-        # Создаем словарь названий микротем
-        microtopic_names = {mt.number: mt.name for mt in microtopics}
+        if not matrix or matrix.is_empty:
+            return f"📚 {subject.name}\n❌ Пока не выполнено ни одного задания по микротемам этого предмета"
 
         # Формируем результат
         result_text = f"📚 {subject.name}\n📈 Средний % понимания по микротемам:\n"
 
-        # Сортируем по номеру микротемы
-        for microtopic_number in sorted(microtopic_stats.keys()):
-            percentages = microtopic_stats[microtopic_number]
-            avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
+        # Микротемы отсортированы по номеру
+        for microtopic_number, avg_percentage in matrix.subject_averages().items():
             microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
 
             # Определяем статус
@@ -621,55 +597,17 @@ async def get_subject_microtopics_summary(subject_id: int) -> str:
         str: Отформатированный текст со сводкой
     """
     try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
-
-        # Получаем предмет
-        subject = await SubjectRepository.get_by_id(subject_id)
-        if not subject:
-            return "❌ Предмет не найден"
-
-        # Получаем группы предмета
-        groups = await GroupRepository.get_by_subject(subject_id)
-        if not groups:
-            return f"📚 {subject.name}\n❌ Группы по данному предмету не найдены"
-
-        # Получаем микротемы предмета
-        microtopics = await MicrotopicRepository.get_by_subject(subject_id)
-        if not microtopics:
-            return f"📚 {subject.name}\n❌ Микротемы по данному предмету не найдены"
-
-        # Собираем статистику по всем микротемам
-        microtopic_stats = {}
+        subject, microtopic_names, matrix, error_text = await _load_subject_matrix(subject_id)
+        if error_text:
+            return error_text
 
-        for group in groups:
-            students = await StudentRepository.get_by_group(group.id)
-
-            for student in students:
-                student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject_id)
-
-                for microtopic_number, stats in student_microtopic_stats.items():
-                    if microtopic_number not in microtopic_stats:
-                        microtopic_stats[microtopic_number] = []
-                    microtopic_stats[microtopic_number].append(stats['percentage'])
-
-        if not microtopic_stats:
+        if not matrix or matrix.is_empty:
             return f"📚 {subject.name}\n❌ Пока не выполнено ни одного задания для анализа сильных и слабых тем"
 
-        # Создаем словарь названий микротем
-        microtopic_names = {mt.number: mt.name for mt in microtopics}
-
-        # Вычисляем средние значения и определяем сильные/слабые темы
-        strong_topics = []
-        weak_topics = []
-
-        for microtopic_number, percentages in microtopic_stats.items():
-            avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
-            microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
-
-            if avg_percentage >= 80:
-                strong_topics.append(microtopic_name)
-            elif avg_percentage <= 40:
-                weak_topics.append(microtopic_name)
+        # Определяем сильные и слабые темы по средним значениям
+        strong_numbers, weak_numbers = matrix.classify()
+        strong_topics = [microtopic_names.get(number, f"Микротема {number}") for number in strong_numbers]
+        weak_topics = [microtopic_names.get(number, f"Микротема {number}") for number in weak_numbers]
 
         # Формируем результат
         result_text = f"📚 {subject.name}\n"
@@ -696,167 +634,6 @@ async def get_subject_microtopics_summary(subject_id: int) -> str:
         return "❌ Ошибка при получении сводки"
 
 
-async def get_general_microtopics_detailed() -> str:
-    """
-    Получить детальную статистику по микротемам для всех предметов
-
-    Returns:
-        str: Отформатированный текст с детальной статистикой
-    """
-    try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
-
-        # Получаем все предметы
-        all_subjects = await SubjectRepository.get_all()
-        if not all_subjects:
-            return "❌ Предметы не найдены"
-
-        result_text = "📊 Общая статистика по микротемам\n📈 Средний % понимания по всем предметам:\n\n"
-
-        has_data = False
-
-        for subject in all_subjects:
-            # Получаем группы предмета
-            groups = await GroupRepository.get_by_subject(subject.id)
-            if not groups:
-                continue
-
-            # Получаем микротемы предмета
-            microtopics = await MicrotopicRepository.get_by_subject(subject.id)
-            if not microtopics:
-                continue
-
-            # Собираем статистику по всем микротемам предмета
-            microtopic_stats = {}
-
-            for group in groups:
-                students = await StudentRepository.get_by_group(group.id)
-
-                for student in students:
-                    student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject.id)
-
-                    for microtopic_number, stats in student_microtopic_stats.items():
-                        if microtopic_number not in microtopic_stats:
-                            microtopic_stats[microtopic_number] = []
-                        microtopic_stats[microtopic_number].append(stats['percentage'])
-
-            if microtopic_stats:
-                has_data = True
-                result_text += f"📚 {subject.name}:\n"
-
-                # Создаем словарь названий микротем
-                microtopic_names = {mt.number: mt.name for mt in microtopics}
-
-                # Сортируем по номеру микротемы
-                for microtopic_number in sorted(microtopic_stats.keys()):
-                    percentages = microtopic_stats[microtopic_number]
-                    avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
-                    microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
-
-                    # Определяем статус
-                    status = "✅" if avg_percentage >= 80 else "❌" if avg_percentage <= 40 else "⚠️"
-                    result_text += f"  • {microtopic_name} — {avg_percentage}% {status}\n"
-
-                result_text += "\n"
-
-        if not has_data:
-            return "📊 Общая статистика по микротемам\n❌ Пока не выполнено ни одного задания по микротемам"
-
-        return result_text.rstrip()
-
-    except Exception as e:
-        print(f"Ошибка при получении общей детальной статистики: {e}")
-        return "❌ Ошибка при получении статистики"
-
-
-async def get_general_microtopics_summary() -> str:
-    """
-    Получить сводку по сильным и слабым темам для всех предметов
-
-    Returns:
-        str: Отформатированный текст со сводкой
-    """
-    try:
-        from database.repositories import SubjectRepository, GroupRepository, StudentRepository, MicrotopicRepository
-
-        # Получаем все предметы
-        all_subjects = await SubjectRepository.get_all()
-        if not all_subjects:
-            return "❌ Предметы не найдены"
-
-        result_text = "📊 Общая сводка по микротемам\n"
-
-        all_strong_topics = []
-        all_weak_topics = []
-        has_data = False
-
-        for subject in all_subjects:
-            # Получаем группы предмета
-            groups = await GroupRepository.get_by_subject(subject.id)
-            if not groups:
-                continue
-
-            # Получаем микротемы предмета
-            microtopics = await MicrotopicRepository.get_by_subject(subject.id)
-            if not microtopics:
-                continue
-
-            # Собираем статистику по всем микротемам предмета
-            microtopic_stats = {}
-
-            for group in groups:
-                students = await StudentRepository.get_by_group(group.id)
-
-                for student in students:
-                    student_microtopic_stats = await StudentRepository.get_microtopic_understanding(student.id, subject.id)
-
-                    for microtopic_number, stats in student_microtopic_stats.items():
-                        if microtopic_number not in microtopic_stats:
-                            microtopic_stats[microtopic_number] = []
-                        microtopic_stats[microtopic_number].append(stats['percentage'])
-
-            if microtopic_stats:
-                has_data = True
-                # Создаем словарь названий микротем
-                microtopic_names = {mt.number: mt.name for mt in microtopics}
-
-                # Вычисляем средние значения и определяем сильные/слабые темы
-                for microtopic_number, percentages in microtopic_stats.items():
-                    avg_percentage = round(sum(percentages) / len(percentages), 1) if percentages else 0
-                    microtopic_name = microtopic_names.get(microtopic_number, f"Микротема {microtopic_number}")
-                    topic_with_subject = f"{microtopic_name} ({subject.name})"
-
-                    if avg_percentage >= 80:
-                        all_strong_topics.append(topic_with_subject)
-                    elif avg_percentage <= 40:
-                        all_weak_topics.append(topic_with_subject)
-
-        if not has_data:
-            return "📊 Общая сводка по микротемам\n❌ Пока не выполнено ни одного задания для анализа"
-
-        # Формируем результат
-        if all_strong_topics:
-            result_text += "\n🟢 Сильные темы (≥80%):\n"
-            for topic in all_strong_topics:
-                result_text += f"• {topic}\n"
-
-        if all_weak_topics:
-            if all_strong_topics:
-                result_text += "\n"
-            result_text += "🔴 Слабые темы (≤40%):\n"
-            for topic in all_weak_topics:
-                result_text += f"• {topic}\n"
-
-        if not all_strong_topics and not all_weak_topics:
-            result_text += "\n⚠️ Все темы находятся в среднем диапазоне (41-79%)"
-
-        return result_text
-
-    except Exception as e:
-        print(f"Ошибка при получении общей сводки: {e}")
-        return "❌ Ошибка при получении сводки"
-
-
 def format_student_topics_stats(student_data: Dict) -> str:
     """
     УСТАРЕВШАЯ ФУНКЦИЯ: Форматировать статистику по темам ученика из статических данных
@@ -1310,23 +1087,30 @@ async def get_subject_stats(subject_id: str) -> dict:
         # Получаем группы предмета
         groups = await GroupRepository.get_by_subject(int(subject_id))
 
+        # Средние по микротемам всех групп предмета - одна матрица и один запрос
+        from common.microtopic_matrix import load_microtopic_matrices
+        matrix = (await load_microtopic_matrices(int(subject_id))).get(int(subject_id))
+        group_topics = matrix.group_averages() if matrix else {}
+
         groups_data = []
         for group in groups:
             # Получаем статистику группы (используем существующую функцию)
-            group_stats = await get_group_stats(str(group.id))
+            group_stats = await get_group_stats(str(group.id), topic_averages=group_topics.get(group.id, {}))
 
             groups_data.append({
                 "group_id": str(group.id),
                 "name": group_stats["name"],
                 "homework_completion": group_stats["homework_completion"],
                 "topics": group_stats["topics"],
-                "rating": group_stats["rating"]
+                "rating": group_stats["rating"],
+                "summary": group_stats.get("summary")
             })
 
         return {
             "subject_id": subject_id,
             "name": subject.name,
-            "groups": groups_data
+            "groups": groups_data,
+            "rating": await leaderboards.top(SUBJECT, subject.id)
         }
 
     except Exception as e:
@@ -1337,68 +1121,60 @@ async def get_subject_stats(subject_id: str) -> dict:
             "groups": []
         }
 
-async def get_general_stats() -> dict:
+async def get_general_stats(subjects_data: list = None) -> dict:
     """
     Получить общую статистику по всем предметам из реальной базы данных
 
+    Args:
+        subjects_data: Уже посчитанные get_subject_stats по всем предметам
+            (пересчет снимков) - средние берутся из них без повторных запросов
+
     Returns:
         dict: Общие данные статистики
     """
     try:
-        from database.repositories import StudentRepository, GroupRepository, SubjectRepository
+        from database.repositories import StudentRepository, GroupRepository, SubjectRepository, HomeworkResultRepository
 
-        # Получаем общее количество студентов
-        all_students = await StudentRepository.get_all()
-        total_students = len(all_students)
-
-        # Считаем активных студентов (у которых есть группа)
-        active_students = len([s for s in all_students if s.group_id is not None])
+        # Количество студентов и активных студентов (у которых есть группа) - без загрузки сущностей
+        total_students = await StudentRepository.get_count()
+        active_students = await StudentRepository.get_count_in_groups()
 
         # Получаем общее количество групп
         all_groups = await GroupRepository.get_all()
         total_groups = len(all_groups)
 
-        # Получаем статистику по предметам
-        all_subjects = await SubjectRepository.get_all()
-        subjects_stats = []
-
-        for subject in all_subjects:
-            # Получаем группы предмета
-            subject_groups = await GroupRepository.get_by_subject(subject.id)
+        # Суммы по группам каждого предмета: (название, [summary группы])
+        if subjects_data is not None:
+            subject_summaries = [
+                (subject_data["name"], [group.get("summary") for group in subject_data["groups"]])
+                for subject_data in subjects_data
+            ]
+        else:
+            subject_summaries = []
+            for subject in await SubjectRepository.get_all():
+                summaries = []
+                for group in await GroupRepository.get_by_subject(subject.id):
+                    # Статистика всех студентов группы одним набором запросов
+                    group_student_stats = await HomeworkResultRepository.get_group_student_stats(group.id)
+                    summaries.append(_summarize_students(group_student_stats['students']))
+                subject_summaries.append((subject.name, summaries))
 
-            if not subject_groups:
+        subjects_stats = []
+        for subject_name, summaries in subject_summaries:
+            summaries = [summary for summary in summaries if summary]
+            if not summaries:
                 continue
 
-            total_points = 0
-            total_completion = 0
-            students_count = 0
-
-            for group in subject_groups:
-                # Получаем студентов группы
-                group_students = await StudentRepository.get_by_group(group.id)
-
-                for student in group_students:
-                    # Получаем статистику студента
-                    student_stats = await StudentRepository.get_general_stats(student.id)
-                    total_points += student_stats.get('total_points', 0)
-
-                    # Вычисляем процент выполнения ДЗ
-                    if student_stats.get('total_available', 0) > 0:
-                        completion_rate = (student_stats.get('unique_completed', 0) / student_stats.get('total_available', 1)) * 100
-                    else:
-                        completion_rate = 0
-                    total_completion += completion_rate
-                    students_count += 1
-
+            students_count = sum(summary["students"] for summary in summaries)
             if students_count > 0:
-                avg_score = round(total_points / students_count, 1)
-                avg_completion = round(total_completion / students_count, 1)
+                avg_score = round(sum(summary["points"] for summary in summaries) / students_count, 1)
+                avg_completion = round(sum(summary["completion"] for summary in summaries) / students_count, 1)
             else:
                 avg_score = 0
                 avg_completion = 0
 
             subjects_stats.append({
-                "name": subject.name,
+                "name": subject_name,
                 "average_score": avg_score,
                 "completion_rate": avg_completion
             })
@@ -1458,7 +1234,13 @@ def format_subject_stats(subject_data: dict) -> str:
     for topic, percentages in all_topics.items():
         avg_percentage = sum(percentages) / len(percentages)
         result_text += f"• {topic} — {avg_percentage:.1f}%\n"
-    
+
+    # Добавляем рейтинг предмета по баллам
+    if subject_data.get("rating"):
+        result_text += "\n🏆 Лучшие студенты предмета:\n"
+        for i, student in enumerate(subject_data["rating"], 1):
+            result_text += f"{i}. {student['name']} — {student['points']} баллов\n"
+
     return result_text
 
 def format_general_stats(general_data: dict) -> str:
@@ -1555,13 +1337,14 @@ async def show_group_analytics(callback: CallbackQuery, state: FSMContext, role:
     """
     group_id = await check_if_id_in_callback_data("analytics_group_", callback, state, "group")
 
-    # Получаем данные о группе из общего компонента
-    group_data = await get_group_stats(group_id)
+    # Получаем снимок статистики группы
+    group_data, generated_at = await analytics_snapshots.get_group(int(group_id))
 
     # Формируем базовую информацию о группе
     result_text = f"👥 Группа: {group_data['name']}\n"
     result_text += f"📗 Предмет: {group_data['subject']}\n"
-    result_text += f"📊 Средний % выполнения ДЗ: {group_data['homework_completion']}%\n\n"
+    result_text += f"📊 Средний % выполнения ДЗ: {group_data['homework_completion']}%\n"
+    result_text += f"{format_as_of(generated_at)}\n\n"
     result_text += "Выберите, что хотите посмотреть:"
 
     # Импортируем клавиатуру
@@ -1587,12 +1370,13 @@ async def show_group_microtopics_detailed(callback: CallbackQuery, state: FSMCon
     if len(parts) >= 4:
         group_id = int(parts[3])
 
-        # Получаем данные о группе
-        group_data = await get_group_stats(str(group_id))
+        # Получаем снимок статистики группы
+        group_data, generated_at = await analytics_snapshots.get_group(group_id)
 
         # Формируем текст только с микротемами
         result_text = f"👥 Группа: {group_data['name']}\n"
-        result_text += f"📗 Предмет: {group_data['subject']}\n\n"
+        result_text += f"📗 Предмет: {group_data['subject']}\n"
+        result_text += f"{format_as_of(generated_at)}\n\n"
 
         # Добавляем информацию о микротемах
         if group_data["topics"]:
@@ -1638,17 +1422,20 @@ async def show_group_rating(callback: CallbackQuery, state: FSMContext):
     if len(parts) >= 3:
         group_id = int(parts[2])
 
-        # Получаем данные о группе
-        group_data = await get_group_stats(str(group_id))
+        from database.repositories import GroupRepository
+        group = await GroupRepository.get_by_id(group_id)
+
+        # Рейтинг читается из отсортированного множества и всегда актуален
+        rating = await leaderboards.top(GROUP, group_id)
 
         # Формируем текст только с рейтингом
-        result_text = f"👥 Группа: {group_data['name']}\n"
-        result_text += f"📗 Предмет: {group_data['subject']}\n\n"
+        result_text = f"👥 Группа: {group.name if group else 'Неизвестная группа'}\n"
+        result_text += f"📗 Предмет: {group.subject.name if group and group.subject else 'Неизвестный предмет'}\n\n"
 
         # Добавляем рейтинг по баллам
-        if group_data["rating"]:
+        if rating:
             result_text += "📋 Рейтинг по баллам:\n"
-            for i, student in enumerate(group_data["rating"], 1):
+            for i, student in enumerate(rating, 1):
                 result_text += f"{i}. {student['name']} — {student['points']} баллов\n"
         else:
             result_text += "📋 Рейтинг пока недоступен\n"
@@ -10,9 +10,11 @@ from .keyboards import get_back_to_test_kb
 from database.repositories.user_repository import UserRepository
 from database.repositories.student_repository import StudentRepository
 from database.repositories.subject_repository import SubjectRepository
-from database.repositories.question_repository import QuestionRepository
+from database.repositories.course_repository import CourseRepository
 from database.repositories.course_entry_test_result_repository import CourseEntryTestResultRepository
 from common.quiz_registrator import send_next_question, cleanup_test_messages
+from common.question_sampler import question_sampler
+from common.result_events import publish_result_saved, COURSE_ENTRY
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -74,10 +76,9 @@ async def handle_course_entry_test_real(callback: CallbackQuery, state: FSMConte
                 )
             return
 
-        # Получаем вопросы для теста
-        questions = await QuestionRepository.get_random_questions_for_course_entry_test(
-            telegram_id, subject.id, max_questions=30
-        )
+        # Получаем вопросы для теста из ДЗ курсов студента (выборка через пулы ID)
+        course_ids = await CourseRepository.get_ids_by_user_id(telegram_id)
+        questions = await question_sampler.sample_by_courses(course_ids, subject.id, count=30)
 
         if not questions:
             await callback.message.edit_text(
@@ -233,10 +234,6 @@ async def start_course_entry_test_with_quiz(callback: CallbackQuery, state: FSMC
         question_results=[]
     )
 
-    # Функция завершения теста
-    async def finish_course_entry_test(chat_id, state_inner, bot):
-        await finish_course_entry_test_handler(chat_id, state_inner, bot)
-
     # ВАЖНО: Устанавливаем состояние ПЕРЕД запуском теста
     await state.set_state(StudentTestsStates.test_in_progress)
 
@@ -245,7 +242,8 @@ async def start_course_entry_test_with_quiz(callback: CallbackQuery, state: FSMC
         chat_id=callback.message.chat.id,
         state=state,
         bot=callback.bot,
-        finish_callback=finish_course_entry_test
+        # Функция модуля: ее имя сохраняется в FSM, и тест продолжится после перезапуска
+        finish_callback=finish_course_entry_test_handler
     )
 
 
@@ -272,6 +270,7 @@ async def finish_course_entry_test_handler(chat_id: int, state: FSMContext, bot)
         )
 
         logger.info(f"РЕЗУЛЬТАТ СОХРАНЕН: ID {test_result.id}, баллов {test_result.correct_answers}/{test_result.total_questions}")
+        await publish_result_saved(COURSE_ENTRY, student_id)
 
         # Показываем результаты
         await show_course_entry_test_results_final(chat_id, state, test_result, bot)
@@ -16,6 +16,7 @@ from database.repositories.month_control_test_result_repository import MonthCont
 from database.repositories.microtopic_repository import MicrotopicRepository
 from database.repositories.question_repository import QuestionRepository
 from common.quiz_registrator import send_next_question, cleanup_test_messages
+from common.result_events import publish_result_saved, MONTH_ENTRY, MONTH_CONTROL
 import random
 
 # Настройка логгера
@@ -49,16 +50,12 @@ async def generate_month_test_questions(month_test_id: int):
             logger.error(f"Не найдены микротемы для теста месяца {month_test_id}")
             return []
 
-        all_questions = []
-
-        # Для каждой микротемы берем 3 случайных вопроса из домашних заданий
-        for microtopic in test_microtopics:
-            questions = await QuestionRepository.get_random_questions_by_microtopic(
-                microtopic_number=microtopic.number,
-                subject_id=month_test.subject_id,
-                limit=3
-            )
-            all_questions.extend(questions)
+        # Для каждой микротемы берем 3 случайных вопроса из домашних заданий (одним запросом)
+        all_questions = await QuestionRepository.get_random_questions_by_microtopics(
+            subject_id=month_test.subject_id,
+            microtopic_numbers=[microtopic.number for microtopic in test_microtopics],
+            per_microtopic=3
+        )
 
         if not all_questions:
             logger.error(f"Не найдено вопросов для теста месяца {month_test_id}")
@@ -227,6 +224,7 @@ async def finish_month_entry_test(chat_id: int, state: FSMContext, bot):
             month_test_id=month_test_id,
             question_results=question_results
         )
+        await publish_result_saved(MONTH_ENTRY, student_id)
 
 
         month_test = await MonthTestRepository.get_by_id(month_test_id)
@@ -283,6 +281,7 @@ async def finish_month_control_test(chat_id: int, state: FSMContext, bot):
             month_test_id=month_test_id,
             question_results=question_results
         )
+        await publish_result_saved(MONTH_CONTROL, student_id)
 
         # Показываем статистику
         await show_month_control_test_statistics_final(chat_id, state, test_result, bot)
@@ -20,6 +20,10 @@ from common.statistics import (
 )
 from ..keyboards import get_main_menu_back_button
 from ..utils import check_if_id_in_callback_data
+from common.render_cache import render_cache, group_scope
+from .navigation_context import navigation_context
+from common.report_export import get_export_buttons
+from common.result_events import COURSE_ENTRY, MONTH_ENTRY, MONTH_CONTROL, TRIAL_ENT
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -656,13 +660,54 @@ async def get_group_id_from_callback_or_state(callback: CallbackQuery, state: FS
 
 
 
+def format_test_summary(header: str, rows: list, student_callback_prefix: str):
+    """
+    Текст и кнопки студентов для сводки прохождения теста группой
+
+    Args:
+        header: Заголовок сообщения
+        rows: Строки TestSummaryRow из get_group_summary
+        student_callback_prefix: Префикс callback_data детальной статистики студента
+
+    Returns:
+        tuple: (текст, список рядов кнопок)
+    """
+    completed = [row for row in rows if row.completed]
+    not_completed = [row for row in rows if not row.completed]
+
+    # Показываем прошедших тест
+    result_text = header + "✅ Прошли тест:\n"
+    if completed:
+        for i, row in enumerate(completed, 1):
+            result_text += f"{i}. {row.name} ({row.percent}%)\n"
+    else:
+        result_text += "Пока никто не прошел тест\n"
+
+    result_text += "\n❌ Не прошли тест:\n"
+    if not_completed:
+        for i, row in enumerate(not_completed, 1):
+            result_text += f"{i}. {row.name}\n"
+    else:
+        result_text += "Все студенты прошли тест\n"
+
+    # Добавляем кнопки для просмотра детальной статистики по ученикам
+    buttons = [
+        [InlineKeyboardButton(
+            text=f"📊 {row.name} ({row.percent}%)",
+            callback_data=f"{student_callback_prefix}_{row.student_id}"
+        )]
+        for row in completed
+    ]
+    return result_text, buttons
+
+
 async def show_course_entry_test_statistics(callback: CallbackQuery, state: FSMContext, group_id: int):
     """Показать статистику входного теста курса для группы"""
     from database import CourseEntryTestResultRepository, GroupRepository
 
     try:
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -670,48 +715,26 @@ async def show_course_entry_test_statistics(callback: CallbackQuery, state: FSMC
             )
             return
 
-        # Получаем статистику по группе
-        stats = await CourseEntryTestResultRepository.get_statistics_by_group(group_id)
-
-        # Формируем текст сообщения
-        result_text = f"📊 Статистика входного теста курса\n\n"
-        result_text += f"📗 {stats['subject_name']}\n"
-        result_text += f"Группа: {stats['group_name']}\n\n"
-
-        # Показываем прошедших тест
-        result_text += "✅ Прошли тест:\n"
-        if stats['completed']:
-            for i, student in enumerate(stats['completed'], 1):
-                # Находим результат теста для этого студента
-                test_result = next((tr for tr in stats['test_results'] if tr.student.id == student.id), None)
-                percentage = f" ({test_result.score_percentage}%)" if test_result else ""
-                result_text += f"{i}. {student.user.name}{percentage}\n"
-        else:
-            result_text += "Пока никто не прошел тест\n"
+        async def render():
+            # Сводка по группе: студенты и их результаты без ответов на вопросы
+            rows = await CourseEntryTestResultRepository.get_group_summary(group_id, group.subject_id)
 
-        result_text += "\n❌ Не прошли тест:\n"
-        if stats['not_completed']:
-            for i, student in enumerate(stats['not_completed'], 1):
-                result_text += f"{i}. {student.user.name}\n"
-        else:
-            result_text += "Все студенты прошли тест\n"
+            header = f"📊 Статистика входного теста курса\n\n"
+            header += f"📗 {group.subject.name if group.subject else 'Неизвестный предмет'}\n"
+            header += f"Группа: {group.name}\n\n"
+            result_text, buttons = format_test_summary(header, rows, f"course_entry_student_{group_id}")
 
-        # Добавляем кнопки для просмотра детальной статистики по ученикам
-        buttons = []
-        for test_result in stats.get('test_results', []):
-            student = test_result.student
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"📊 {student.user.name} ({test_result.score_percentage}%)",
-                    callback_data=f"course_entry_student_{group_id}_{student.id}"
-                )
-            ])
+            buttons.extend(get_export_buttons("course_entry", group_id))
+            buttons.extend(get_main_menu_back_button())
+            return result_text, InlineKeyboardMarkup(inline_keyboard=buttons)
 
-        buttons.extend(get_main_menu_back_button())
+        result_text, reply_markup = await render_cache.get_or_render(
+            "course_entry_group", (group_id,), render, [group_scope(group_id, COURSE_ENTRY)]
+        )
 
         await callback.message.edit_text(
             result_text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+            reply_markup=reply_markup
         )
 
     except Exception as e:
@@ -728,7 +751,7 @@ async def show_course_entry_student_detail(callback: CallbackQuery, state: FSMCo
 
     try:
         # Получаем студента
-        student = await StudentRepository.get_by_id(student_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
         if not student:
             await callback.message.edit_text(
                 "❌ Студент не найден",
@@ -737,7 +760,7 @@ async def show_course_entry_student_detail(callback: CallbackQuery, state: FSMCo
             return
 
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -746,9 +769,7 @@ async def show_course_entry_student_detail(callback: CallbackQuery, state: FSMCo
             return
 
         # Получаем результат теста студента по предмету группы
-        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(
-            student_id, group.subject_id
-        )
+        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(student_id, group.subject_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -757,13 +778,6 @@ async def show_course_entry_student_detail(callback: CallbackQuery, state: FSMCo
             )
             return
 
-        # Получаем статистику по микротемам
-        microtopic_stats = await CourseEntryTestResultRepository.get_microtopic_statistics(test_result.id)
-
-        # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
-        microtopic_names = {mt.number: mt.name for mt in microtopics}
-
         # Формируем краткую информацию
         result_text = f"📊 Результат входного теста курса\n\n"
         result_text += f"📗 {group.subject.name}:\n"
@@ -844,8 +858,8 @@ async def show_course_entry_microtopics_detailed(callback: CallbackQuery, state:
 
     try:
         # Получаем студента и группу
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
 
         if not student or not group:
             await callback.message.edit_text(
@@ -855,9 +869,7 @@ async def show_course_entry_microtopics_detailed(callback: CallbackQuery, state:
             return
 
         # Получаем результат теста
-        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(
-            student_id, group.subject_id
-        )
+        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(student_id, group.subject_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -870,7 +882,7 @@ async def show_course_entry_microtopics_detailed(callback: CallbackQuery, state:
         microtopic_stats = await CourseEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Формируем детальную статистику
@@ -917,8 +929,8 @@ async def show_course_entry_microtopics_summary(callback: CallbackQuery, state:
 
     try:
         # Получаем студента и группу
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
 
         if not student or not group:
             await callback.message.edit_text(
@@ -928,9 +940,7 @@ async def show_course_entry_microtopics_summary(callback: CallbackQuery, state:
             return
 
         # Получаем результат теста
-        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(
-            student_id, group.subject_id
-        )
+        test_result = await CourseEntryTestResultRepository.get_by_student_and_subject(student_id, group.subject_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -943,7 +953,7 @@ async def show_course_entry_microtopics_summary(callback: CallbackQuery, state:
         microtopic_stats = await CourseEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Определяем сильные и слабые темы
@@ -1001,7 +1011,7 @@ async def show_month_entry_test_months(callback: CallbackQuery, state: FSMContex
 
     try:
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -1051,8 +1061,8 @@ async def show_month_entry_test_statistics(callback: CallbackQuery, state: FSMCo
 
     try:
         # Получаем группу и тест месяца
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not group or not month_test:
             await callback.message.edit_text(
@@ -1061,49 +1071,29 @@ async def show_month_entry_test_statistics(callback: CallbackQuery, state: FSMCo
             )
             return
 
-        # Получаем статистику по группе и тесту месяца
-        stats = await MonthEntryTestResultRepository.get_statistics_by_group_and_month_test(group_id, month_test_id)
-
-        # Формируем текст сообщения
-        result_text = f"📊 Статистика входного теста месяца\n\n"
-        result_text += f"📗 {stats['subject_name']}\n"
-        result_text += f"Группа: {stats['group_name']}\n"
-        result_text += f"Тест: {stats['month_test_name']}\n\n"
-
-        # Показываем прошедших тест
-        result_text += "✅ Прошли тест:\n"
-        if stats['completed']:
-            for i, student in enumerate(stats['completed'], 1):
-                # Находим результат теста для этого студента
-                test_result = next((tr for tr in stats['test_results'] if tr.student.id == student.id), None)
-                percentage = f" ({test_result.score_percentage}%)" if test_result else ""
-                result_text += f"{i}. {student.user.name}{percentage}\n"
-        else:
-            result_text += "Пока никто не прошел тест\n"
+        async def render():
+            # Сводка по группе и тесту месяца без ответов на вопросы
+            rows = await MonthEntryTestResultRepository.get_group_summary(group_id, month_test_id)
 
-        result_text += "\n❌ Не прошли тест:\n"
-        if stats['not_completed']:
-            for i, student in enumerate(stats['not_completed'], 1):
-                result_text += f"{i}. {student.user.name}\n"
-        else:
-            result_text += "Все студенты прошли тест\n"
+            header = f"📊 Статистика входного теста месяца\n\n"
+            header += f"📗 {group.subject.name if group.subject else 'Неизвестный предмет'}\n"
+            header += f"Группа: {group.name}\n"
+            header += f"Тест: {month_test.name}\n\n"
+            result_text, buttons = format_test_summary(
+                header, rows, f"month_entry_student_{group_id}_{month_test_id}"
+            )
 
-        # Добавляем кнопки для просмотра детальной статистики по ученикам
-        buttons = []
-        for test_result in stats.get('test_results', []):
-            student = test_result.student
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"📊 {student.user.name} ({test_result.score_percentage}%)",
-                    callback_data=f"month_entry_student_{group_id}_{month_test_id}_{student.id}"
-                )
-            ])
+            buttons.extend(get_export_buttons("month_entry", group_id, month_test_id))
+            buttons.extend(get_main_menu_back_button())
+            return result_text, InlineKeyboardMarkup(inline_keyboard=buttons)
 
-        buttons.extend(get_main_menu_back_button())
+        result_text, reply_markup = await render_cache.get_or_render(
+            "month_entry_group", (group_id, month_test_id), render, [group_scope(group_id, MONTH_ENTRY)]
+        )
 
         await callback.message.edit_text(
             result_text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+            reply_markup=reply_markup
         )
 
     except Exception as e:
@@ -1120,9 +1110,9 @@ async def show_month_entry_student_detail(callback: CallbackQuery, state: FSMCon
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1132,9 +1122,7 @@ async def show_month_entry_student_detail(callback: CallbackQuery, state: FSMCon
             return
 
         # Получаем результат теста студента
-        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -1143,13 +1131,6 @@ async def show_month_entry_student_detail(callback: CallbackQuery, state: FSMCon
             )
             return
 
-        # Получаем статистику по микротемам
-        microtopic_stats = await MonthEntryTestResultRepository.get_microtopic_statistics(test_result.id)
-
-        # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
-        microtopic_names = {mt.number: mt.name for mt in microtopics}
-
         # Формируем краткую информацию
         result_text = f"📊 Результат входного теста месяца\n\n"
         result_text += f"📗 {group.subject.name}:\n"
@@ -1233,9 +1214,9 @@ async def show_month_entry_microtopics_detailed(callback: CallbackQuery, state:
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1245,9 +1226,7 @@ async def show_month_entry_microtopics_detailed(callback: CallbackQuery, state:
             return
 
         # Получаем результат теста
-        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -1260,7 +1239,7 @@ async def show_month_entry_microtopics_detailed(callback: CallbackQuery, state:
         microtopic_stats = await MonthEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Формируем детальную статистику
@@ -1308,9 +1287,9 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1320,9 +1299,7 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
             return
 
         # Получаем результат теста
-        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -1335,7 +1312,7 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
         microtopic_stats = await MonthEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Определяем сильные и слабые темы
@@ -1392,9 +1369,9 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1404,9 +1381,7 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
             return
 
         # Получаем результат теста
-        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -1419,7 +1394,7 @@ async def show_month_entry_microtopics_summary(callback: CallbackQuery, state: F
         microtopic_stats = await MonthEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Определяем сильные и слабые темы
@@ -1478,7 +1453,7 @@ async def show_trial_ent_statistics(callback: CallbackQuery, state: FSMContext,
 
     try:
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -1486,51 +1461,58 @@ async def show_trial_ent_statistics(callback: CallbackQuery, state: FSMContext,
             )
             return
 
-        # Получаем статистику по группе
-        stats = await TrialEntResultRepository.get_statistics_by_group(group_id)
-
-        # Формируем текст сообщения
-        result_text = f"📊 Статистика пробного ЕНТ\n\n"
-        result_text += f"Группа: {stats['group_name']}\n\n"
-
-        # Показываем прошедших тест
-        result_text += "✅ Проходили тест:\n"
-        if stats['completed']:
-            for i, student in enumerate(stats['completed'], 1):
-                # Находим последний результат теста для этого студента
-                latest_result = next((tr for tr in stats['test_results'] if tr.student.id == student.id), None)
-                if latest_result:
-                    percentage = round((latest_result.correct_answers / latest_result.total_questions) * 100) if latest_result.total_questions > 0 else 0
-                    result_text += f"{i}. {student.user.name} ({percentage}%)\n"
-                else:
+        async def render():
+            # Получаем статистику по группе
+            stats = await TrialEntResultRepository.get_statistics_by_group(group_id)
+
+            # Формируем текст сообщения
+            result_text = f"📊 Статистика пробного ЕНТ\n\n"
+            result_text += f"Группа: {stats['group_name']}\n\n"
+
+            # Показываем прошедших тест
+            result_text += "✅ Проходили тест:\n"
+            if stats['completed']:
+                for i, student in enumerate(stats['completed'], 1):
+                    # Находим последний результат теста для этого студента
+                    latest_result = next((tr for tr in stats['test_results'] if tr.student.id == student.id), None)
+                    if latest_result:
+                        percentage = round((latest_result.correct_answers / latest_result.total_questions) * 100) if latest_result.total_questions > 0 else 0
+                        result_text += f"{i}. {student.user.name} ({percentage}%)\n"
+                    else:
+                        result_text += f"{i}. {student.user.name}\n"
+            else:
+                result_text += "Пока никто не проходил тест\n"
+
+            result_text += "\n❌ Не проходили тест:\n"
+            if stats['not_completed']:
+                for i, student in enumerate(stats['not_completed'], 1):
                     result_text += f"{i}. {student.user.name}\n"
-        else:
-            result_text += "Пока никто не проходил тест\n"
+            else:
+                result_text += "Все студенты проходили тест\n"
 
-        result_text += "\n❌ Не проходили тест:\n"
-        if stats['not_completed']:
-            for i, student in enumerate(stats['not_completed'], 1):
-                result_text += f"{i}. {student.user.name}\n"
-        else:
-            result_text += "Все студенты проходили тест\n"
+            # Добавляем кнопки для просмотра детальной статистики по ученикам
+            buttons = []
+            for test_result in stats.get('test_results', []):
+                student = test_result.student
+                percentage = round((test_result.correct_answers / test_result.total_questions) * 100) if test_result.total_questions > 0 else 0
+                buttons.append([
+                    InlineKeyboardButton(
+                        text=f"📊 {student.user.name} ({percentage}%)",
+                        callback_data=f"ent_student_{group_id}_{student.id}"
+                    )
+                ])
 
-        # Добавляем кнопки для просмотра детальной статистики по ученикам
-        buttons = []
-        for test_result in stats.get('test_results', []):
-            student = test_result.student
-            percentage = round((test_result.correct_answers / test_result.total_questions) * 100) if test_result.total_questions > 0 else 0
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"📊 {student.user.name} ({percentage}%)",
-                    callback_data=f"ent_student_{group_id}_{student.id}"
-                )
-            ])
+            buttons.extend(get_export_buttons("trial_ent", group_id))
+            buttons.extend(get_main_menu_back_button())
+            return result_text, InlineKeyboardMarkup(inline_keyboard=buttons)
 
-        buttons.extend(get_main_menu_back_button())
+        result_text, reply_markup = await render_cache.get_or_render(
+            "trial_ent_group", (group_id,), render, [group_scope(group_id, TRIAL_ENT)]
+        )
 
         await callback.message.edit_text(
             result_text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+            reply_markup=reply_markup
         )
 
     except Exception as e:
@@ -1549,7 +1531,7 @@ async def show_trial_ent_student_detail(callback: CallbackQuery, state: FSMConte
 
     try:
         # Получаем студента
-        student = await StudentRepository.get_by_id(student_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
         if not student:
             await callback.message.edit_text(
                 "❌ Студент не найден",
@@ -1558,7 +1540,7 @@ async def show_trial_ent_student_detail(callback: CallbackQuery, state: FSMConte
             return
 
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -1631,7 +1613,7 @@ async def show_month_control_test_months(callback: CallbackQuery, state: FSMCont
 
     try:
         # Получаем группу
-        group = await GroupRepository.get_by_id(group_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
         if not group:
             await callback.message.edit_text(
                 "❌ Группа не найдена",
@@ -1682,8 +1664,8 @@ async def show_month_control_test_statistics(callback: CallbackQuery, state: FSM
 
     try:
         # Получаем группу и тест месяца
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not group or not month_test:
             await callback.message.edit_text(
@@ -1692,49 +1674,33 @@ async def show_month_control_test_statistics(callback: CallbackQuery, state: FSM
             )
             return
 
-        # Получаем статистику по группе и тесту месяца
-        stats = await MonthEntryTestResultRepository.get_statistics_by_group_and_month_test(group_id, month_test_id)
-
-        # Формируем текст сообщения
-        result_text = f"📊 Статистика контрольного теста месяца\n\n"
-        result_text += f"📗 {stats['subject_name']}\n"
-        result_text += f"Группа: {stats['group_name']}\n"
-        result_text += f"Тест: {stats['month_test_name']}\n\n"
-
-        # Показываем прошедших тест
-        result_text += "✅ Прошли тест:\n"
-        if stats['completed']:
-            for i, student in enumerate(stats['completed'], 1):
-                # Находим результат теста для этого студента
-                test_result = next((tr for tr in stats['test_results'] if tr.student.id == student.id), None)
-                percentage = f" ({test_result.score_percentage}%)" if test_result else ""
-                result_text += f"{i}. {student.user.name}{percentage}\n"
-        else:
-            result_text += "Пока никто не прошел тест\n"
+        async def render():
+            # Сводка по группе и тесту месяца без ответов на вопросы
+            rows = await MonthEntryTestResultRepository.get_group_summary(group_id, month_test_id)
 
-        result_text += "\n❌ Не прошли тест:\n"
-        if stats['not_completed']:
-            for i, student in enumerate(stats['not_completed'], 1):
-                result_text += f"{i}. {student.user.name}\n"
-        else:
-            result_text += "Все студенты прошли тест\n"
+            header = f"📊 Статистика контрольного теста месяца\n\n"
+            header += f"📗 {group.subject.name if group.subject else 'Неизвестный предмет'}\n"
+            header += f"Группа: {group.name}\n"
+            header += f"Тест: {month_test.name}\n\n"
+            result_text, buttons = format_test_summary(
+                header, rows, f"month_control_student_{group_id}_{month_test_id}"
+            )
 
-        # Добавляем кнопки для просмотра детальной статистики по ученикам
-        buttons = []
-        for test_result in stats.get('test_results', []):
-            student = test_result.student
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"📊 {student.user.name} ({test_result.score_percentage}%)",
-                    callback_data=f"month_control_student_{group_id}_{month_test_id}_{student.id}"
-                )
-            ])
+            buttons.append([InlineKeyboardButton(
+                text="🔥 Прогресс группы: вход → контроль",
+                callback_data=f"month_group_comparison_{group_id}_{month_test_id}"
+            )])
+            buttons.extend(get_export_buttons("month_control", group_id, month_test_id))
+            buttons.extend(get_main_menu_back_button())
+            return result_text, InlineKeyboardMarkup(inline_keyboard=buttons)
 
-        buttons.extend(get_main_menu_back_button())
+        result_text, reply_markup = await render_cache.get_or_render(
+            "month_control_group", (group_id, month_test_id), render, [group_scope(group_id, MONTH_ENTRY), group_scope(group_id, MONTH_CONTROL)]
+        )
 
         await callback.message.edit_text(
             result_text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+            reply_markup=reply_markup
         )
 
     except Exception as e:
@@ -1774,9 +1740,9 @@ async def show_month_control_student_detail(callback: CallbackQuery, state: FSMC
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1786,9 +1752,7 @@ async def show_month_control_student_detail(callback: CallbackQuery, state: FSMC
             return
 
         # Получаем результат контрольного теста студента
-        control_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        control_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not control_result:
             await callback.message.edit_text(
@@ -1805,9 +1769,7 @@ async def show_month_control_student_detail(callback: CallbackQuery, state: FSMC
 
         # Пытаемся найти соответствующий входной результат для краткого сравнения
         # Теперь ищем входной результат по тому же тесту
-        entry_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        entry_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if entry_result:
 
@@ -1921,9 +1883,9 @@ async def show_month_control_microtopics_detailed(callback: CallbackQuery, state
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -1933,14 +1895,12 @@ async def show_month_control_microtopics_detailed(callback: CallbackQuery, state
             return
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Пытаемся получить сравнительную статистику
         # Теперь ищем входной и контрольный результаты по тому же тесту
-        comparison_data = await MonthEntryTestResultRepository.get_comparison_statistics(
-            student_id, month_test_id, month_test_id
-        )
+        comparison_data = await MonthEntryTestResultRepository.get_comparison_statistics(student_id, month_test_id, month_test_id)
 
         if comparison_data:
             # Показываем сравнение
@@ -2016,9 +1976,7 @@ async def show_month_control_fallback_detailed(callback, student, group, month_t
     from database import MonthEntryTestResultRepository
 
     # Получаем результат теста
-    test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-        student_id, month_test_id
-    )
+    test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
     if not test_result:
         await callback.message.edit_text(
@@ -2068,9 +2026,9 @@ async def show_month_control_microtopics_summary(callback: CallbackQuery, state:
 
     try:
         # Получаем студента, группу и тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        month_test = await MonthTestRepository.get_by_id(month_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
 
         if not student or not group or not month_test:
             await callback.message.edit_text(
@@ -2080,9 +2038,7 @@ async def show_month_control_microtopics_summary(callback: CallbackQuery, state:
             return
 
         # Получаем результат теста
-        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, month_test_id
-        )
+        test_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, month_test_id)
 
         if not test_result:
             await callback.message.edit_text(
@@ -2095,7 +2051,7 @@ async def show_month_control_microtopics_summary(callback: CallbackQuery, state:
         microtopic_stats = await MonthEntryTestResultRepository.get_microtopic_statistics(test_result.id)
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Определяем сильные и слабые темы
@@ -2177,9 +2133,9 @@ async def show_month_tests_comparison_detail(callback: CallbackQuery, state: FSM
 
     try:
         # Получаем студента, группу и контрольный тест месяца
-        student = await StudentRepository.get_by_id(student_id)
-        group = await GroupRepository.get_by_id(group_id)
-        control_test = await MonthTestRepository.get_by_id(control_test_id)
+        student = await navigation_context.call(callback.from_user.id, StudentRepository.get_by_id, student_id)
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        control_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, control_test_id)
 
         if not student or not group or not control_test:
             await callback.message.edit_text(
@@ -2192,12 +2148,8 @@ async def show_month_tests_comparison_detail(callback: CallbackQuery, state: FSM
         entry_test = control_test
 
         # Получаем результаты обоих тестов (теперь по одному тесту)
-        entry_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(
-            student_id, control_test_id
-        )
-        control_result = await MonthControlTestResultRepository.get_by_student_and_month_test(
-            student_id, control_test_id
-        )
+        entry_result = await MonthEntryTestResultRepository.get_by_student_and_month_test(student_id, control_test_id)
+        control_result = await MonthControlTestResultRepository.get_by_student_and_month_test(student_id, control_test_id)
 
         if not entry_result:
             await callback.message.edit_text(
@@ -2214,9 +2166,7 @@ async def show_month_tests_comparison_detail(callback: CallbackQuery, state: FSM
             return
 
         # Получаем сравнительную статистику
-        comparison_data = await MonthEntryTestResultRepository.get_comparison_statistics(
-            student_id, control_test_id, control_test_id
-        )
+        comparison_data = await MonthEntryTestResultRepository.get_comparison_statistics(student_id, control_test_id, control_test_id)
 
         if not comparison_data:
             await callback.message.edit_text(
@@ -2226,7 +2176,7 @@ async def show_month_tests_comparison_detail(callback: CallbackQuery, state: FSM
             return
 
         # Получаем названия микротем
-        microtopics = await MicrotopicRepository.get_by_subject(group.subject_id)
+        microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
         microtopic_names = {mt.number: mt.name for mt in microtopics}
 
         # Формируем текст сравнения
@@ -2298,4 +2248,125 @@ async def show_month_tests_comparison_detail(callback: CallbackQuery, state: FSM
         )
 
 
+# Пороги раскраски изменения % понимания (в процентных пунктах)
+HEATMAP_GROWTH = 10
+HEATMAP_DROP = -10
+# Запас до лимита Telegram в 4096 символов
+HEATMAP_MAX_LENGTH = 3900
+
+
+def heatmap_cell(delta) -> str:
+    """Клетка тепловой карты по изменению % понимания"""
+    if delta is None:
+        return "⬜"
+    if delta >= HEATMAP_GROWTH:
+        return "🟩"
+    if delta <= HEATMAP_DROP:
+        return "🟥"
+    return "🟨"
+
+
+def format_group_comparison_heatmap(header: str, comparison: dict, microtopic_names: dict) -> str:
+    """
+    Тепловая карта изменения % понимания по микротемам для всей группы
+
+    Args:
+        header: Заголовок сообщения
+        comparison: Результат MonthControlTestResultRepository.get_group_comparison
+        microtopic_names: {номер микротемы: название}
+    """
+    from html import escape
+
+    numbers = list(comparison['group'])
+    result_text = header
+    result_text += "Столбцы — микротемы по порядку, цвет — изменение % понимания:\n"
+    result_text += f"🟩 рост ≥{HEATMAP_GROWTH} п.п.  🟨 в пределах ±{HEATMAP_GROWTH} п.п.  🟥 падение ≥{-HEATMAP_DROP} п.п.  ⬜ нет данных\n\n"
+
+    # Средние по группе
+    result_text += f"<code>{'Группа':<12}</code> "
+    result_text += "".join(heatmap_cell(comparison['group'][number]['delta']) for number in numbers) + "\n"
+
+    footer = "\n📈 Среднее по группе (вход → контроль):\n"
+    for i, number in enumerate(numbers, 1):
+        stats = comparison['group'][number]
+        name = escape(microtopic_names.get(number, f"Микротема {number}"))
+        entry = "—" if stats['entry'] is None else f"{stats['entry']:.0f}%"
+        control = "—" if stats['control'] is None else f"{stats['control']:.0f}%"
+        delta = "" if stats['delta'] is None else f" ({stats['delta']:+.0f})"
+        footer += f"{i}. {name} — {entry} → {control}{delta}\n"
+
+    # Строки студентов, пока сообщение помещается в лимит Telegram
+    students = comparison['students']
+    for shown, student in enumerate(students):
+        deltas = [student['microtopics'].get(number, {}).get('delta') for number in numbers]
+        known = [delta for delta in deltas if delta is not None]
+        average = f" {sum(known) / len(known):+.0f}" if known else ""
+        line = f"<code>{escape(student['name'][:12]):<12}</code> {''.join(heatmap_cell(d) for d in deltas)}{average}\n"
+        if len(result_text) + len(line) + len(footer) > HEATMAP_MAX_LENGTH:
+            result_text += f"… и еще {len(students) - shown} учеников\n"
+            break
+        result_text += line
+
+    return result_text + footer
+
+
+async def show_month_group_comparison(callback: CallbackQuery, state: FSMContext):
+    """Показать тепловую карту прогресса группы между входным и контрольным тестом месяца"""
+    from database import MonthControlTestResultRepository, GroupRepository, MonthTestRepository, MicrotopicRepository
+
+    current_state = await state.get_state()
+    logger.info(f"ВЫЗОВ: show_month_group_comparison, user_id={callback.from_user.id}, текущее состояние={current_state}, callback_data={callback.data}")
+
+    try:
+        # Формат: month_group_comparison_GROUP_ID_MONTH_TEST_ID
+        parts = callback.data.split("_")
+        group_id = int(parts[3])
+        month_test_id = int(parts[4])
+    except (ValueError, IndexError):
+        await callback.message.edit_text(
+            "❌ Ошибка: неверные параметры",
+            reply_markup=get_back_kb()
+        )
+        return
+
+    try:
+        group = await navigation_context.call(callback.from_user.id, GroupRepository.get_by_id, group_id)
+        month_test = await navigation_context.call(callback.from_user.id, MonthTestRepository.get_by_id, month_test_id)
+
+        if not group or not month_test:
+            await callback.message.edit_text(
+                "❌ Группа или тест месяца не найдены",
+                reply_markup=get_back_kb()
+            )
+            return
+
+        async def render():
+            comparison = await MonthControlTestResultRepository.get_group_comparison(group_id, month_test_id)
+
+            header = f"🔥 Прогресс группы: вход → контроль\n\n"
+            header += f"📗 {group.subject.name if group.subject else 'Неизвестный предмет'}\n"
+            header += f"Группа: {group.name}\n"
+            header += f"Тест: {month_test.name}\n\n"
+
+            if not comparison['students']:
+                result_text = header + "Пока никто из группы не проходил этот тест"
+            else:
+                microtopics = await navigation_context.call(callback.from_user.id, MicrotopicRepository.get_by_subject, group.subject_id)
+                microtopic_names = {mt.number: mt.name for mt in microtopics}
+                result_text = format_group_comparison_heatmap(header, comparison, microtopic_names)
+
+            return result_text, get_back_kb()
 
+        result_text, reply_markup = await render_cache.get_or_render(
+            "month_group_comparison", (group_id, month_test_id), render,
+            [group_scope(group_id, MONTH_ENTRY), group_scope(group_id, MONTH_CONTROL)]
+        )
+
+        await callback.message.edit_text(result_text, reply_markup=reply_markup)
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении прогресса группы: {e}")
+        await callback.message.edit_text(
+            "❌ Ошибка при получении сравнения тестов",
+            reply_markup=get_back_kb()
+        )
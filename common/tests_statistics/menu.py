@@ -2,6 +2,7 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from .keyboards import get_tests_statistics_menu_kb
 from .states import TestsStatisticsStates
+from .navigation_context import navigation_context
 
 async def show_tests_statistics_menu(callback: CallbackQuery, state: FSMContext, user_role: str = None):
     """
@@ -12,6 +13,9 @@ async def show_tests_statistics_menu(callback: CallbackQuery, state: FSMContext,
         state: Контекст состояния FSM
         user_role: Роль пользователя (curator)
     """
+    # Возврат в меню завершает просмотр отчета
+    navigation_context.discard(callback.from_user.id)
+
     await callback.message.edit_text(
         "Выберите тип теста для просмотра статистики:",
         reply_markup=get_tests_statistics_menu_kb()
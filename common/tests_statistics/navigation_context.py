@@ -0,0 +1,93 @@
+"""
+Контекст навигации по отчетам статистики тестов
+
+При переходах внутри одного отчета (группа → студент → детальная статистика
+по микротемам → сводка) обработчики заново запрашивают одни и те же объекты:
+студента, группу, тест месяца, микротемы предмета. Контекст запоминает
+результаты таких запросов для каждого пользователя на короткое время и
+отдает их повторно, пока пользователь остается в отчете. Контекст
+сбрасывается при возврате в меню статистики тестов и по истечении
+CONTEXT_TTL без действий.
+
+Результаты тестов и статистика по ним через контекст не кэшируются: после
+пересдачи куратор должен сразу видеть новый результат, а событие сохранения
+приходит только в воркер студента. Результаты читаются из БД на каждом шаге.
+
+Контекст хранится в памяти процесса: объекты загружены со связями и не
+привязаны к сессии. Пустые результаты не запоминаются.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Время жизни контекста без действий пользователя (в секундах)
+CONTEXT_TTL = 300
+# При таком количестве контекстов удаляются истекшие
+PRUNE_THRESHOLD = 1000
+
+
+class _UserContext:
+    __slots__ = ("values", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.values: Dict[Hashable, Any] = {}
+        self.expires_at = expires_at
+
+
+class NavigationContext:
+    """Кэш запросов обработчиков на время навигации пользователя по отчету"""
+
+    def __init__(self, ttl: float = CONTEXT_TTL):
+        self.ttl = ttl
+        self._contexts: Dict[int, _UserContext] = {}
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _get_context(self, user_id: int) -> _UserContext:
+        now = time.monotonic()
+        context = self._contexts.get(user_id)
+        if context is None or context.expires_at < now:
+            if len(self._contexts) >= PRUNE_THRESHOLD:
+                self._prune(now)
+            context = _UserContext(now + self.ttl)
+            self._contexts[user_id] = context
+        else:
+            # Каждое действие продлевает контекст
+            context.expires_at = now + self.ttl
+        return context
+
+    def _prune(self, now: float):
+        for user_id in [uid for uid, context in self._contexts.items() if context.expires_at < now]:
+            del self._contexts[user_id]
+
+    async def call(self, user_id: int, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Вызвать метод репозитория или вернуть его результат из контекста пользователя
+
+        Args:
+            user_id: Telegram ID пользователя, просматривающего отчет
+            func: Метод репозитория сущности (результат зависит только от аргументов;
+                  результаты тестов сюда не передаются)
+            *args: Аргументы метода
+        """
+        context = self._get_context(user_id)
+        key = (func.__qualname__, args)
+        if key in context.values:
+            self._stats["hits"] += 1
+            return context.values[key]
+
+        self._stats["misses"] += 1
+        value = await func(*args)
+        if value:
+            context.values[key] = value
+        return value
+
+    def discard(self, user_id: int):
+        """Сбросить контекст пользователя (возврат в меню)"""
+        self._contexts.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Попадания и промахи контекста, количество активных контекстов"""
+        return {**self._stats, "contexts": len(self._contexts)}
+
+
+# Глобальный контекст навигации по статистике тестов
+navigation_context = NavigationContext()
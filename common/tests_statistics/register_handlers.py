@@ -11,7 +11,8 @@ from common.tests_statistics.handlers import (
     show_tests_comparison,
     show_course_entry_detailed_microtopics, show_course_entry_summary_microtopics,
     show_month_entry_detailed_microtopics, show_month_entry_summary_microtopics,
-    show_month_control_detailed_microtopics, show_month_control_summary_microtopics
+    show_month_control_detailed_microtopics, show_month_control_summary_microtopics,
+    show_month_group_comparison
 )
 
 def get_transitions_handlers(states_group, role):
@@ -215,6 +216,12 @@ def register_test_statistics_handlers(router, states_group, role):
         await show_month_control_summary_microtopics(callback, state)
         await state.set_state(states_group.month_control_result)
 
+    @router.callback_query(states_group.month_control_result, F.data.startswith("month_group_comparison_"))
+    async def role_show_month_group_comparison_handler(callback: CallbackQuery, state: FSMContext):
+        logger.info(f"Вызвана функция show_month_group_comparison для пользователя {callback.from_user.id}")
+        await show_month_group_comparison(callback, state)
+        await state.set_state(states_group.month_control_result)
+
 
 
 
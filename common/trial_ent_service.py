@@ -1,7 +1,6 @@
 """
 Сервис для работы с пробным ЕНТ
 """
-import random
 import json
 from typing import List, Dict, Any, Optional, Tuple
 import logging
@@ -9,6 +8,8 @@ from database import (
     QuestionRepository, SubjectRepository, TrialEntResultRepository, 
     TrialEntQuestionResultRepository, StudentRepository
 )
+from common.question_sampler import question_sampler
+from common.result_events import publish_result_saved, TRIAL_ENT
 
 logger = logging.getLogger(__name__)
 
@@ -70,16 +71,12 @@ class TrialEntService:
             logger.warning(f"Предмет с кодом {subject_code} не найден")
             return []
         
-        # Получаем все вопросы по предмету
-        all_questions = await QuestionRepository.get_by_subject(subject_id)
-        
-        if len(all_questions) < count:
-            logger.warning(f"Недостаточно вопросов для предмета {subject_code}. Требуется: {count}, доступно: {len(all_questions)}")
-            # Используем все доступные вопросы
-            selected_questions = all_questions
+        # Выбираем случайные ID из пула предмета и загружаем только выбранные вопросы
+        selected_questions = await question_sampler.sample_by_subject(subject_id, count)
+
+        if len(selected_questions) < count:
+            logger.warning(f"Недостаточно вопросов для предмета {subject_code}. Требуется: {count}, доступно: {len(selected_questions)}")
         else:
-            # Выбираем случайные вопросы
-            selected_questions = random.sample(all_questions, count)
             logger.info(f"Выбрано {len(selected_questions)} вопросов для предмета {subject_code}")
         
         # Преобразуем в формат для quiz_registrator
@@ -198,6 +195,7 @@ class TrialEntService:
         # Сохраняем результаты вопросов
         logger.info(f"📊 TRIAL_ENT_SERVICE: Сохраняем {len(question_results_data)} результатов вопросов...")
         await TrialEntQuestionResultRepository.create_batch(question_results_data)
+        await publish_result_saved(TRIAL_ENT, student_id)
 
         end_time = time.time()
         duration = end_time - start_time
@@ -8,8 +8,9 @@ from ..keyboards.main import get_curator_main_menu_kb
 from common.keyboards import get_courses_kb, get_subjects_kb, get_lessons_kb, get_main_menu_back_button
 from ..keyboards.homeworks import get_homework_menu_kb, get_groups_kb
 from common.analytics.keyboards import get_groups_for_analytics_kb
+from common.report_export import get_export_buttons, GROUP_REPORT
 from database import (CuratorRepository, UserRepository, GroupRepository, StudentRepository,
-                     CourseRepository, LessonRepository, HomeworkRepository, HomeworkResultRepository)
+                     CourseRepository, LessonRepository, HomeworkResultRepository)
 
 class CuratorHomeworkStates(StatesGroup):
     homework_menu = State()
@@ -183,46 +184,34 @@ async def show_student_stats_list(callback: CallbackQuery, state: FSMContext):
             )
             return
 
-        # Получаем студентов группы
-        students = await StudentRepository.get_by_group(group_id)
-
-        # Получаем домашние задания для урока
-        homeworks = await HomeworkRepository.get_by_subject_lesson(group.subject_id, lesson_id)
+        # Матрица выполнения ДЗ урока студентами группы (один запрос)
+        matrix = await HomeworkResultRepository.get_completion_matrix(
+            group_id=group_id, subject_id=group.subject_id, lesson_id=lesson_id
+        )
 
-        # Формируем список студентов с их статусом выполнения ДЗ
+        # Выполнившие - студенты, у которых есть результат по каждому ДЗ урока
         completed_students = []
         not_completed_students = []
-
-        for student in students:
-            # Проверяем выполнение всех ДЗ урока
-            has_completed_all = True
-
-            for homework in homeworks:
-                # Проверяем, есть ли у студента результат по этому ДЗ
-                attempts = await HomeworkResultRepository.get_student_homework_attempts(student.id, homework.id)
-                if not attempts:
-                    has_completed_all = False
-                    break
-
-            if has_completed_all and homeworks:  # Есть ДЗ и все выполнены
-                completed_students.append(student)
+        for student_id, name in matrix.students.items():
+            if matrix.completed_all(student_id):
+                completed_students.append(name)
             else:
-                not_completed_students.append(student)
+                not_completed_students.append((student_id, name))
 
         # Формируем текст с выполнившими студентами
         completed_text = ""
         if completed_students:
-            completed_text = "\n".join([f"• {student.user.name}" for student in completed_students])
+            completed_text = "\n".join([f"• {name}" for name in completed_students])
 
         # Создаем клавиатуру только с не выполнившими студентами
         buttons = []
 
         if not_completed_students:
-            for student in not_completed_students:
+            for student_id, name in not_completed_students:
                 buttons.append([
                     InlineKeyboardButton(
-                        text=student.user.name,
-                        callback_data=f"hw_message_student_{student.id}"
+                        text=name,
+                        callback_data=f"hw_message_student_{student_id}"
                     )
                 ])
 
@@ -319,6 +308,7 @@ async def show_group_stats(callback: CallbackQuery, state: FSMContext):
         f"{topics_text}\n"
         f"{rating_text}",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            *get_export_buttons(GROUP_REPORT, int(group_id)),
             *get_main_menu_back_button()
         ])
     )
@@ -4,6 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
 from common.keyboards import get_home_kb
+from middlewares.rate_limit_middleware import BULK, outbound_priority_scope
 from ..keyboards.main import get_curator_main_menu_kb
 from ..keyboards.messages import (
     get_messages_menu_kb, get_groups_for_message_kb, 
@@ -280,11 +281,12 @@ async def send_mass_message(callback: CallbackQuery, state: FSMContext):
             telegram_id = student.user.telegram_id
             if telegram_id:
                 try:
-                    # Отправляем сообщение ученику
-                    await bot.send_message(
-                        chat_id=telegram_id,
-                        text=f"Сообщение от куратора для группы {group_name}:\n\n{message_text}"
-                    )
+                    # Отправляем сообщение ученику (рассылка уступает очередь тестам и ответам)
+                    with outbound_priority_scope(BULK):
+                        await bot.send_message(
+                            chat_id=telegram_id,
+                            text=f"Сообщение от куратора для группы {group_name}:\n\n{message_text}"
+                        )
                     sent_count += 1
                 except Exception as e:
                     error_str = str(e)
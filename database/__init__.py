@@ -8,7 +8,7 @@ from .repositories import UserRepository, CourseRepository, SubjectRepository, G
     HomeworkRepository, QuestionRepository, AnswerOptionRepository, MonthTestRepository, \
     MonthTestMicrotopicRepository, BonusTestRepository, BonusQuestionRepository, BonusAnswerOptionRepository, \
     HomeworkResultRepository, QuestionResultRepository, CourseEntryTestResultRepository, MonthEntryTestResultRepository, MonthControlTestResultRepository, ShopItemRepository, StudentPurchaseRepository, StudentBonusTestRepository, \
-    TrialEntResultRepository, TrialEntQuestionResultRepository
+    TrialEntResultRepository, TrialEntQuestionResultRepository, ExportRepository
 
 
 # Функции для совместимости со старым кодом
@@ -77,6 +77,7 @@ __all__ = [
     'CourseEntryTestResultRepository',
     'MonthEntryTestResultRepository',
     'MonthControlTestResultRepository',
+    'ExportRepository',
     'get_user_role',
     'get_user_by_telegram_id',
     'create_user'
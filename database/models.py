@@ -261,10 +261,7 @@ class Question(Base):
         """Асинхронное получение микротемы по subject_id и microtopic_number"""
         if self.subject_id and self.microtopic_number:
             from database.repositories.microtopic_repository import MicrotopicRepository
-            microtopics = await MicrotopicRepository.get_by_subject(self.subject_id)
-            for microtopic in microtopics:
-                if microtopic.number == self.microtopic_number:
-                    return microtopic
+            return await MicrotopicRepository.get_by_number(self.subject_id, self.microtopic_number)
         return None
 
     # Уникальность: один порядковый номер на ДЗ
@@ -0,0 +1,139 @@
+"""
+Кэш справочных сущностей (предметы, курсы, группы, уроки, микротемы)
+
+Read-through кэш в памяти процесса. Записи хранятся по ID и по натуральным ключам
+(название предмета, номер микротемы и т.д.). При изменении сущности репозиторий
+вызывает invalidate(): локальные записи сбрасываются, а счетчик версии сущности
+увеличивается в Redis, чтобы остальные воркеры сбросили свои копии.
+"""
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ключ Redis-хэша со счетчиками версий сущностей
+VERSIONS_KEY = "reference_cache:versions"
+# Как часто сверять версии с Redis (в секундах)
+VERSION_SYNC_INTERVAL = 5
+# Максимальное время жизни записи (в секундах) - страховка от пропущенной инвалидации
+ENTRY_TTL = 600
+
+# Типы справочных сущностей
+SUBJECT = "subject"
+COURSE = "course"
+GROUP = "group"
+LESSON = "lesson"
+MICROTOPIC = "microtopic"
+
+
+class ReferenceCache:
+    """Read-through кэш справочных сущностей с версионной инвалидацией"""
+
+    def __init__(self):
+        # Сущность -> ключ -> (время загрузки, значение)
+        self._entries: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+        # Известные версии сущностей
+        self._versions: Dict[str, int] = {}
+        self._last_sync = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _get_redis():
+        """Получить подключенный Redis клиент (или None)"""
+        from utils.redis_manager import redis_manager
+        if redis_manager.connected and redis_manager.redis:
+            return redis_manager.redis
+        return None
+
+    async def _sync_versions(self):
+        """Сверить версии с Redis и сбросить устаревшие сущности"""
+        now = time.monotonic()
+        if now - self._last_sync < VERSION_SYNC_INTERVAL:
+            return
+        self._last_sync = now
+
+        redis = self._get_redis()
+        if not redis:
+            return
+
+        try:
+            remote_versions = await redis.hgetall(VERSIONS_KEY)
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения версий справочного кэша: {e}")
+            return
+
+        for entity, version in remote_versions.items():
+            entity = entity.decode('utf-8') if isinstance(entity, bytes) else entity
+            version = int(version)
+            if self._versions.get(entity) != version:
+                self._entries.pop(entity, None)
+                self._versions[entity] = version
+
+    async def get(self, entity: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Получить значение из кэша или загрузить его через loader
+
+        Args:
+            entity: Тип сущности (SUBJECT, COURSE, ...)
+            key: Ключ внутри сущности, например ("id", 5) или ("name", "Химия")
+            loader: Корутина загрузки из БД
+
+        Returns:
+            Значение из кэша или результат loader (None не кэшируется)
+        """
+        await self._sync_versions()
+
+        entries = self._entries.setdefault(entity, {})
+        cached = entries.get(key)
+        if cached and time.monotonic() - cached[0] < ENTRY_TTL:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        version = self._versions.get(entity)
+        value = await loader()
+
+        # Не сохраняем результат, если во время загрузки сущность была инвалидирована
+        if value is not None and self._versions.get(entity) == version:
+            self._entries.setdefault(entity, {})[key] = (time.monotonic(), value)
+        return value
+
+    def put(self, entity: str, key: Hashable, value: Any):
+        """Положить уже загруженное значение в кэш (прогрев связанных ключей)"""
+        if value is not None:
+            self._entries.setdefault(entity, {})[key] = (time.monotonic(), value)
+
+    async def invalidate(self, *entities: str):
+        """Сбросить записи сущностей во всех воркерах"""
+        for entity in entities:
+            self._entries.pop(entity, None)
+
+        redis = self._get_redis()
+        if redis:
+            try:
+                for entity in entities:
+                    self._versions[entity] = await redis.hincrby(VERSIONS_KEY, entity, 1)
+                return
+            except Exception as e:
+                logger.error(f"❌ Ошибка обновления версий справочного кэша: {e}")
+
+        for entity in entities:
+            self._versions[entity] = self._versions.get(entity, 0) + 1
+
+    def clear(self):
+        """Очистить локальный кэш"""
+        self._entries.clear()
+        logger.info("🗑️ Справочный кэш очищен")
+
+    def get_cache_info(self) -> Dict[str, int]:
+        """Информация о кэше"""
+        info = {entity: len(entries) for entity, entries in self._entries.items()}
+        info["hits"] = self.hits
+        info["misses"] = self.misses
+        return info
+
+
+# Глобальный экземпляр справочного кэша
+reference_cache = ReferenceCache()
@@ -29,6 +29,7 @@ from .student_purchase_repository import StudentPurchaseRepository
 from .student_bonus_test_repository import StudentBonusTestRepository
 from .trial_ent_result_repository import TrialEntResultRepository
 from .trial_ent_question_result_repository import TrialEntQuestionResultRepository
+from .export_repository import ExportRepository
 
 __all__ = [
     'UserRepository',
@@ -58,5 +59,6 @@ __all__ = [
     'StudentPurchaseRepository',
     'StudentBonusTestRepository',
     'TrialEntResultRepository',
-    'TrialEntQuestionResultRepository'
+    'TrialEntQuestionResultRepository',
+    'ExportRepository'
 ]
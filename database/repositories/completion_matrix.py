@@ -0,0 +1,135 @@
+"""
+Матрица выполнения ДЗ: студенты × домашние задания одним сгруппированным запросом
+
+Экраны выполнения ДЗ (куратор по уроку, профиль студента) раньше проверяли
+каждую пару студент-ДЗ отдельным запросом или загружали все результаты ДЗ,
+чтобы посчитать их в Python. Матрица берет участников, CROSS JOIN доступных
+им ДЗ и LEFT JOIN результатов, сгруппированных по паре студент-ДЗ: количество
+попыток, лучший процент, баллы и дата последней попытки.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, and_, true
+from ..database import get_db_session
+from ..models import Student, User, Group, Homework, HomeworkResult, student_groups
+
+
+@dataclass(frozen=True, slots=True)
+class CompletionCell:
+    """Ячейка матрицы: результаты студента по одному ДЗ (attempts == 0 - не выполнено)"""
+    attempts: int
+    best_percent: Optional[int]
+    points: int
+    last_completed_at: Optional[datetime]
+
+    @property
+    def completed(self) -> bool:
+        return self.attempts > 0
+
+
+@dataclass(slots=True)
+class CompletionMatrix:
+    """Матрица выполнения ДЗ: студенты (по алфавиту) × ДЗ"""
+    students: Dict[int, str] = field(default_factory=dict)
+    homework_ids: List[int] = field(default_factory=list)
+    cells: Dict[Tuple[int, int], CompletionCell] = field(default_factory=dict)
+
+    def row(self, student_id: int) -> List[CompletionCell]:
+        """Ячейки студента по всем ДЗ матрицы"""
+        return [self.cells[(student_id, homework_id)] for homework_id in self.homework_ids]
+
+    def completed_count(self, student_id: int) -> int:
+        """Количество выполненных студентом ДЗ (без учета повторных попыток)"""
+        return sum(1 for cell in self.row(student_id) if cell.completed)
+
+    def completed_all(self, student_id: int) -> bool:
+        """Есть ДЗ, и студент выполнил все"""
+        return bool(self.homework_ids) and self.completed_count(student_id) == len(self.homework_ids)
+
+    def attempts(self, student_id: int) -> int:
+        """Все попытки студента, включая повторные"""
+        return sum(cell.attempts for cell in self.row(student_id))
+
+    def points(self, student_id: int) -> int:
+        """Баллы студента по ДЗ матрицы"""
+        return sum(cell.points for cell in self.row(student_id))
+
+    def last_completed_at(self, student_id: int) -> Optional[datetime]:
+        """Дата последней попытки студента"""
+        dates = [cell.last_completed_at for cell in self.row(student_id) if cell.last_completed_at]
+        return max(dates) if dates else None
+
+
+async def get_completion_matrix(group_id: int = None, student_id: int = None,
+                                subject_id: int = None, lesson_id: int = None) -> CompletionMatrix:
+    """
+    Матрица выполнения ДЗ группы или одного студента
+
+    Args:
+        group_id: ID группы (участники - студенты группы)
+        student_id: ID студента (если группа не указана)
+        subject_id: Ограничить ДЗ предметом; по умолчанию - предметы групп участников
+        lesson_id: Ограничить ДЗ уроком
+    """
+    if group_id is not None:
+        members = select(student_groups.c.student_id).where(student_groups.c.group_id == group_id)
+        member_groups = select(Group.subject_id).where(Group.id == group_id)
+    else:
+        members = select(Student.id.label('student_id')).where(Student.id == student_id)
+        member_groups = (
+            select(Group.subject_id)
+            .join(student_groups, student_groups.c.group_id == Group.id)
+            .where(student_groups.c.student_id == student_id)
+        )
+    members = members.subquery()
+
+    homework_filter = []
+    if lesson_id is not None:
+        homework_filter.append(Homework.lesson_id == lesson_id)
+    if subject_id is not None:
+        homework_filter.append(Homework.subject_id == subject_id)
+    else:
+        homework_filter.append(Homework.subject_id.in_(member_groups))
+    homeworks = select(Homework.id).where(and_(*homework_filter)).subquery()
+
+    percent = HomeworkResult.correct_answers * 100 / func.nullif(HomeworkResult.total_questions, 0)
+
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(
+                members.c.student_id, User.name, homeworks.c.id,
+                func.count(HomeworkResult.id),
+                func.max(percent),
+                func.coalesce(func.sum(HomeworkResult.points_earned), 0),
+                func.max(HomeworkResult.completed_at)
+            )
+            .select_from(members)
+            .join(Student, members.c.student_id == Student.id)
+            .join(User, Student.user_id == User.id)
+            # LEFT JOIN, чтобы студенты остались в матрице, даже если ДЗ нет
+            .outerjoin(homeworks, true())
+            .outerjoin(HomeworkResult, and_(
+                HomeworkResult.student_id == members.c.student_id,
+                HomeworkResult.homework_id == homeworks.c.id
+            ))
+            .group_by(members.c.student_id, User.name, homeworks.c.id)
+            .order_by(User.name, members.c.student_id, homeworks.c.id)
+        )
+
+        matrix = CompletionMatrix()
+        homework_ids = set()
+        for row_student_id, name, homework_id, attempts, best_percent, points, last_completed_at in result:
+            matrix.students[row_student_id] = name
+            if homework_id is None:
+                continue
+            homework_ids.add(homework_id)
+            matrix.cells[(row_student_id, homework_id)] = CompletionCell(
+                attempts=attempts,
+                best_percent=int(best_percent) if best_percent is not None else None,
+                points=int(points),
+                last_completed_at=last_completed_at
+            )
+        matrix.homework_ids = sorted(homework_ids)
+        return matrix
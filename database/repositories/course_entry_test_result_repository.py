@@ -10,6 +10,7 @@ from ..models import (
     Question, Homework, Lesson, Group
 )
 from ..database import get_db_session
+from .test_summary import TestSummaryRow, get_group_test_summary
 import random
 
 
@@ -138,6 +139,13 @@ class CourseEntryTestResultRepository:
             )
             return result.scalar_one()
 
+    @staticmethod
+    async def get_group_summary(group_id: int, subject_id: int) -> List[TestSummaryRow]:
+        """Сводка входного теста курса по группе: все студенты и их результат одним запросом"""
+        return await get_group_test_summary(
+            CourseEntryTestResult, group_id, CourseEntryTestResult.subject_id == subject_id
+        )
+
     @staticmethod
     async def get_statistics_by_group(group_id: int) -> Dict:
         """Получить статистику входного теста курса по группе"""
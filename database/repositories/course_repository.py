@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Course, course_subjects
 from ..database import get_db_session
+from ..reference_cache import reference_cache, COURSE, SUBJECT, LESSON
 
 
 class CourseRepository:
@@ -26,13 +27,16 @@ class CourseRepository:
     @staticmethod
     async def get_by_id(course_id: int) -> Optional[Course]:
         """Получить курс по ID"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Course)
-                .options(selectinload(Course.subjects))
-                .where(Course.id == course_id)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Course)
+                    .options(selectinload(Course.subjects))
+                    .where(Course.id == course_id)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(COURSE, ("id", course_id), load)
     
     @staticmethod
     async def create(name: str) -> Course:
@@ -41,6 +45,7 @@ class CourseRepository:
             course = Course(name=name)
             session.add(course)
             await session.commit()
+            await reference_cache.invalidate(COURSE)
             await session.refresh(course)
             return course
     
@@ -57,6 +62,7 @@ class CourseRepository:
             # Затем удаляем сам курс
             result = await session.execute(delete(Course).where(Course.id == course_id))
             await session.commit()
+            await reference_cache.invalidate(COURSE, SUBJECT, LESSON)
             return result.rowcount > 0
 
     @staticmethod
@@ -92,3 +98,17 @@ class CourseRepository:
             courses = list(result.scalars().all())
             print(f"🔍 DEBUG CourseRepository.get_by_user_id: found courses={courses}")
             return courses
+
+    @staticmethod
+    async def get_ids_by_user_id(telegram_id: int) -> List[int]:
+        """Получить ID курсов студента по telegram_id"""
+        async with get_db_session() as session:
+            from ..models import Student, student_courses, User
+
+            result = await session.execute(
+                select(student_courses.c.course_id)
+                .join(Student, Student.id == student_courses.c.student_id)
+                .join(User, Student.user_id == User.id)
+                .where(User.telegram_id == telegram_id)
+            )
+            return list(result.scalars().all())
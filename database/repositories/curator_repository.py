@@ -7,25 +7,31 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Curator, User, Course, Subject, Group
 from ..database import get_db_session
+from .keyset import apply_keyset, keyset_rows
 
 
 class CuratorRepository:
     """Репозиторий для работы с кураторами"""
     
     @staticmethod
-    async def get_all() -> List[Curator]:
-        """Получить всех кураторов"""
+    async def get_all(after_id: int = None, before_id: int = None, limit: int = None) -> List[Curator]:
+        """
+        Получить всех кураторов (упорядочены по ID)
+
+        Args:
+            after_id: Курсор следующей страницы - ID последнего куратора предыдущей
+            before_id: Курсор предыдущей страницы - ID первого куратора текущей
+            limit: Размер страницы (по умолчанию - все кураторы)
+        """
         async with get_db_session() as session:
-            result = await session.execute(
-                select(Curator)
-                .options(
-                    selectinload(Curator.user),
-                    selectinload(Curator.course),
-                    selectinload(Curator.subject),
-                    selectinload(Curator.groups).selectinload(Group.subject)
-                )
+            query = select(Curator).options(
+                selectinload(Curator.user),
+                selectinload(Curator.course),
+                selectinload(Curator.subject),
+                selectinload(Curator.groups).selectinload(Group.subject)
             )
-            return list(result.scalars().all())
+            result = await session.execute(apply_keyset(query, Curator.id, after_id, before_id, limit))
+            return keyset_rows(result.scalars().all(), before_id)
 
     @staticmethod
     async def get_by_id(curator_id: int) -> Optional[Curator]:
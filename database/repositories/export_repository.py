@@ -0,0 +1,138 @@
+"""
+Репозиторий потоковой выгрузки отчетов (CSV/XLSX)
+
+Строки отчетов читаются через серверный курсор (session.stream) пачками по
+STREAM_BATCH_SIZE и отдаются асинхронным генератором, поэтому память не
+растет с размером группы или школы.
+"""
+from typing import AsyncIterator
+
+from sqlalchemy import select, func, and_, literal
+from ..database import get_db_session
+from ..models import (
+    Student, User, Group, Homework, HomeworkResult, student_groups,
+    CourseEntryTestResult, MonthEntryTestResult, MonthControlTestResult, TrialEntResult
+)
+
+# Размер пачки строк, читаемой из курсора за один раз
+STREAM_BATCH_SIZE = 500
+
+
+class ExportRepository:
+    """Репозиторий потоковой выгрузки отчетов"""
+
+    @staticmethod
+    async def _stream(query) -> AsyncIterator[tuple]:
+        async with get_db_session() as session:
+            result = await session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in result:
+                yield tuple(row)
+
+    @staticmethod
+    def _group_members(group_id: int):
+        return select(student_groups.c.student_id).where(student_groups.c.group_id == group_id)
+
+    @staticmethod
+    async def stream_group_students(group_id: int) -> AsyncIterator[tuple]:
+        """
+        Выполнение ДЗ и баллы студентов группы
+
+        Область та же, что в статистике группы (get_group_student_stats): ДЗ
+        предметов всех групп студента. Баллы считаются по тем же ДЗ.
+
+        Yields:
+            tuple: (имя, выполнено ДЗ, всего ДЗ, баллы за эти ДЗ) по алфавиту
+        """
+        members = ExportRepository._group_members(group_id)
+
+        # Предметы всех групп каждого студента группы
+        member_subjects = (
+            select(student_groups.c.student_id, Group.subject_id)
+            .join(Group, student_groups.c.group_id == Group.id)
+            .where(and_(student_groups.c.student_id.in_(members), Group.subject_id.is_not(None)))
+            .distinct()
+            .subquery()
+        )
+        available = (
+            select(member_subjects.c.student_id, func.count(Homework.id).label('available'))
+            .join(Homework, Homework.subject_id == member_subjects.c.subject_id)
+            .group_by(member_subjects.c.student_id)
+            .subquery()
+        )
+        completed = (
+            select(
+                HomeworkResult.student_id,
+                func.count(func.distinct(HomeworkResult.homework_id)).label('completed'),
+                func.sum(HomeworkResult.points_earned).label('points')
+            )
+            .join(Homework, HomeworkResult.homework_id == Homework.id)
+            .join(member_subjects, and_(
+                member_subjects.c.student_id == HomeworkResult.student_id,
+                member_subjects.c.subject_id == Homework.subject_id
+            ))
+            .group_by(HomeworkResult.student_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                User.name,
+                func.coalesce(completed.c.completed, 0),
+                func.coalesce(available.c.available, 0),
+                func.coalesce(completed.c.points, 0)
+            )
+            .select_from(student_groups)
+            .join(Student, student_groups.c.student_id == Student.id)
+            .join(User, Student.user_id == User.id)
+            .outerjoin(completed, completed.c.student_id == Student.id)
+            .outerjoin(available, available.c.student_id == Student.id)
+            .where(student_groups.c.group_id == group_id)
+            .order_by(User.name)
+        )
+        async for row in ExportRepository._stream(query):
+            yield row
+
+    @staticmethod
+    async def stream_test_results(test_type: str, group_id: int, month_test_id: int = None) -> AsyncIterator[tuple]:
+        """
+        Результаты теста всех студентов группы (студенты без результата - с пустыми полями)
+
+        Args:
+            test_type: course_entry, month_entry, month_control или trial_ent
+            group_id: ID группы
+            month_test_id: ID теста месяца (для month_entry и month_control)
+
+        Yields:
+            tuple: (имя, верных, всего вопросов, процент, дата прохождения) по алфавиту;
+                   для пробного ЕНТ - все попытки студента по дате
+        """
+        if test_type == "course_entry":
+            model = CourseEntryTestResult
+            subject_id = select(Group.subject_id).where(Group.id == group_id).scalar_subquery()
+            condition = model.subject_id == subject_id
+        elif test_type == "month_entry":
+            model = MonthEntryTestResult
+            condition = model.month_test_id == month_test_id
+        elif test_type == "month_control":
+            model = MonthControlTestResult
+            condition = model.month_test_id == month_test_id
+        else:
+            model = TrialEntResult
+            condition = literal(True)
+
+        if model is TrialEntResult:
+            percentage = func.round(model.correct_answers * 100.0 / func.nullif(model.total_questions, 0))
+        else:
+            percentage = model.score_percentage
+
+        query = (
+            select(User.name, model.correct_answers, model.total_questions, percentage, model.completed_at)
+            .select_from(student_groups)
+            .join(Student, student_groups.c.student_id == Student.id)
+            .join(User, Student.user_id == User.id)
+            .outerjoin(model, and_(model.student_id == Student.id, condition))
+            .where(student_groups.c.group_id == group_id)
+            .order_by(User.name, model.completed_at)
+        )
+        async for row in ExportRepository._stream(query):
+            yield row
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Group, Subject
 from ..database import get_db_session
+from ..reference_cache import reference_cache, GROUP
 
 
 class GroupRepository:
@@ -26,13 +27,16 @@ class GroupRepository:
     @staticmethod
     async def get_by_id(group_id: int) -> Optional[Group]:
         """Получить группу по ID"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Group)
-                .options(selectinload(Group.subject))
-                .where(Group.id == group_id)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Group)
+                    .options(selectinload(Group.subject))
+                    .where(Group.id == group_id)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(GROUP, ("id", group_id), load)
     
     @staticmethod
     async def get_by_subject(subject_id: int) -> List[Group]:
@@ -70,6 +74,7 @@ class GroupRepository:
             group = Group(name=name, subject_id=subject_id)
             session.add(group)
             await session.commit()
+            await reference_cache.invalidate(GROUP)
             await session.refresh(group)
             return group
 
@@ -96,6 +101,7 @@ class GroupRepository:
             # Теперь можно безопасно удалить саму группу
             result = await session.execute(delete(Group).where(Group.id == group_id))
             await session.commit()
+            await reference_cache.invalidate(GROUP)
             return result.rowcount > 0
 
     @staticmethod
@@ -130,6 +136,7 @@ class GroupRepository:
             # Теперь можно безопасно удалить все группы предмета
             result = await session.execute(delete(Group).where(Group.subject_id == subject_id))
             await session.commit()
+            await reference_cache.invalidate(GROUP)
             return result.rowcount
 
     @staticmethod
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Homework, Subject, Lesson
 from ..database import get_db_session
+from ..single_flight import single_flight
 
 
 class HomeworkRepository:
@@ -27,6 +28,7 @@ class HomeworkRepository:
             return list(result.scalars().all())
 
     @staticmethod
+    @single_flight
     async def get_by_id(homework_id: int) -> Optional[Homework]:
         """Получить домашнее задание по ID"""
         async with get_db_session() as session:
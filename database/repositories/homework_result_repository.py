@@ -5,6 +5,7 @@ from sqlalchemy import select, func, and_, case
 from sqlalchemy.orm import selectinload
 from ..database import get_db_session
 from ..models import HomeworkResult, QuestionResult, Student, Homework, Question
+from .completion_matrix import CompletionMatrix, get_completion_matrix
 
 
 class HomeworkResultRepository:
@@ -241,6 +242,233 @@ class HomeworkResultRepository:
 
             return microtopic_stats
 
+    @staticmethod
+    async def get_group_student_stats(group_id: int, subject_id: int = None) -> dict:
+        """
+        Статистика всех студентов группы за постоянное число агрегирующих запросов
+
+        Значения для каждого студента совпадают с get_student_stats и
+        get_microtopic_understanding, но считаются сразу для всей группы.
+
+        Args:
+            group_id: ID группы
+            subject_id: ID предмета группы (для понимания по микротемам)
+
+        Returns:
+            dict: {
+                'students': [{'id', 'name', 'total_completed', 'total_available',
+                              'unique_completed', 'total_points'}] (по возрастанию ID),
+                'microtopics': {student_id: {microtopic_number: {'total_answered',
+                                'correct_answered', 'percentage'}}}
+            }
+        """
+        from ..models import User, Group, student_groups
+
+        async with get_db_session() as session:
+            # Студенты группы
+            students_result = await session.execute(
+                select(Student.id, User.name)
+                .join(User, Student.user_id == User.id)
+                .join(student_groups, student_groups.c.student_id == Student.id)
+                .where(student_groups.c.group_id == group_id)
+                .order_by(Student.id)
+            )
+            students = {
+                row.id: {
+                    'id': row.id,
+                    'name': row.name,
+                    'total_completed': 0,
+                    'total_available': 0,
+                    'unique_completed': 0,
+                    'total_points': 0
+                }
+                for row in students_result
+            }
+            if not students:
+                return {'students': [], 'microtopics': {}}
+
+            student_ids = list(students)
+
+            # Предметы всех групп каждого студента (как в get_student_stats)
+            member_subjects = (
+                select(student_groups.c.student_id, Group.subject_id)
+                .join(Group, student_groups.c.group_id == Group.id)
+                .where(
+                    student_groups.c.student_id.in_(student_ids),
+                    Group.subject_id.is_not(None)
+                )
+                .distinct()
+                .subquery()
+            )
+
+            # Доступные ДЗ по предметам групп студента
+            available_result = await session.execute(
+                select(member_subjects.c.student_id, func.count(Homework.id))
+                .join(Homework, Homework.subject_id == member_subjects.c.subject_id)
+                .group_by(member_subjects.c.student_id)
+            )
+            for student_id, total_available in available_result:
+                students[student_id]['total_available'] = total_available
+
+            # Выполненные ДЗ (уникальные и с повторами) по предметам групп студента
+            completed_result = await session.execute(
+                select(
+                    HomeworkResult.student_id,
+                    func.count(func.distinct(HomeworkResult.homework_id)),
+                    func.count(HomeworkResult.id)
+                )
+                .join(Homework, HomeworkResult.homework_id == Homework.id)
+                .join(member_subjects, and_(
+                    member_subjects.c.student_id == HomeworkResult.student_id,
+                    member_subjects.c.subject_id == Homework.subject_id
+                ))
+                .group_by(HomeworkResult.student_id)
+            )
+            for student_id, unique_completed, total_completed in completed_result:
+                students[student_id]['unique_completed'] = unique_completed
+                students[student_id]['total_completed'] = total_completed
+
+            # Все баллы студентов (не только по предметам групп)
+            points_result = await session.execute(
+                select(HomeworkResult.student_id, func.sum(HomeworkResult.points_earned))
+                .where(HomeworkResult.student_id.in_(student_ids))
+                .group_by(HomeworkResult.student_id)
+            )
+            for student_id, total_points in points_result:
+                students[student_id]['total_points'] = total_points or 0
+
+            # Понимание по микротемам предмета группы
+            microtopics = {}
+            if subject_id:
+                microtopics_result = await session.execute(
+                    select(
+                        HomeworkResult.student_id,
+                        QuestionResult.microtopic_number,
+                        func.count(QuestionResult.id).label('total_answered'),
+                        func.sum(
+                            case(
+                                (QuestionResult.is_correct == True, 1),
+                                else_=0
+                            )
+                        ).label('correct_answered')
+                    )
+                    .join(HomeworkResult, QuestionResult.homework_result_id == HomeworkResult.id)
+                    .join(Question, QuestionResult.question_id == Question.id)
+                    .where(and_(
+                        HomeworkResult.student_id.in_(student_ids),
+                        Question.subject_id == subject_id,
+                        ~QuestionResult.microtopic_number.is_(None)
+                    ))
+                    .group_by(HomeworkResult.student_id, QuestionResult.microtopic_number)
+                    .order_by(QuestionResult.microtopic_number)
+                )
+                for row in microtopics_result:
+                    total = row.total_answered
+                    correct = row.correct_answered or 0
+                    microtopics.setdefault(row.student_id, {})[row.microtopic_number] = {
+                        'total_answered': total,
+                        'correct_answered': correct,
+                        'percentage': round((correct / total * 100), 0) if total > 0 else 0
+                    }
+
+            return {'students': list(students.values()), 'microtopics': microtopics}
+
+    @staticmethod
+    async def get_earned_points(student_id: int) -> int:
+        """Все заработанные студентом баллы (сумма points_earned по всем ДЗ)"""
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(func.coalesce(func.sum(HomeworkResult.points_earned), 0))
+                .where(HomeworkResult.student_id == student_id)
+            )
+            return int(result.scalar())
+
+    @staticmethod
+    async def get_members_points(group_id: int = None, subject_id: int = None, course_id: int = None) -> list:
+        """
+        Заработанные баллы всех студентов группы, групп предмета или курса одним запросом
+
+        Передается ровно один из аргументов. Студенты без результатов ДЗ
+        возвращаются с 0 баллов.
+
+        Returns:
+            list: строки (student_id, points)
+        """
+        from ..models import Group, student_groups, student_courses
+
+        async with get_db_session() as session:
+            if group_id is not None:
+                members = select(student_groups.c.student_id).where(student_groups.c.group_id == group_id)
+            elif subject_id is not None:
+                members = (
+                    select(student_groups.c.student_id)
+                    .join(Group, student_groups.c.group_id == Group.id)
+                    .where(Group.subject_id == subject_id)
+                )
+            else:
+                members = select(student_courses.c.student_id).where(student_courses.c.course_id == course_id)
+            members = members.distinct().subquery()
+
+            result = await session.execute(
+                select(members.c.student_id, func.coalesce(func.sum(HomeworkResult.points_earned), 0))
+                .outerjoin(HomeworkResult, HomeworkResult.student_id == members.c.student_id)
+                .group_by(members.c.student_id)
+            )
+            return [(student_id, int(points)) for student_id, points in result]
+
+    @staticmethod
+    async def get_completion_matrix(group_id: int = None, student_id: int = None,
+                                    subject_id: int = None, lesson_id: int = None) -> CompletionMatrix:
+        """Матрица выполнения ДЗ (студенты × ДЗ) группы или студента по уроку/предмету одним запросом"""
+        return await get_completion_matrix(group_id, student_id, subject_id, lesson_id)
+
+    @staticmethod
+    async def get_microtopic_answer_aggregates(subject_id: int = None) -> list:
+        """
+        Агрегаты ответов по микротемам для всех студентов групп предмета (или всей школы)
+
+        Студент учитывается в каждой группе предмета, в которой состоит, а ответы
+        берутся по вопросам предмета группы - как в переборе групп и
+        get_microtopic_understanding для каждого студента.
+
+        Returns:
+            list: строки (subject_id, group_id, student_id, microtopic_number,
+                  total_answered, correct_answered)
+        """
+        from ..models import Group, student_groups
+
+        async with get_db_session() as session:
+            query = (
+                select(
+                    Group.subject_id,
+                    Group.id.label('group_id'),
+                    HomeworkResult.student_id,
+                    QuestionResult.microtopic_number,
+                    func.count(QuestionResult.id).label('total_answered'),
+                    func.sum(
+                        case(
+                            (QuestionResult.is_correct == True, 1),
+                            else_=0
+                        )
+                    ).label('correct_answered')
+                )
+                .select_from(Group)
+                .join(student_groups, student_groups.c.group_id == Group.id)
+                .join(HomeworkResult, HomeworkResult.student_id == student_groups.c.student_id)
+                .join(QuestionResult, QuestionResult.homework_result_id == HomeworkResult.id)
+                .join(Question, and_(
+                    QuestionResult.question_id == Question.id,
+                    Question.subject_id == Group.subject_id
+                ))
+                .where(~QuestionResult.microtopic_number.is_(None))
+                .group_by(Group.subject_id, Group.id, HomeworkResult.student_id, QuestionResult.microtopic_number)
+            )
+            if subject_id is not None:
+                query = query.where(Group.subject_id == subject_id)
+
+            result = await session.execute(query)
+            return [tuple(row) for row in result]
+
     @staticmethod
     async def delete(homework_result_id: int) -> bool:
         """Удалить результат домашнего задания"""
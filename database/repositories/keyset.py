@@ -0,0 +1,44 @@
+"""
+Keyset (курсорная) пагинация для репозиториев
+
+Страница задается последним ID предыдущей страницы (after_id) или первым ID
+следующей (before_id), поэтому запрос не использует OFFSET и читает только
+строки одной страницы независимо от ее номера.
+"""
+from typing import List, Optional, TypeVar
+
+from sqlalchemy import Select
+
+T = TypeVar("T")
+
+
+def apply_keyset(query: Select, id_column, after_id: Optional[int] = None,
+                 before_id: Optional[int] = None, limit: Optional[int] = None) -> Select:
+    """
+    Добавить к запросу условие курсора, сортировку по ID и лимит
+
+    Args:
+        query: Исходный запрос
+        id_column: Колонка первичного ключа (например, Student.id)
+        after_id: Вернуть строки с ID больше указанного (следующая страница)
+        before_id: Вернуть строки с ID меньше указанного (предыдущая страница)
+        limit: Размер страницы (None - без ограничения)
+    """
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    if before_id is not None:
+        # Идем назад от курсора, результат разворачивается в keyset_rows
+        query = query.where(id_column < before_id).order_by(id_column.desc())
+    else:
+        query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def keyset_rows(rows: List[T], before_id: Optional[int] = None) -> List[T]:
+    """Вернуть строки страницы в порядке возрастания ID"""
+    rows = list(rows)
+    if before_id is not None:
+        rows.reverse()
+    return rows
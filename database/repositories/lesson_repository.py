@@ -7,6 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Lesson, Subject
 from ..database import get_db_session
+from ..single_flight import single_flight
+from ..reference_cache import reference_cache, LESSON
 
 
 class LessonRepository:
@@ -24,15 +26,19 @@ class LessonRepository:
             return list(result.scalars().all())
 
     @staticmethod
+    @single_flight
     async def get_by_id(lesson_id: int) -> Optional[Lesson]:
         """Получить урок по ID"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Lesson)
-                .options(selectinload(Lesson.subject))
-                .where(Lesson.id == lesson_id)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Lesson)
+                    .options(selectinload(Lesson.subject))
+                    .where(Lesson.id == lesson_id)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(LESSON, ("id", lesson_id), load)
 
     @staticmethod
     async def get_by_subject(subject_id: int) -> List[Lesson]:
@@ -79,6 +85,7 @@ class LessonRepository:
             lesson = Lesson(name=name, subject_id=subject_id, course_id=course_id)
             session.add(lesson)
             await session.commit()
+            await reference_cache.invalidate(LESSON)
             await session.refresh(lesson)
             return lesson
 
@@ -110,6 +117,7 @@ class LessonRepository:
                 lesson.name = name
 
             await session.commit()
+            await reference_cache.invalidate(LESSON)
             await session.refresh(lesson)
             return lesson
 
@@ -121,6 +129,7 @@ class LessonRepository:
                 delete(Lesson).where(Lesson.id == lesson_id)
             )
             await session.commit()
+            await reference_cache.invalidate(LESSON)
             return result.rowcount > 0
 
     @staticmethod
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Microtopic, Subject
 from ..database import get_db_session
+from ..reference_cache import reference_cache, MICROTOPIC
 
 
 class MicrotopicRepository:
@@ -37,14 +38,18 @@ class MicrotopicRepository:
     @staticmethod
     async def get_by_subject(subject_id: int) -> List[Microtopic]:
         """Получить микротемы по предмету"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Microtopic)
-                .options(selectinload(Microtopic.subject))
-                .where(Microtopic.subject_id == subject_id)
-                .order_by(Microtopic.number)
-            )
-            return list(result.scalars().all())
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Microtopic)
+                    .options(selectinload(Microtopic.subject))
+                    .where(Microtopic.subject_id == subject_id)
+                    .order_by(Microtopic.number)
+                )
+                return list(result.scalars().all())
+
+        # Возвращаем копию, чтобы вызывающий код не изменил закэшированный список
+        return list(await reference_cache.get(MICROTOPIC, ("subject", subject_id), load))
 
     @staticmethod
     async def get_next_number_for_subject(subject_id: int) -> int:
@@ -73,13 +78,16 @@ class MicrotopicRepository:
     @staticmethod
     async def get_by_number(subject_id: int, number: int) -> Optional[Microtopic]:
         """Получить микротему по номеру в рамках предмета"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Microtopic)
-                .options(selectinload(Microtopic.subject))
-                .where(Microtopic.subject_id == subject_id, Microtopic.number == number)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Microtopic)
+                    .options(selectinload(Microtopic.subject))
+                    .where(Microtopic.subject_id == subject_id, Microtopic.number == number)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(MICROTOPIC, ("number", subject_id, number), load)
 
     @staticmethod
     async def create(name: str, subject_id: int) -> Microtopic:
@@ -125,6 +133,7 @@ class MicrotopicRepository:
             microtopic = Microtopic(name=name, subject_id=subject_id, number=next_number)
             session.add(microtopic)
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
             await session.refresh(microtopic)
             return microtopic
 
@@ -191,6 +200,7 @@ class MicrotopicRepository:
                 current_number += 1
 
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
 
             # Обновляем объекты для получения ID
             for microtopic in microtopics:
@@ -210,6 +220,7 @@ class MicrotopicRepository:
                 microtopic.name = name
 
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
             return True
 
     @staticmethod
@@ -232,6 +243,7 @@ class MicrotopicRepository:
                     updated_count += 1
 
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
             return updated_count
 
     @staticmethod
@@ -247,6 +259,7 @@ class MicrotopicRepository:
             # Удаляем микротему
             result = await session.execute(delete(Microtopic).where(Microtopic.id == microtopic_id))
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
 
             # Перенумеровываем только если явно запрошено (для обратной совместимости)
             if renumber and result.rowcount > 0 and subject_id:
@@ -284,6 +297,7 @@ class MicrotopicRepository:
                 )
             )
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
 
             return result.rowcount > 0, microtopic_name
 
@@ -293,6 +307,7 @@ class MicrotopicRepository:
         async with get_db_session() as session:
             result = await session.execute(delete(Microtopic).where(Microtopic.subject_id == subject_id))
             await session.commit()
+            await reference_cache.invalidate(MICROTOPIC)
             return result.rowcount
 
     @staticmethod
@@ -2,7 +2,7 @@
 Репозиторий для работы с результатами контрольных тестов месяца
 """
 from typing import List, Optional, Dict
-from sqlalchemy import select, delete, and_, func
+from sqlalchemy import select, delete, and_, func, case
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import (
@@ -11,7 +11,6 @@ from ..models import (
     MonthEntryTestResult, MonthEntryQuestionResult
 )
 from ..database import get_db_session
-import random
 
 
 class MonthControlTestResultRepository:
@@ -91,37 +90,21 @@ class MonthControlTestResultRepository:
             if not month_test:
                 return []
             
-            all_questions = []
-            
-            # Для каждой микротемы теста получаем случайные вопросы
-            for microtopic_relation in month_test.microtopics:
-                microtopic_number = microtopic_relation.microtopic_number
-                
-                # Получаем все вопросы по данной микротеме и предмету
-                questions_result = await session.execute(
-                    select(Question)
-                    .options(selectinload(Question.answer_options))
-                    .where(
-                        and_(
-                            Question.subject_id == month_test.subject_id,
-                            Question.microtopic_number == microtopic_number
-                        )
-                    )
-                )
-                questions = list(questions_result.scalars().all())
-                
-                # Берем случайные вопросы (до указанного количества)
-                if questions:
-                    selected_count = min(questions_per_microtopic, len(questions))
-                    selected_questions = random.sample(questions, selected_count)
-                    
-                    for question in selected_questions:
-                        all_questions.append({
-                            'question': question,
-                            'microtopic_number': microtopic_number
-                        })
-            
-            return all_questions
+            microtopic_numbers = [relation.microtopic_number for relation in month_test.microtopics]
+
+        # Стратифицированная выборка по всем микротемам одним запросом
+        from .question_repository import QuestionRepository
+        questions = await QuestionRepository.get_random_questions_by_microtopics(
+            month_test.subject_id, microtopic_numbers, questions_per_microtopic
+        )
+
+        return [
+            {
+                'question': question,
+                'microtopic_number': question.microtopic_number
+            }
+            for question in questions
+        ]
 
     @staticmethod
     async def create_test_result(student_id: int, month_test_id: int, 
@@ -265,6 +248,103 @@ class MonthControlTestResultRepository:
             
             return microtopic_stats
 
+    @staticmethod
+    async def get_group_comparison(group_id: int, month_test_id: int) -> Dict:
+        """
+        Сравнение входного и контрольного теста месяца по микротемам для всей группы
+
+        Проценты по микротемам обоих тестов, изменение и средние по группе
+        считаются одним SQL-запросом (две агрегирующие CTE, FULL JOIN и
+        оконные средние по микротеме).
+
+        Returns:
+            Dict: {
+                'students': [{'student_id', 'name', 'microtopics': {номер: {'entry', 'control', 'delta'}}}]
+                            (по алфавиту),
+                'group': {номер микротемы: {'entry', 'control', 'delta'}}
+            }
+            Проценты - целые (как в get_microtopic_statistics), None - тест не пройден.
+        """
+        from ..models import student_groups
+
+        members = select(student_groups.c.student_id).where(student_groups.c.group_id == group_id)
+
+        def microtopic_percentages(result_model, question_model, label: str):
+            return (
+                select(
+                    result_model.student_id.label('student_id'),
+                    question_model.microtopic_number.label('microtopic_number'),
+                    func.floor(
+                        func.sum(case((question_model.is_correct == True, 1), else_=0)) * 100.0
+                        / func.count(question_model.id)
+                    ).label('percentage')
+                )
+                .join(result_model, question_model.test_result_id == result_model.id)
+                .where(and_(
+                    result_model.month_test_id == month_test_id,
+                    result_model.student_id.in_(members),
+                    question_model.microtopic_number.is_not(None)
+                ))
+                .group_by(result_model.student_id, question_model.microtopic_number)
+                .cte(label)
+            )
+
+        entry = microtopic_percentages(MonthEntryTestResult, MonthEntryQuestionResult, 'entry_stats')
+        control = microtopic_percentages(MonthControlTestResult, MonthControlQuestionResult, 'control_stats')
+
+        student_id = func.coalesce(entry.c.student_id, control.c.student_id)
+        microtopic_number = func.coalesce(entry.c.microtopic_number, control.c.microtopic_number)
+        delta = control.c.percentage - entry.c.percentage
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(
+                    student_id.label('student_id'),
+                    User.name,
+                    microtopic_number.label('microtopic_number'),
+                    entry.c.percentage.label('entry'),
+                    control.c.percentage.label('control'),
+                    delta.label('delta'),
+                    func.avg(entry.c.percentage).over(partition_by=microtopic_number).label('group_entry'),
+                    func.avg(control.c.percentage).over(partition_by=microtopic_number).label('group_control'),
+                    func.avg(delta).over(partition_by=microtopic_number).label('group_delta')
+                )
+                .select_from(entry.join(control, and_(
+                    entry.c.student_id == control.c.student_id,
+                    entry.c.microtopic_number == control.c.microtopic_number
+                ), full=True))
+                .join(Student, Student.id == student_id)
+                .join(User, Student.user_id == User.id)
+                .order_by(User.name, student_id, microtopic_number)
+            )
+
+            def as_int(value):
+                return None if value is None else int(value)
+
+            def as_float(value):
+                return None if value is None else round(float(value), 1)
+
+            students = {}
+            group = {}
+            for row in result:
+                student = students.setdefault(row.student_id, {
+                    'student_id': row.student_id,
+                    'name': row.name,
+                    'microtopics': {}
+                })
+                student['microtopics'][row.microtopic_number] = {
+                    'entry': as_int(row.entry),
+                    'control': as_int(row.control),
+                    'delta': as_int(row.delta)
+                }
+                group[row.microtopic_number] = {
+                    'entry': as_float(row.group_entry),
+                    'control': as_float(row.group_control),
+                    'delta': as_float(row.group_delta)
+                }
+
+            return {'students': list(students.values()), 'group': dict(sorted(group.items()))}
+
     @staticmethod
     async def delete_by_id(test_result_id: int) -> bool:
         """Удалить результат контрольного теста месяца по ID"""
@@ -10,7 +10,7 @@ from ..models import (
     Question, Homework, Lesson, Group, MonthTestMicrotopic, User
 )
 from ..database import get_db_session
-import random
+from .test_summary import TestSummaryRow, get_group_test_summary
 
 
 class MonthEntryTestResultRepository:
@@ -90,37 +90,21 @@ class MonthEntryTestResultRepository:
             if not month_test:
                 return []
             
-            all_questions = []
-            
-            # Для каждой микротемы теста получаем случайные вопросы
-            for microtopic_relation in month_test.microtopics:
-                microtopic_number = microtopic_relation.microtopic_number
-                
-                # Получаем все вопросы по данной микротеме и предмету
-                questions_result = await session.execute(
-                    select(Question)
-                    .options(selectinload(Question.answer_options))
-                    .where(
-                        and_(
-                            Question.subject_id == month_test.subject_id,
-                            Question.microtopic_number == microtopic_number
-                        )
-                    )
-                )
-                questions = list(questions_result.scalars().all())
-                
-                # Берем случайные вопросы (до указанного количества)
-                if questions:
-                    selected_count = min(questions_per_microtopic, len(questions))
-                    selected_questions = random.sample(questions, selected_count)
-                    
-                    for question in selected_questions:
-                        all_questions.append({
-                            'question': question,
-                            'microtopic_number': microtopic_number
-                        })
-            
-            return all_questions
+            microtopic_numbers = [relation.microtopic_number for relation in month_test.microtopics]
+
+        # Стратифицированная выборка по всем микротемам одним запросом
+        from .question_repository import QuestionRepository
+        questions = await QuestionRepository.get_random_questions_by_microtopics(
+            month_test.subject_id, microtopic_numbers, questions_per_microtopic
+        )
+
+        return [
+            {
+                'question': question,
+                'microtopic_number': question.microtopic_number
+            }
+            for question in questions
+        ]
 
     @staticmethod
     async def create_test_result(student_id: int, month_test_id: int, 
@@ -159,6 +143,13 @@ class MonthEntryTestResultRepository:
             await session.refresh(test_result)
             return test_result
 
+    @staticmethod
+    async def get_group_summary(group_id: int, month_test_id: int) -> List[TestSummaryRow]:
+        """Сводка входного теста месяца по группе: все студенты и их результат одним запросом"""
+        return await get_group_test_summary(
+            MonthEntryTestResult, group_id, MonthEntryTestResult.month_test_id == month_test_id
+        )
+
     @staticmethod
     async def get_statistics_by_group_and_month_test(group_id: int, month_test_id: int) -> Dict:
         """Получить статистику входного теста месяца по группе и тесту"""
@@ -4,9 +4,10 @@
 from typing import List, Optional, Type
 from sqlalchemy import select, delete, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 from ..models import Question, AnswerOption, Homework, Microtopic, Subject
 from ..database import get_db_session
+from ..single_flight import single_flight
 from .base_question_repository import BaseQuestionRepository
 
 
@@ -108,6 +109,7 @@ class QuestionRepository(BaseQuestionRepository):
             return result.scalar_one_or_none()
 
     @staticmethod
+    @single_flight
     async def get_by_homework(homework_id: int) -> List[Question]:
         """Получить все вопросы домашнего задания"""
         async with get_db_session() as session:
@@ -139,94 +141,102 @@ class QuestionRepository(BaseQuestionRepository):
             )
             return list(result.scalars().all())
 
-    async def get_next_order_number(self, homework_id: int) -> int:
-        """Получить следующий порядковый номер для вопроса в ДЗ"""
-        return await super().get_next_order_number(homework_id)
-
     @staticmethod
-    async def get_random_questions_for_course_entry_test(telegram_id: int, subject_id: int, max_questions: int = 30) -> List[Question]:
-        """
-        Получить случайные вопросы для входного теста курса
-        Берет вопросы из домашних заданий по предмету из курсов студента
-
-        Args:
-            telegram_id: Telegram ID студента
-            subject_id: ID предмета
-            max_questions: Максимальное количество вопросов (по умолчанию 30)
+    async def get_ids_by_subject(subject_id: int) -> List[int]:
+        """Получить ID всех вопросов предмета"""
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Question.id)
+                .where(Question.subject_id == subject_id)
+                .order_by(Question.id)
+            )
+            return list(result.scalars().all())
 
-        Returns:
-            List[Question]: Список случайных вопросов (минимум 1, максимум max_questions)
-        """
+    @staticmethod
+    async def get_ids_by_course_and_subject(course_id: int, subject_id: int) -> List[int]:
+        """Получить ID вопросов предмета из домашних заданий курса"""
         async with get_db_session() as session:
-            from ..models import Course, student_courses, Student, User, Homework, Lesson
+            from ..models import Lesson
 
-            # Получаем все вопросы из домашних заданий по предмету из курсов студента
             result = await session.execute(
-                select(Question)
-                .options(
-                    selectinload(Question.homework),
-                    selectinload(Question.subject),
-                    selectinload(Question.answer_options)
-                )
+                select(Question.id)
                 .join(Homework, Question.homework_id == Homework.id)
                 .join(Lesson, Homework.lesson_id == Lesson.id)
-                .join(Course, Lesson.course_id == Course.id)
-                .join(student_courses, Course.id == student_courses.c.course_id)
-                .join(Student, Student.id == student_courses.c.student_id)
-                .join(User, Student.user_id == User.id)
                 .where(
-                    User.telegram_id == telegram_id,
+                    Lesson.course_id == course_id,
                     Question.subject_id == subject_id
                 )
-                .order_by(Question.homework_id, Question.order_number)
+                .order_by(Question.id)
             )
+            return list(result.scalars().all())
 
-            all_questions = list(result.scalars().all())
+    @staticmethod
+    async def get_by_ids(question_ids: List[int]) -> List[Question]:
+        """
+        Получить вопросы по списку ID вместе с вариантами ответов одним запросом
 
-            if not all_questions:
-                return []
+        Порядок результата совпадает с порядком question_ids, отсутствующие ID пропускаются
+        """
+        if not question_ids:
+            return []
 
-            # Если вопросов меньше чем max_questions, возвращаем все
-            if len(all_questions) <= max_questions:
-                return all_questions
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Question)
+                .options(joinedload(Question.answer_options))
+                .where(Question.id.in_(question_ids))
+            )
+            questions_by_id = {question.id: question for question in result.unique().scalars().all()}
+            return [questions_by_id[question_id] for question_id in question_ids if question_id in questions_by_id]
 
-            # Иначе возвращаем случайную выборку
-            import random
-            return random.sample(all_questions, max_questions)
+    async def get_next_order_number(self, homework_id: int) -> int:
+        """Получить следующий порядковый номер для вопроса в ДЗ"""
+        return await super().get_next_order_number(homework_id)
 
     @staticmethod
-    async def get_random_questions_by_microtopic(microtopic_number: int, subject_id: int, limit: int = 3) -> List[Question]:
+    async def get_random_questions_by_microtopics(subject_id: int, microtopic_numbers: List[int],
+                                                  per_microtopic: int = 3) -> List[Question]:
         """
-        Получить случайные вопросы по микротеме для тестов месяца
+        Получить случайные вопросы сразу по нескольким микротемам (стратифицированная выборка)
+
+        Одним запросом: оконная функция нумерует вопросы каждой микротемы в случайном порядке,
+        берутся первые per_microtopic вопросов каждой микротемы вместе с вариантами ответов.
 
         Args:
-            microtopic_number: Номер микротемы
             subject_id: ID предмета
-            limit: Максимальное количество вопросов (по умолчанию 3)
+            microtopic_numbers: Номера микротем
+            per_microtopic: Количество вопросов на микротему (по умолчанию 3)
 
         Returns:
-            List[Question]: Список случайных вопросов по микротеме
+            List[Question]: Вопросы, сгруппированные по номеру микротемы
         """
+        if not microtopic_numbers:
+            return []
+
         async with get_db_session() as session:
-            # Получаем все вопросы по данной микротеме и предмету
-            result = await session.execute(
-                select(Question)
-                .options(
-                    selectinload(Question.homework),
-                    selectinload(Question.subject),
-                    selectinload(Question.answer_options)
+            ranked = (
+                select(
+                    Question.id.label('question_id'),
+                    func.row_number().over(
+                        partition_by=Question.microtopic_number,
+                        order_by=func.random()
+                    ).label('position')
                 )
                 .where(
                     Question.subject_id == subject_id,
-                    Question.microtopic_number == microtopic_number
+                    Question.microtopic_number.in_(microtopic_numbers)
                 )
-                .order_by(func.random())  # Случайный порядок
-                .limit(limit)
+                .subquery()
             )
 
-            return list(result.scalars().all())
-
-
+            result = await session.execute(
+                select(Question)
+                .options(joinedload(Question.answer_options))
+                .join(ranked, Question.id == ranked.c.question_id)
+                .where(ranked.c.position <= per_microtopic)
+                .order_by(Question.microtopic_number, ranked.c.position)
+            )
+            return list(result.unique().scalars().all())
 
     @staticmethod
     async def update(question_id: int, **kwargs) -> Optional[Question]:
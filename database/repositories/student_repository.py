@@ -1,31 +1,68 @@
 """
 Репозиторий для работы со студентами
 """
-from typing import List, Optional
-from sqlalchemy import select, delete
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from ..models import Student, User, Group
+from ..models import Student, User, Group, student_groups
 from ..database import get_db_session
+from .keyset import apply_keyset, keyset_rows
+
+
+@dataclass(frozen=True, slots=True)
+class StudentIdentity:
+    """Легкая проекция студента без ORM-гидрации и связей (для частых проверок личности)"""
+    id: int
+    user_id: int
+    name: str
+    tariff: Optional[str]
+    points: int
+    coins: int
+    level: Optional[str]
+
+    @property
+    def balance(self) -> dict:
+        """Баланс в формате StudentRepository.get_balance"""
+        return {"points": self.points, "coins": self.coins}
 
 
 class StudentRepository:
     """Репозиторий для работы со студентами"""
     
     @staticmethod
-    async def get_all() -> List[Student]:
-        """Получить всех студентов"""
+    async def get_all(after_id: int = None, before_id: int = None, limit: int = None) -> List[Student]:
+        """
+        Получить всех студентов (упорядочены по ID)
+
+        Args:
+            after_id: Курсор следующей страницы - ID последнего студента предыдущей
+            before_id: Курсор предыдущей страницы - ID первого студента текущей
+            limit: Размер страницы (по умолчанию - все студенты)
+        """
         async with get_db_session() as session:
-            result = await session.execute(
-                select(Student)
-                .options(
-                    selectinload(Student.user),
-                    selectinload(Student.groups).selectinload(Group.subject),
-                    selectinload(Student.courses)
-                )
-
+            query = select(Student).options(
+                selectinload(Student.user),
+                selectinload(Student.groups).selectinload(Group.subject),
+                selectinload(Student.courses)
             )
-            return list(result.scalars().all())
+            result = await session.execute(apply_keyset(query, Student.id, after_id, before_id, limit))
+            return keyset_rows(result.scalars().all(), before_id)
+
+    @staticmethod
+    async def get_count() -> int:
+        """Получить количество студентов"""
+        async with get_db_session() as session:
+            result = await session.execute(select(func.count(Student.id)))
+            return result.scalar() or 0
+
+    @staticmethod
+    async def get_count_in_groups() -> int:
+        """Получить количество студентов, состоящих хотя бы в одной группе"""
+        async with get_db_session() as session:
+            result = await session.execute(select(func.count(func.distinct(student_groups.c.student_id))))
+            return result.scalar() or 0
 
     @staticmethod
     async def get_by_id(student_id: int) -> Optional[Student]:
@@ -91,11 +128,50 @@ class StudentRepository:
             return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_by_group(group_id: int) -> List[Student]:
-        """Получить студентов по группе"""
+    async def get_identity_by_telegram_id(telegram_id: int) -> Optional[StudentIdentity]:
+        """Получить проекцию студента по Telegram ID (только колонки students и имя пользователя)"""
         async with get_db_session() as session:
-            from ..models import student_groups
             result = await session.execute(
+                select(
+                    Student.id, Student.user_id, User.name, Student.tariff,
+                    Student.points, Student.coins, Student.level
+                )
+                .join(User, Student.user_id == User.id)
+                .where(User.telegram_id == telegram_id)
+            )
+            row = result.one_or_none()
+            if row is None:
+                return None
+            return StudentIdentity(
+                id=row.id,
+                user_id=row.user_id,
+                name=row.name,
+                tariff=row.tariff,
+                points=row.points or 0,
+                coins=row.coins or 0,
+                level=row.level
+            )
+
+    @staticmethod
+    async def get_names(student_ids: List[int]) -> Dict[int, str]:
+        """Имена студентов по ID одним запросом: {student_id: имя}"""
+        if not student_ids:
+            return {}
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Student.id, User.name)
+                .join(User, Student.user_id == User.id)
+                .where(Student.id.in_(student_ids))
+            )
+            return {student_id: name for student_id, name in result}
+
+    @staticmethod
+    async def get_by_group(group_id: int, after_id: int = None, before_id: int = None,
+                           limit: int = None) -> List[Student]:
+        """Получить студентов по группе (упорядочены по ID, курсоры как в get_all)"""
+        async with get_db_session() as session:
+            from ..models import student_groups
+            query = (
                 select(Student)
                 .options(
                     selectinload(Student.user),
@@ -104,11 +180,13 @@ class StudentRepository:
                 .join(student_groups)
                 .where(student_groups.c.group_id == group_id)
             )
-            return list(result.scalars().all())
+            result = await session.execute(apply_keyset(query, Student.id, after_id, before_id, limit))
+            return keyset_rows(result.scalars().all(), before_id)
 
     @staticmethod
-    async def get_by_course_and_group(course_id: int = None, group_id: int = None) -> List[Student]:
-        """Получить студентов по курсу и/или группе"""
+    async def get_by_course_and_group(course_id: int = None, group_id: int = None, after_id: int = None,
+                                      before_id: int = None, limit: int = None) -> List[Student]:
+        """Получить студентов по курсу и/или группе (упорядочены по ID, курсоры как в get_all)"""
         async with get_db_session() as session:
             query = select(Student).options(
                 selectinload(Student.user),
@@ -124,10 +202,10 @@ class StudentRepository:
                 from ..models import Subject, course_subjects, student_groups
                 query = query.join(student_groups).join(Group, student_groups.c.group_id == Group.id).join(Group.subject).join(
                     course_subjects, Subject.id == course_subjects.c.subject_id
-                ).where(course_subjects.c.course_id == course_id)
+                ).where(course_subjects.c.course_id == course_id).distinct()
 
-            result = await session.execute(query)
-            return list(result.scalars().all())
+            result = await session.execute(apply_keyset(query, Student.id, after_id, before_id, limit))
+            return keyset_rows(result.scalars().all(), before_id)
 
     @staticmethod
     async def create(user_id: int, tariff: str = None) -> Student:
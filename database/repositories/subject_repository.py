@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from ..models import Subject, course_subjects
 from ..database import get_db_session
+from ..reference_cache import reference_cache, SUBJECT, COURSE, GROUP, LESSON, MICROTOPIC
 
 
 class SubjectRepository:
@@ -26,24 +27,30 @@ class SubjectRepository:
     @staticmethod
     async def get_by_id(subject_id: int) -> Optional[Subject]:
         """Получить предмет по ID"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Subject)
-                .options(selectinload(Subject.courses))
-                .where(Subject.id == subject_id)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Subject)
+                    .options(selectinload(Subject.courses))
+                    .where(Subject.id == subject_id)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(SUBJECT, ("id", subject_id), load)
 
     @staticmethod
     async def get_by_name(name: str) -> Optional[Subject]:
         """Получить предмет по названию"""
-        async with get_db_session() as session:
-            result = await session.execute(
-                select(Subject)
-                .options(selectinload(Subject.courses))
-                .where(Subject.name == name)
-            )
-            return result.scalar_one_or_none()
+        async def load():
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Subject)
+                    .options(selectinload(Subject.courses))
+                    .where(Subject.name == name)
+                )
+                return result.scalar_one_or_none()
+
+        return await reference_cache.get(SUBJECT, ("name", name), load)
     
     @staticmethod
     async def get_by_course(course_id: int) -> List[Subject]:
@@ -70,6 +77,7 @@ class SubjectRepository:
             subject = Subject(name=name)
             session.add(subject)
             await session.commit()
+            await reference_cache.invalidate(SUBJECT)
             await session.refresh(subject)
             return subject
 
@@ -99,6 +107,7 @@ class SubjectRepository:
                 )
             )
             await session.commit()
+            await reference_cache.invalidate(SUBJECT, COURSE)
             return True
     
     @staticmethod
@@ -149,6 +158,7 @@ class SubjectRepository:
             # Наконец удаляем сам предмет
             result = await session.execute(delete(Subject).where(Subject.id == subject_id))
             await session.commit()
+            await reference_cache.invalidate(SUBJECT, COURSE, GROUP, LESSON, MICROTOPIC)
             return result.rowcount > 0
 
     @staticmethod
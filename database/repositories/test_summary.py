@@ -0,0 +1,53 @@
+"""
+Сводка прохождения теста группой одним запросом
+
+Экраны статистики тестов показывают только, кто прошел тест и с каким
+результатом. Сводка берет студентов группы и LEFT JOIN их результатов, без
+загрузки ORM-объектов, пользователей и ответов на вопросы - ответы читаются
+отдельно, когда открывается детальная статистика одного студента.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import select, and_
+from ..database import get_db_session
+from ..models import Student, User, student_groups
+
+
+@dataclass(frozen=True, slots=True)
+class TestSummaryRow:
+    """Строка сводки: студент группы и его результат (None - тест не пройден)"""
+    student_id: int
+    name: str
+    correct: Optional[int]
+    total: Optional[int]
+    percent: Optional[int]
+
+    @property
+    def completed(self) -> bool:
+        return self.total is not None
+
+
+async def get_group_test_summary(model, group_id: int, condition) -> List[TestSummaryRow]:
+    """
+    Студенты группы с результатом теста (по алфавиту)
+
+    Args:
+        model: Модель результата теста (student_id, correct_answers, total_questions, score_percentage)
+        group_id: ID группы
+        condition: Условие отбора результатов (предмет или тест месяца)
+    """
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(
+                Student.id, User.name,
+                model.correct_answers, model.total_questions, model.score_percentage
+            )
+            .select_from(student_groups)
+            .join(Student, student_groups.c.student_id == Student.id)
+            .join(User, Student.user_id == User.id)
+            .outerjoin(model, and_(model.student_id == Student.id, condition))
+            .where(student_groups.c.group_id == group_id)
+            .order_by(User.name, Student.id)
+        )
+        return [TestSummaryRow(*row) for row in result]
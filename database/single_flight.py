@@ -0,0 +1,101 @@
+"""
+Single-flight объединение одинаковых конкурентных чтений из репозиториев
+
+Когда десятки студентов одновременно открывают одно домашнее задание, каждый
+обработчик вызывает одни и те же методы репозиториев с одинаковыми аргументами.
+Метод, помеченный декоратором @single_flight, выполняет только один запрос на
+набор аргументов: остальные вызовы, пришедшие пока запрос в полете, ждут его
+результат. После завершения запроса ничего не кэшируется - следующий вызов
+снова идет в БД.
+
+Результат (ORM-объекты без сессии) разделяется между всеми ожидающими, поэтому
+декоратор подходит только для методов чтения, результат которых не изменяют.
+"""
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightGroup:
+    """Группа запросов в полете с метриками объединения по методам"""
+
+    def __init__(self):
+        # Ключ вызова -> задача, выполняющая запрос
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        # Имя метода -> {"calls": всего вызовов, "coalesced": присоединились к чужому запросу}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, name: str, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить func или присоединиться к уже выполняющемуся запросу с тем же ключом
+
+        Args:
+            name: Имя метода (для метрик)
+            key: Ключ вызова (имя метода + аргументы)
+            func: Корутина запроса
+        """
+        stats = self._stats.setdefault(name, {"calls": 0, "coalesced": 0})
+        stats["calls"] += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            stats["coalesced"] += 1
+        else:
+            # Запрос выполняется в отдельной задаче, чтобы отмена первого
+            # вызывающего не отменяла запрос для остальных
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._on_done, key))
+
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Помечаем исключение как полученное, если все ожидающие были отменены
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики объединения: вызовы, объединенные вызовы и их доля по методам"""
+        methods = {
+            name: {
+                "calls": stats["calls"],
+                "coalesced": stats["coalesced"],
+                "coalescing_ratio": round(stats["coalesced"] / stats["calls"], 3) if stats["calls"] else 0.0
+            }
+            for name, stats in self._stats.items()
+        }
+        return {"in_flight": len(self._in_flight), "methods": methods}
+
+    def reset_stats(self):
+        """Сбросить метрики"""
+        self._stats.clear()
+
+
+# Глобальная группа запросов в полете
+single_flight_group = SingleFlightGroup()
+
+
+def single_flight(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Декоратор метода репозитория: объединять одинаковые конкурентные вызовы
+
+    Ставится под @staticmethod. Аргументы метода должны быть хешируемыми,
+    иначе вызов выполняется напрямую без объединения.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return await func(*args, **kwargs)
+        return await single_flight_group.do(name, key, lambda: func(*args, **kwargs))
+
+    return wrapper
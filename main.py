@@ -11,7 +11,8 @@ from aiogram.filters import CommandStart, Command
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 
-from utils.config import TOKEN, WEBHOOK_MODE, WEBHOOK_PATH, WEB_SERVER_HOST, WEB_SERVER_PORT, REDIS_ENABLED
+from utils.config import (TOKEN, WEBHOOK_MODE, WEBHOOK_PATH, WEB_SERVER_HOST, WEB_SERVER_PORT,
+                          REDIS_ENABLED, WORKERS)
 from utils.logging_config import setup_logging
 from utils.lifecycle import on_startup, on_shutdown, health_check
 from utils.redis_manager import RedisManager
@@ -30,6 +31,13 @@ from admin.handlers import router as admin_router
 from admin.handlers.main import show_admin_main_menu
 from middlewares.role_middleware import RoleMiddleware
 from middlewares.performance_middleware import PerformanceMiddleware
+from middlewares.rate_limit_middleware import rate_limit_middleware
+from database.single_flight import single_flight_group
+from common.render_cache import render_cache
+from common.tests_statistics.navigation_context import navigation_context
+from common.quiz_timers import quiz_timers
+from common.quiz_session import quiz_sessions
+from common.media_registry import media_registry
 
 async def start_command(message, user_role: str):
     """Обработчик команды /start, перенаправляющий на соответствующие функции"""
@@ -58,10 +66,37 @@ async def setup_commands(dp: Dispatcher):
     logging.info("✅ Зарегистрирована команда /start")
 
 
-async def main() -> None:
-    """Главная функция запуска бота"""
+def create_bot() -> Bot:
+    """Экземпляр бота с настройками по умолчанию и лимитом исходящих запросов"""
     bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-
+    bot.session.middleware(rate_limit_middleware)
+    return bot
+
+
+def collect_stats(performance_middleware: PerformanceMiddleware) -> dict:
+    """Статистика производительности и кэшей процесса (для /stats)"""
+    stats = performance_middleware.get_current_stats()
+    stats["single_flight"] = single_flight_group.get_stats()
+    stats["render_cache"] = render_cache.get_stats()
+    stats["navigation_context"] = navigation_context.get_stats()
+    stats["quiz_timers"] = quiz_timers.get_stats()
+    stats["quiz_sessions"] = quiz_sessions.get_stats()
+    stats["media_registry"] = media_registry.get_stats()
+    stats["outbound"] = rate_limit_middleware.get_stats()
+    return stats
+
+
+async def create_dispatcher(bot: Bot, configure: bool = True):
+    """
+    Диспетчер со всеми роутерами, middleware и хуками запуска
+
+    Args:
+        bot: Экземпляр бота
+        configure: Настраивать команды и webhook при запуске (False для воркеров)
+
+    Returns:
+        tuple: (Dispatcher, PerformanceMiddleware)
+    """
     # Инициализируем хранилище состояний
     storage = None
     if REDIS_ENABLED:
@@ -77,10 +112,10 @@ async def main() -> None:
 
     # Регистрируем startup и shutdown хуки
     async def startup_wrapper():
-        await on_startup(bot)
+        await on_startup(bot, dp.storage, configure=configure)
 
     async def shutdown_wrapper():
-        await on_shutdown(bot)
+        await on_shutdown(bot, configure=configure)
 
     dp.startup.register(startup_wrapper)
     dp.shutdown.register(shutdown_wrapper)
@@ -106,6 +141,20 @@ async def main() -> None:
     dp.include_router(manager_router)
     register_handlers()
 
+    return dp, performance_middleware
+
+
+async def main() -> None:
+    """Главная функция запуска бота"""
+    if WEBHOOK_MODE and WORKERS > 1:
+        # Фронт принимает webhook и распределяет обновления по процессам-воркерам
+        from utils.worker_pool import run_front
+        await run_front(create_bot(), WORKERS)
+        return
+
+    bot = create_bot()
+    dp, performance_middleware = await create_dispatcher(bot)
+
     if WEBHOOK_MODE:
         # Webhook режим с aiohttp сервером
         app = web.Application()
@@ -115,8 +164,7 @@ async def main() -> None:
         async def performance_stats(request):
             """Endpoint для получения статистики производительности"""
             try:
-                stats = performance_middleware.get_current_stats()
-                return web.json_response(stats)
+                return web.json_response(collect_stats(performance_middleware))
             except Exception as e:
                 return web.json_response({"error": str(e)}, status=500)
 
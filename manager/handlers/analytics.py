@@ -2,20 +2,24 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.filters import StateFilter
+from aiogram.exceptions import TelegramBadRequest
 from common.analytics.handlers import (
     select_group_for_student_analytics,
     select_student_for_analytics, select_group_for_group_analytics,
     show_subject_microtopics_detailed, show_subject_microtopics_summary
 )
 from ..keyboards.analytics import (
-    get_manager_analytics_menu_kb, get_curators_kb, get_subjects_kb
+    get_manager_analytics_menu_kb, get_curators_kb, get_subjects_kb, add_refresh_button
 )
 from common.analytics.keyboards import get_back_to_analytics_kb
 from common.statistics import (
-    get_subject_stats, format_subject_stats, get_general_stats, format_general_stats, show_student_analytics,
+    format_subject_stats, format_general_stats, show_student_analytics,
     show_group_analytics, get_general_microtopics_detailed, get_general_microtopics_summary
 )
 from common.utils import check_if_id_in_callback_data
+from common.analytics_snapshots import analytics_snapshots, format_as_of
+from common.pagination import parse_page_callback
 import logging
 
 # Настройка логгера
@@ -40,6 +44,14 @@ class ManagerAnalyticsStates(StatesGroup):
 
 router = Router()
 
+async def edit_analytics_message(callback: CallbackQuery, text: str, reply_markup):
+    """Изменить сообщение аналитики (повторное обновление снимка может не менять текст)"""
+    try:
+        await callback.message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            raise
+
 @router.callback_query(F.data == "manager_analytics")
 async def show_manager_analytics_menu(callback: CallbackQuery, state: FSMContext):
     """Показать меню аналитики менеджера"""
@@ -50,6 +62,16 @@ async def show_manager_analytics_menu(callback: CallbackQuery, state: FSMContext
     )
     await state.set_state(ManagerAnalyticsStates.main)
 
+@router.callback_query(
+    StateFilter(ManagerAnalyticsStates.select_curator_for_student, ManagerAnalyticsStates.select_curator_for_group),
+    F.data.startswith("page_manager_curator_")
+)
+async def manager_paginate_curators(callback: CallbackQuery, state: FSMContext):
+    """Перелистнуть страницу списка кураторов"""
+    direction, cursor = parse_page_callback(callback.data, "page_manager_curator")
+    await callback.message.edit_reply_markup(reply_markup=await get_curators_kb(direction, cursor))
+    await callback.answer()
+
 # Обработчики для статистики по ученику
 @router.callback_query(ManagerAnalyticsStates.main, F.data == "manager_student_analytics")
 async def manager_select_curator_for_student(callback: CallbackQuery, state: FSMContext):
@@ -142,16 +164,8 @@ async def manager_select_subject(callback: CallbackQuery, state: FSMContext):
     )
     await state.set_state(ManagerAnalyticsStates.select_subject)
 
-@router.callback_query(ManagerAnalyticsStates.select_subject, F.data.startswith("manager_subject_"))
-async def manager_show_subject_analytics(callback: CallbackQuery, state: FSMContext):
-    """Показать статистику по предмету"""
-    logger.info("Вызван обработчик manager_show_subject_analytics")
-    subject_id = await check_if_id_in_callback_data("manager_subject_", callback, state, "subject")
-    logger.debug(f"Выбран предмет с ID: {subject_id}")
-
-    # Получаем данные о предмете
-    subject_data = await get_subject_stats(subject_id)
-
+async def render_subject_analytics(callback: CallbackQuery, subject_id: int, subject_data: dict, generated_at):
+    """Показать снимок статистики по предмету"""
     # Формируем базовую информацию о предмете (как в общей функции)
     result_text = f"📚 Предмет: {subject_data['name']}\n\n"
     result_text += f"👨‍👩‍👧‍👦 Количество групп: {len(subject_data['groups'])}\n"
@@ -168,25 +182,42 @@ async def manager_show_subject_analytics(callback: CallbackQuery, state: FSMCont
     else:
         result_text += "❌ Группы не найдены\n"
 
+    result_text += f"\n{format_as_of(generated_at)}\n"
     result_text += "\nВыберите, что хотите посмотреть:"
 
     # Импортируем клавиатуру
     from common.analytics.keyboards import get_subject_microtopics_kb
 
-    await callback.message.edit_text(
+    await edit_analytics_message(
+        callback,
         result_text,
-        reply_markup=get_subject_microtopics_kb(int(subject_id))
+        add_refresh_button(get_subject_microtopics_kb(subject_id), f"refresh_subject_analytics_{subject_id}")
     )
+
+@router.callback_query(ManagerAnalyticsStates.select_subject, F.data.startswith("manager_subject_"))
+async def manager_show_subject_analytics(callback: CallbackQuery, state: FSMContext):
+    """Показать статистику по предмету"""
+    logger.info("Вызван обработчик manager_show_subject_analytics")
+    subject_id = await check_if_id_in_callback_data("manager_subject_", callback, state, "subject")
+    logger.debug(f"Выбран предмет с ID: {subject_id}")
+
+    # Получаем снимок статистики предмета
+    subject_data, generated_at = await analytics_snapshots.get_subject(int(subject_id))
+    await render_subject_analytics(callback, int(subject_id), subject_data, generated_at)
     await state.set_state(ManagerAnalyticsStates.subject_stats)
 
-# Обработчик для общей статистики
-@router.callback_query(ManagerAnalyticsStates.main, F.data == "general_analytics")
-async def manager_show_general_analytics(callback: CallbackQuery, state: FSMContext):
-    """Показать общую статистику"""
-    logger.info("Вызван обработчик manager_show_general_analytics")
-    # Получаем общие данные из общего компонента (теперь асинхронно)
-    general_data = await get_general_stats()
+@router.callback_query(ManagerAnalyticsStates.subject_stats, F.data.startswith("refresh_subject_analytics_"))
+async def manager_refresh_subject_analytics(callback: CallbackQuery, state: FSMContext):
+    """Пересчитать снимок статистики по предмету"""
+    logger.info("Вызван обработчик manager_refresh_subject_analytics")
+    subject_id = int(callback.data.replace("refresh_subject_analytics_", ""))
+    await callback.answer("🔄 Обновляю статистику...")
 
+    subject_data, generated_at = await analytics_snapshots.refresh_subject(subject_id)
+    await render_subject_analytics(callback, subject_id, subject_data, generated_at)
+
+async def render_general_analytics(callback: CallbackQuery, general_data: dict, generated_at):
+    """Показать снимок общей статистики"""
     # Формируем базовую информацию
     result_text = "📊 Общая статистика\n\n"
 
@@ -208,17 +239,37 @@ async def manager_show_general_analytics(callback: CallbackQuery, state: FSMCont
     else:
         result_text += "📚 Данные по предметам отсутствуют\n"
 
+    result_text += f"\n{format_as_of(generated_at)}\n"
     result_text += "\nВыберите, что хотите посмотреть:"
 
     # Импортируем клавиатуру
     from common.analytics.keyboards import get_general_microtopics_kb
 
-    await callback.message.edit_text(
+    await edit_analytics_message(
+        callback,
         result_text,
-        reply_markup=get_general_microtopics_kb()
+        add_refresh_button(get_general_microtopics_kb(), "refresh_general_analytics")
     )
+
+# Обработчик для общей статистики
+@router.callback_query(ManagerAnalyticsStates.main, F.data == "general_analytics")
+async def manager_show_general_analytics(callback: CallbackQuery, state: FSMContext):
+    """Показать общую статистику"""
+    logger.info("Вызван обработчик manager_show_general_analytics")
+    # Снимок пересчитывается в фоне, клик его только читает
+    general_data, generated_at = await analytics_snapshots.get_general()
+    await render_general_analytics(callback, general_data, generated_at)
     await state.set_state(ManagerAnalyticsStates.general_stats)
 
+@router.callback_query(ManagerAnalyticsStates.general_stats, F.data == "refresh_general_analytics")
+async def manager_refresh_general_analytics(callback: CallbackQuery, state: FSMContext):
+    """Пересчитать снимок общей статистики"""
+    logger.info("Вызван обработчик manager_refresh_general_analytics")
+    await callback.answer("🔄 Обновляю статистику...")
+
+    general_data, generated_at = await analytics_snapshots.refresh_general()
+    await render_general_analytics(callback, general_data, generated_at)
+
 # Обработчики для детальной статистики по микротемам предмета
 @router.callback_query(F.data.startswith("subject_microtopics_detailed_"))
 async def manager_show_subject_microtopics_detailed(callback: CallbackQuery, state: FSMContext):
@@ -6,6 +6,7 @@ import logging
 
 from common.keyboards import get_main_menu_back_button, get_home_kb
 from common.manager_tests.register_handlers import register_test_handlers
+from common.question_bank import question_bank
 from .main import show_manager_main_menu
 
 from aiogram.fsm.state import State, StatesGroup
@@ -267,6 +268,8 @@ async def save_bonus_test(callback: CallbackQuery, state: FSMContext):
             if answer_options:
                 await BonusAnswerOptionRepository.create_multiple(question.id, answer_options)
 
+        await question_bank.invalidate()
+
         await callback.message.edit_text(
             f"✅ Бонусный тест '{test_name}' успешно создан!\n"
             f"💰 Цена: {price} монет\n"
@@ -400,6 +403,8 @@ async def delete_bonus_test(callback: CallbackQuery, state: FSMContext):
 
         # Удаляем бонусный тест (каскадно удалятся вопросы и варианты ответов)
         success = await BonusTestRepository.delete(bonus_test_id)
+        if success:
+            await question_bank.invalidate()
 
         if success:
             await callback.message.edit_text(
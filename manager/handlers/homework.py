@@ -14,6 +14,8 @@ from ..keyboards.homework import (
     get_confirm_homework_kb, get_homeworks_list_kb, get_photo_skip_kb, get_homework_management_kb
 )
 from .main import show_manager_main_menu
+from common.question_sampler import question_sampler
+from common.question_bank import question_bank
 from database import (
     CourseRepository, SubjectRepository, LessonRepository, HomeworkRepository,
     QuestionRepository, AnswerOptionRepository, MicrotopicRepository
@@ -272,6 +274,10 @@ async def save_homework(callback: CallbackQuery, state: FSMContext):
             if options_data:
                 await AnswerOptionRepository.create_multiple(question.id, options_data)
 
+        # Новые вопросы должны попасть в пулы случайной выборки и банк вопросов
+        await question_sampler.invalidate_subject(subject_id)
+        await question_bank.invalidate()
+
         await callback.message.edit_text(
             f"✅ Домашнее задание '{test_name}' успешно создано и сохранено!\n"
             f"📊 Создано вопросов: {len(questions)}",
@@ -477,6 +483,9 @@ async def delete_homework(callback: CallbackQuery, state: FSMContext):
 
         # Удаляем ДЗ (каскадно удалятся вопросы и варианты ответов)
         success = await HomeworkRepository.delete(homework_id)
+        if success and homework:
+            await question_sampler.invalidate_subject(homework.subject_id)
+            await question_bank.invalidate()
 
         if success:
             await callback.message.edit_text(
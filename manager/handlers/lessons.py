@@ -15,6 +15,8 @@ from manager.keyboards.lessons import (
     LessonActions
 )
 from common.keyboards import get_home_kb
+from common.question_sampler import question_sampler
+from common.question_bank import question_bank
 from database.repositories.lesson_repository import LessonRepository
 from database.repositories.subject_repository import SubjectRepository
 from database.repositories.course_repository import CourseRepository
@@ -236,6 +238,10 @@ async def process_delete_lesson(callback: CallbackQuery, callback_data: LessonCa
     success = await LessonRepository.delete(lesson_id)
     
     if success:
+        # Вместе с уроком удалены его ДЗ и вопросы
+        await question_sampler.invalidate_subject(subject_id)
+        await question_bank.invalidate()
+
         # Получаем обновленный список уроков
         lessons = await LessonRepository.get_by_subject_and_course(subject_id, data['course_id'])
         
@@ -1,5 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from common.keyboards import get_main_menu_back_button
+from common.pagination import fetch_page, get_pagination_buttons
 import asyncio
 import sys
 import os
@@ -19,14 +20,21 @@ def get_manager_analytics_menu_kb() -> InlineKeyboardMarkup:
         *get_main_menu_back_button()
     ])
 
-async def get_curators_kb() -> InlineKeyboardMarkup:
-    """Клавиатура выбора куратора"""
-    # Получаем реальных кураторов из базы данных
+def add_refresh_button(markup: InlineKeyboardMarkup, callback_data: str) -> InlineKeyboardMarkup:
+    """Добавить кнопку ручного обновления снимка аналитики в начало клавиатуры"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔄 Обновить данные", callback_data=callback_data)],
+        *markup.inline_keyboard
+    ])
+
+async def get_curators_kb(direction: str = None, cursor: int = None) -> InlineKeyboardMarkup:
+    """Постраничная клавиатура выбора куратора (кнопки перехода - "page_manager_curator_{next|prev}_{cursor}")"""
+    # Получаем одну страницу кураторов из базы данных
     try:
-        all_curators = await CuratorRepository.get_all()
+        all_curators, prev_cursor, next_cursor = await fetch_page(CuratorRepository.get_all, direction, cursor)
     except Exception as e:
         print(f"Ошибка при получении кураторов: {e}")
-        all_curators = []
+        all_curators, prev_cursor, next_cursor = [], None, None
 
     # Группируем кураторов по user_id, чтобы избежать дублирования
     unique_curators = {}
@@ -58,6 +66,7 @@ async def get_curators_kb() -> InlineKeyboardMarkup:
             )
         ])
 
+    buttons.extend(get_pagination_buttons("page_manager_curator", prev_cursor, next_cursor))
     buttons.extend(get_main_menu_back_button())
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,240 @@
+"""
+Middleware сессии бота: единый планировщик исходящих запросов к Telegram
+
+Все вызовы Bot API проходят через токен-бакеты: глобальный (~30 сообщений в
+секунду на бота) и по чату (~1 сообщение в секунду с небольшим запасом на
+пачку "фото + опрос"). Если глобальных токенов не хватает, запросы ждут в
+очереди по приоритету: вопросы теста, затем интерактивные ответы, затем
+массовые рассылки и удаление сообщений. Приоритет задается контекстом
+вызова (with_outbound_priority, outbound_priority_scope), по умолчанию -
+интерактивный. На 429
+чат приостанавливается на retry_after, и запрос повторяется.
+
+Глубина очереди и время ожидания по приоритетам доступны в get_stats().
+"""
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from utils.config import WEBHOOK_MODE, WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты (меньше - важнее)
+QUIZ = 0
+INTERACTIVE = 1
+BULK = 2
+PRIORITY_NAMES = {QUIZ: "quiz", INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Лимиты Telegram
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+CHAT_BURST = 3
+# Сколько раз повторять запрос после 429
+MAX_RETRIES = 3
+# Бакеты неактивных чатов удаляются при таком количестве
+CHAT_BUCKETS_PRUNE = 10000
+
+# Методы, создающие сообщения в чате - для них действует лимит чата
+CHAT_LIMITED_PREFIXES = ("Send", "Copy", "Forward")
+
+outbound_priority: ContextVar[int] = ContextVar("outbound_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def outbound_priority_scope(priority: int):
+    """Исходящие запросы внутри блока получают приоритет priority"""
+    token = outbound_priority.set(priority)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+def with_outbound_priority(priority: int):
+    """Декоратор: исходящие запросы внутри функции получают приоритет priority"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with outbound_priority_scope(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucket:
+    """Токен-бакет: rate токенов в секунду, не больше capacity"""
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self) -> float:
+        """Через сколько секунд будет доступен токен (0 - доступен сейчас)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _PriorityStats:
+    __slots__ = ("requests", "waited", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, wait: float):
+        self.requests += 1
+        if wait > 0.001:
+            self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "waited": self.waited,
+            "avg_wait": round(self.total_wait / self.waited, 3) if self.waited else 0,
+            "max_wait": round(self.max_wait, 3),
+        }
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Планировщик исходящих запросов с глобальным и початовым лимитами"""
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE):
+        # Запас глобального бакета - секунда лимита
+        self._global = TokenBucket(global_rate, max(1.0, global_rate))
+        self._chat_rate = chat_rate
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._stats = {priority: _PriorityStats() for priority in PRIORITY_NAMES}
+        self._max_queue_depth = 0
+        self._retry_after_count = 0
+
+    # === ГЛОБАЛЬНАЯ ОЧЕРЕДЬ ===
+
+    async def _pump(self):
+        # Выдает глобальные токены ожидающим в порядке приоритета
+        while self._waiters:
+            delay = self._global.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._global.take()
+            future.set_result(None)
+
+    async def _acquire_global(self, priority: int):
+        if not self._waiters and self._global.delay() == 0:
+            self._global.take()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._max_queue_depth = max(self._max_queue_depth, len(self._waiters))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    # === ЛИМИТ ЧАТА ===
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= CHAT_BUCKETS_PRUNE:
+                # Полные бакеты неактивных чатов не влияют на лимит - удаляем
+                for stale_id in [cid for cid, b in self._chats.items() if b.delay() == 0 and b.tokens >= b.capacity]:
+                    del self._chats[stale_id]
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_rate, CHAT_BURST)
+        return bucket
+
+    async def _acquire_chat(self, chat_id):
+        bucket = self._chat_bucket(chat_id)
+        while True:
+            delay = bucket.delay()
+            if delay == 0:
+                bucket.take()
+                return
+            await asyncio.sleep(delay)
+
+    # === MIDDLEWARE ===
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        priority = outbound_priority.get()
+        chat_id = getattr(method, "chat_id", None)
+        chat_limited = chat_id is not None and type(method).__name__.startswith(CHAT_LIMITED_PREFIXES)
+
+        for attempt in range(MAX_RETRIES + 1):
+            started = time.monotonic()
+            # Сначала лимит чата, чтобы ожидание чата не занимало глобальный токен
+            if chat_limited:
+                await self._acquire_chat(chat_id)
+            if chat_id is not None:
+                await self._acquire_global(priority)
+            if attempt == 0:
+                self._stats[priority].add(time.monotonic() - started)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._retry_after_count += 1
+                if attempt == MAX_RETRIES:
+                    raise
+                logger.warning(f"⚠️ Telegram 429 для {type(method).__name__} (чат {chat_id}): ждем {e.retry_after}с")
+                pause_until = time.monotonic() + e.retry_after
+                if chat_id is not None:
+                    self._chat_bucket(chat_id).blocked_until = pause_until
+                else:
+                    self._global.blocked_until = pause_until
+                await asyncio.sleep(e.retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Глубина очереди, ожидание по приоритетам и количество 429"""
+        return {
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self._max_queue_depth,
+            "retry_after": self._retry_after_count,
+            "chats": len(self._chats),
+            "priorities": {PRIORITY_NAMES[p]: stats.as_dict() for p, stats in self._stats.items()},
+        }
+
+
+# Глобальный планировщик исходящих запросов (устанавливается в сессию бота в create_bot).
+# Воркеры делят глобальный лимит поровну; лимит чата не делится - чат всегда на одном воркере
+rate_limit_middleware = RateLimitMiddleware(
+    global_rate=GLOBAL_RATE / WORKERS if WEBHOOK_MODE and WORKERS > 1 else GLOBAL_RATE
+)
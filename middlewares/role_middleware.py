@@ -5,7 +5,7 @@ from sqlalchemy.sql.expression import text
 import asyncio
 import time
 import logging
-from utils.redis_manager import RedisManager
+from utils.redis_manager import redis_manager
 from utils.config import REDIS_ENABLED
 from utils.role_keyboards import role_keyboards_manager
 
@@ -17,13 +17,20 @@ _cache_lock = asyncio.Lock()  # Блокировка для безопасног
 _last_cache_update = 0  # Время последнего обновления кэша
 CACHE_TTL = 300
 REDIS_CACHE_KEY = "user_roles_cache"
+# Счетчик версии кэша ролей: force_update_role_cache увеличивает его, чтобы
+# остальные воркеры перечитали роли, не дожидаясь CACHE_TTL
+REDIS_VERSION_KEY = "user_roles_cache:version"
+# Как часто сверять версию с Redis (в секундах)
+VERSION_SYNC_INTERVAL = 5
+_known_version = None
+_last_version_sync = 0.0
 
 class RoleMiddleware(BaseMiddleware):
     """Middleware для определения роли пользователя с Redis кэшированием"""
 
     def __init__(self):
-        # Используем глобальный кэш
-        self.redis_manager = RedisManager() if REDIS_ENABLED else None
+        # Используем глобальный кэш и общий Redis клиент (подключается в on_startup)
+        self.redis_manager = redis_manager if REDIS_ENABLED else None
 
     async def _check_database_availability(self):
         """Проверить доступность базы данных"""
@@ -161,10 +168,14 @@ class RoleMiddleware(BaseMiddleware):
         event: Message | CallbackQuery,
         data: Dict[str, Any]
     ) -> Any:
-        global _global_role_cache, _global_cache_updated, _database_available
+        global _global_role_cache, _global_cache_updated, _database_available, _last_cache_update
 
         user_id = event.from_user.id
 
+        # Роли изменены в другом воркере - перечитываем кэш
+        if await _role_cache_version_changed():
+            _last_cache_update = 0
+
         # Проверяем TTL и необходимость обновления кэша
         current_time = time.time()
         cache_expired = (current_time - _last_cache_update) >= CACHE_TTL
@@ -205,6 +216,44 @@ class RoleMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 
+async def _role_cache_version_changed() -> bool:
+    """Сверить версию кэша ролей с Redis (не чаще VERSION_SYNC_INTERVAL)"""
+    global _known_version, _last_version_sync
+
+    now = time.monotonic()
+    if now - _last_version_sync < VERSION_SYNC_INTERVAL:
+        return False
+    _last_version_sync = now
+
+    if not REDIS_ENABLED or not redis_manager.connected or not redis_manager.redis:
+        return False
+
+    try:
+        version = await redis_manager.redis.get(REDIS_VERSION_KEY)
+    except Exception as e:
+        logging.error(f"❌ Ошибка получения версии кэша ролей: {e}")
+        return False
+
+    version = int(version) if version else 0
+    changed = _known_version is not None and version != _known_version
+    _known_version = version
+    return changed
+
+
+async def _bump_role_cache_version():
+    """Увеличить версию кэша ролей, чтобы остальные воркеры перечитали роли"""
+    global _known_version
+
+    if not REDIS_ENABLED or not redis_manager.connected or not redis_manager.redis:
+        return
+
+    try:
+        # Свой воркер уже обновлен - запоминаем новую версию
+        _known_version = await redis_manager.redis.incr(REDIS_VERSION_KEY)
+    except Exception as e:
+        logging.error(f"❌ Ошибка обновления версии кэша ролей: {e}")
+
+
 async def force_update_role_cache():
     """Принудительно обновить кэш ролей (для использования при добавлении новых пользователей)"""
     global _global_role_cache, _global_cache_updated, _last_cache_update
@@ -243,8 +292,9 @@ async def force_update_role_cache():
             _global_cache_updated = True
             _last_cache_update = time.time()
 
-            # Сохраняем в Redis
+            # Сохраняем в Redis и сообщаем остальным воркерам
             await temp_middleware._save_to_redis(new_cache)
+            await _bump_role_cache_version()
 
             logging.info(f"🔄 Кэш ролей принудительно обновлен ({len(users_data)} пользователей)")
 
@@ -269,9 +319,9 @@ async def clear_role_cache():
     # Очищаем Redis
     if REDIS_ENABLED:
         try:
-            redis_manager = RedisManager()
             if redis_manager.connected:
                 await redis_manager.delete(REDIS_CACHE_KEY)
+                await _bump_role_cache_version()
                 logging.info("🗑️ Кэш ролей очищен из Redis")
         except Exception as e:
             logging.error(f"❌ Ошибка очистки Redis кэша: {e}")
@@ -0,0 +1,99 @@
+"""
+Бенчмарк поиска студента по Telegram ID: ORM-сущность против проекции
+
+Сравнивает StudentRepository.get_by_telegram_id (Student + user, groups→subject, courses)
+с StudentRepository.get_identity_by_telegram_id (одна строка, StudentIdentity)
+в сценариях самых частых обработчиков магазина и прогресса.
+
+Запуск (нужна настроенная БД из .env):
+    python scripts/benchmark_student_lookup.py <telegram_id> [iterations]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_database, close_database, StudentRepository
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def orm_shop_menu(telegram_id: int):
+    """show_shop_menu до перехода на проекции: сущность + отдельный запрос баланса"""
+    student = await StudentRepository.get_by_telegram_id(telegram_id)
+    return await StudentRepository.get_balance(student.id)
+
+
+async def projection_shop_menu(telegram_id: int):
+    """show_shop_menu на проекции: баланс приходит вместе с ID"""
+    student = await StudentRepository.get_identity_by_telegram_id(telegram_id)
+    return student.balance
+
+
+async def orm_lookup(telegram_id: int):
+    """Обработчики, которым нужен только student.id (покупка, прогресс, ДЗ)"""
+    student = await StudentRepository.get_by_telegram_id(telegram_id)
+    return student.id
+
+
+async def projection_lookup(telegram_id: int):
+    student = await StudentRepository.get_identity_by_telegram_id(telegram_id)
+    return student.id
+
+
+async def measure(name: str, func, telegram_id: int, iterations: int) -> dict:
+    """Замерить время выполнения сценария в миллисекундах"""
+    # Прогрев пула соединений
+    await func(telegram_id)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await func(telegram_id)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "name": name,
+        "mean": statistics.mean(timings),
+        "p50": timings[len(timings) // 2],
+        "p95": timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+async def main(telegram_id: int, iterations: int):
+    await init_database()
+    try:
+        if not await StudentRepository.get_identity_by_telegram_id(telegram_id):
+            logger.error(f"❌ Студент с telegram_id={telegram_id} не найден")
+            return
+
+        scenarios = [
+            ("shop_menu: ORM", orm_shop_menu),
+            ("shop_menu: проекция", projection_shop_menu),
+            ("lookup: ORM", orm_lookup),
+            ("lookup: проекция", projection_lookup),
+        ]
+
+        logger.info(f"📊 {iterations} итераций на сценарий")
+        for name, func in scenarios:
+            result = await measure(name, func, telegram_id, iterations)
+            logger.info(
+                f"{result['name']:<22} mean={result['mean']:.2f}ms "
+                f"p50={result['p50']:.2f}ms p95={result['p95']:.2f}ms"
+            )
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    asyncio.run(main(int(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 200))
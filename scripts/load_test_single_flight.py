@@ -0,0 +1,88 @@
+"""
+Нагрузочный тест single-flight: всплеск открытий одного домашнего задания
+
+Симулирует N студентов, одновременно открывающих одно ДЗ
+(HomeworkRepository.get_by_id, QuestionRepository.get_by_homework,
+LessonRepository.get_by_id), и считает реальные SQL-запросы к БД
+с объединением вызовов и без него.
+
+Запуск (нужна настроенная БД из .env):
+    python scripts/load_test_single_flight.py <homework_id> [students]
+"""
+import asyncio
+import os
+import sys
+import time
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from database import init_database, close_database, HomeworkRepository, QuestionRepository, LessonRepository
+from database.database import engine
+from database.reference_cache import reference_cache
+from database.single_flight import single_flight_group
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger(__name__)
+
+round_trips = 0
+
+
+def count_round_trip(*args):
+    global round_trips
+    round_trips += 1
+
+
+async def open_homework(homework_id: int, coalesce: bool):
+    """Чтения, которые выполняет обработчик при открытии ДЗ"""
+    get_homework = HomeworkRepository.get_by_id if coalesce else HomeworkRepository.get_by_id.__wrapped__
+    get_questions = QuestionRepository.get_by_homework if coalesce else QuestionRepository.get_by_homework.__wrapped__
+    get_lesson = LessonRepository.get_by_id if coalesce else LessonRepository.get_by_id.__wrapped__
+
+    homework = await get_homework(homework_id)
+    await get_questions(homework_id)
+    await get_lesson(homework.lesson_id)
+
+
+async def run_burst(homework_id: int, students: int, coalesce: bool) -> dict:
+    """Запустить всплеск и вернуть количество SQL-запросов и время"""
+    global round_trips
+    round_trips = 0
+    reference_cache.clear()
+    single_flight_group.reset_stats()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(open_homework(homework_id, coalesce) for _ in range(students)))
+    return {"round_trips": round_trips, "elapsed": time.perf_counter() - started}
+
+
+async def main(homework_id: int, students: int):
+    await init_database()
+    event.listen(engine.sync_engine, "before_cursor_execute", count_round_trip)
+    try:
+        if not await HomeworkRepository.get_by_id(homework_id):
+            logger.error(f"❌ Домашнее задание {homework_id} не найдено")
+            return
+
+        plain = await run_burst(homework_id, students, coalesce=False)
+        logger.info(f"Без объединения: {plain['round_trips']} SQL-запросов за {plain['elapsed']:.2f}с")
+
+        coalesced = await run_burst(homework_id, students, coalesce=True)
+        logger.info(f"С single-flight: {coalesced['round_trips']} SQL-запросов за {coalesced['elapsed']:.2f}с")
+
+        for name, stats in single_flight_group.get_stats()["methods"].items():
+            logger.info(f"  {name}: {stats['calls']} вызовов, объединено {stats['coalesced']} "
+                        f"({stats['coalescing_ratio']:.0%})")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_round_trip)
+        await close_database()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    asyncio.run(main(int(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 50))
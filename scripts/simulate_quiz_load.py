@@ -0,0 +1,742 @@
+"""
+Офлайн-симулятор нагрузки на quiz систему
+
+В отличие от load_test_homework.py (отправляет обновления в живой webhook),
+прогоняет движок тестов целиком внутри процесса: диспетчер aiogram с
+обработчиками register_quiz_handlers, бот с фиктивной сессией, которая
+записывает вызовы Bot API вместо отправки в Telegram, и виртуальные студенты,
+отвечающие на опросы через dp.feed_update. Таймауты обрабатывает quiz_timers,
+как в боте. Сети нет: Redis заменен хранилищем в памяти процесса со счетчиком
+команд (или не используется с --no-redis), вопросы ДЗ заранее положены в
+question_bank, поэтому к БД тест не обращается - это проверяется счетчиком
+SQL-запросов.
+
+Студенты проходят ДЗ (варианты из банка вопросов), тест месяца и пробный ЕНТ
+(варианты в данных вопросов). Попытка начинается так же, как в обработчиках
+"Начать тест": данные в FSM и send_next_question. Функция завершения
+симулятора заменяет сохранение результатов в БД и очищает сообщения теста.
+
+Отчет: пропускная способность, задержка ответ -> следующий вопрос
+(перцентили), опоздание таймаутов, вызовы Bot API, команды Redis и
+SQL-запросы на ответ, память. Фото вопросов по умолчанию - локальные файлы
+(--photo-source file), поэтому первые отправки проходят через загрузку и
+реестр media_registry; с --photo-source file_id фото - готовые file_id.
+
+Запуск:
+    python scripts/simulate_quiz_load.py --students 2000 --questions 10 --time-limit 5
+"""
+import argparse
+import asyncio
+import fnmatch
+import gc
+import logging
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOT_TOKEN = "424242:SIMULATED-quiz-load-token"
+# Настоящий токен не нужен: запросы к Telegram не отправляются
+os.environ.setdefault("BOT_TOKEN", BOT_TOKEN)
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage, SendPhoto, SendPoll, TelegramMethod
+from aiogram.types import Chat, Message, PhotoSize, Poll, PollAnswer, PollOption, Update, User
+from sqlalchemy import event
+
+from common.question_bank import QUESTION_SET, HOMEWORK
+from common.quiz_registrator import (register_quiz_handlers, send_next_question, cleanup_test_messages,
+                                     cleanup_test_data, get_completed_questions_count)
+from common.quiz_session import quiz_sessions
+from common.media_registry import media_registry
+from common.quiz_timers import quiz_timers
+from database.database import engine
+from database.reference_cache import reference_cache
+from database.single_flight import single_flight_group
+from middlewares.rate_limit_middleware import RateLimitMiddleware
+from utils.redis_manager import redis_manager
+from utils.redis_storage import RedisStorage
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger(__name__)
+
+FIRST_USER_ID = 7_000_000
+KINDS = ("homework", "month", "trial_ent")
+PHOTO_SOURCES = ("file", "file_id")
+
+
+class SimQuizStates(StatesGroup):
+    homework = State()
+    month = State()
+    trial_ent = State()
+
+
+# === REDIS В ПАМЯТИ ПРОЦЕССА ===
+
+class SimRedis:
+    """
+    Подмножество команд redis.asyncio, которое использует бот, в памяти процесса
+
+    Значения возвращаются в bytes (как у клиента с decode_responses=False),
+    каждая команда учитывается в commands.
+    """
+
+    def __init__(self):
+        self.strings: Dict[str, tuple] = {}
+        self.hashes: Dict[str, Dict[str, bytes]] = defaultdict(dict)
+        self.zsets: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.commands: Counter = Counter()
+
+    @staticmethod
+    def _bytes(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    @staticmethod
+    def _str(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    def _alive(self, key: str) -> Optional[bytes]:
+        item = self.strings.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.strings[key]
+            return None
+        return value
+
+    def used_bytes(self) -> int:
+        """Примерный объем данных (ключи и значения)"""
+        total = sum(len(key) + len(value) for key, (value, _) in self.strings.items())
+        total += sum(len(k) + len(v) for h in self.hashes.values() for k, v in h.items())
+        total += sum(len(member) + 8 for z in self.zsets.values() for member in z)
+        return total
+
+    # Ключи и строки
+
+    async def ping(self):
+        self.commands["ping"] += 1
+        return True
+
+    async def get(self, key):
+        self.commands["get"] += 1
+        return self._alive(self._str(key))
+
+    async def set(self, key, value, ex=None, nx=False):
+        self.commands["set"] += 1
+        key = self._str(key)
+        if nx and self._alive(key) is not None:
+            return None
+        self.strings[key] = (self._bytes(value), time.monotonic() + ex if ex else None)
+        return True
+
+    async def setex(self, key, ttl, value):
+        self.commands["setex"] += 1
+        self.strings[self._str(key)] = (self._bytes(value), time.monotonic() + int(ttl))
+        return True
+
+    async def delete(self, *keys):
+        self.commands["delete"] += 1
+        deleted = 0
+        for key in map(self._str, keys):
+            for storage in (self.strings, self.hashes, self.zsets):
+                if storage.pop(key, None) is not None:
+                    deleted += 1
+        return deleted
+
+    async def exists(self, *keys):
+        self.commands["exists"] += 1
+        return sum(1 for key in map(self._str, keys)
+                   if self._alive(key) is not None or key in self.hashes or key in self.zsets)
+
+    async def expire(self, key, ttl):
+        self.commands["expire"] += 1
+        key = self._str(key)
+        value = self._alive(key)
+        if value is None:
+            return False
+        self.strings[key] = (value, time.monotonic() + int(ttl))
+        return True
+
+    async def keys(self, pattern="*"):
+        self.commands["keys"] += 1
+        names = list(self.strings) + list(self.hashes) + list(self.zsets)
+        return [self._bytes(name) for name in names if fnmatch.fnmatch(name, self._str(pattern))]
+
+    # Хэши
+
+    async def hset(self, name, key=None, value=None, mapping=None):
+        self.commands["hset"] += 1
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        target = self.hashes[self._str(name)]
+        added = sum(1 for field in fields if self._str(field) not in target)
+        for field, field_value in fields.items():
+            target[self._str(field)] = self._bytes(field_value)
+        return added
+
+    async def hget(self, name, key):
+        self.commands["hget"] += 1
+        return self.hashes.get(self._str(name), {}).get(self._str(key))
+
+    async def hmget(self, name, keys, *args):
+        self.commands["hmget"] += 1
+        target = self.hashes.get(self._str(name), {})
+        return [target.get(self._str(key)) for key in [*keys, *args]]
+
+    async def hgetall(self, name):
+        self.commands["hgetall"] += 1
+        return {self._bytes(k): v for k, v in self.hashes.get(self._str(name), {}).items()}
+
+    async def hdel(self, name, *keys):
+        self.commands["hdel"] += 1
+        target = self.hashes.get(self._str(name), {})
+        return sum(1 for key in keys if target.pop(self._str(key), None) is not None)
+
+    async def hincrby(self, name, key, amount=1):
+        self.commands["hincrby"] += 1
+        target = self.hashes[self._str(name)]
+        value = int(target.get(self._str(key), b"0")) + amount
+        target[self._str(key)] = self._bytes(value)
+        return value
+
+    # Sorted sets
+
+    async def zadd(self, name, mapping, nx=False):
+        self.commands["zadd"] += 1
+        target = self.zsets[self._str(name)]
+        added = sum(1 for member in mapping if self._str(member) not in target)
+        for member, score in mapping.items():
+            if not (nx and self._str(member) in target):
+                target[self._str(member)] = float(score)
+        return added
+
+    async def zrem(self, name, *members):
+        self.commands["zrem"] += 1
+        target = self.zsets.get(self._str(name), {})
+        return sum(1 for member in members if target.pop(self._str(member), None) is not None)
+
+    async def zscore(self, name, member):
+        self.commands["zscore"] += 1
+        return self.zsets.get(self._str(name), {}).get(self._str(member))
+
+    async def zcard(self, name):
+        self.commands["zcard"] += 1
+        return len(self.zsets.get(self._str(name), {}))
+
+    async def zcount(self, name, min_score, max_score):
+        self.commands["zcount"] += 1
+        low, high = float(min_score), float(max_score)
+        return sum(1 for score in self.zsets.get(self._str(name), {}).values() if low <= score <= high)
+
+    async def zrangebyscore(self, name, min_score, max_score, start=None, num=None):
+        self.commands["zrangebyscore"] += 1
+        low, high = float(min_score), float(max_score)
+        members = sorted(
+            (score, member) for member, score in self.zsets.get(self._str(name), {}).items()
+            if low <= score <= high
+        )
+        if start is not None and num is not None:
+            members = members[start:start + num]
+        return [self._bytes(member) for _, member in members]
+
+    async def zrevrange(self, name, start, end, withscores=False):
+        self.commands["zrevrange"] += 1
+        members = sorted(self.zsets.get(self._str(name), {}).items(), key=lambda item: item[1], reverse=True)
+        members = members[start:None if end == -1 else end + 1]
+        if withscores:
+            return [(self._bytes(member), score) for member, score in members]
+        return [self._bytes(member) for member, _ in members]
+
+    def pipeline(self, transaction=True):
+        return SimPipeline(self)
+
+    async def close(self):
+        pass
+
+
+class SimPipeline:
+    """Pipeline SimRedis: команды накапливаются и выполняются в execute() за один round trip"""
+
+    def __init__(self, redis: SimRedis):
+        self._redis = redis
+        self._queued = []
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._queued.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        self._redis.commands["<pipeline>"] += 1
+        queued, self._queued = self._queued, []
+        return [await command(*args, **kwargs) for command, args, kwargs in queued]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# === СЕССИЯ БОТА БЕЗ СЕТИ ===
+
+class RecordingSession(BaseSession):
+    """Сессия бота, которая записывает вызовы Bot API и отвечает как Telegram"""
+
+    def __init__(self, simulator: "QuizLoadSimulator"):
+        super().__init__()
+        self.simulator = simulator
+        self.calls: Counter = Counter()
+        self._message_ids: Dict[int, int] = defaultdict(int)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls[type(method).__name__] += 1
+        if not isinstance(method, (SendMessage, SendPoll, SendPhoto)):
+            # deleteMessages, deleteMessage и прочие служебные методы
+            return True
+
+        chat_id = method.chat_id
+        self._message_ids[chat_id] += 1
+        message_id = self._message_ids[chat_id]
+        fields = {}
+        if isinstance(method, SendPoll):
+            fields["poll"] = Poll(
+                id=f"{chat_id}:{message_id}",
+                question=method.question,
+                options=[PollOption(text=getattr(option, "text", option), voter_count=0) for option in method.options],
+                total_voter_count=0,
+                is_closed=False,
+                is_anonymous=False,
+                type="quiz",
+                allows_multiple_answers=False,
+                correct_option_id=method.correct_option_id,
+                close_date=method.close_date
+            )
+        elif isinstance(method, SendPhoto):
+            file_id = method.photo if isinstance(method.photo, str) else f"sim-upload-{chat_id}-{message_id}"
+            fields["photo"] = [PhotoSize(file_id=file_id, file_unique_id=file_id, width=1280, height=720)]
+        else:
+            fields["text"] = method.text
+
+        message = Message(
+            message_id=message_id,
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            **fields
+        )
+        self.simulator.on_message(chat_id, message)
+        return message
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+
+# === ВОПРОСЫ ===
+
+def make_photo(question_id: int, photo_dir: Optional[str]) -> str:
+    """photo_path вопроса: локальный файл в photo_dir или готовый file_id"""
+    if photo_dir is None:
+        return f"sim-file-id-{question_id}"
+    path = os.path.join(photo_dir, f"question_{question_id}.png")
+    with open(path, "wb") as file:
+        # Содержимое различается по вопросам - у каждого фото свой ключ в реестре
+        file.write(f"sim-photo-{question_id}".encode() * 64)
+    return path
+
+
+def make_question(question_id: int, rng: random.Random, time_limit: int, photo_rate: float,
+                  inline_options: bool, photo_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Вопрос в формате, который обработчики кладут в FSM перед send_next_question"""
+    correct = rng.randrange(4)
+    options = [
+        {"id": question_id * 10 + i, "text": f"Вариант {i + 1}", "is_correct": i == correct, "order_number": i + 1}
+        for i in range(4)
+    ]
+    # Варианты в перемешанном порядке - compile_session сортирует их по order_number
+    rng.shuffle(options)
+    question = {
+        "id": question_id,
+        "text": f"Вопрос {question_id}: выберите правильный вариант",
+        "photo_path": make_photo(question_id, photo_dir) if rng.random() < photo_rate else None,
+        "time_limit": time_limit,
+        "microtopic_number": question_id % 7 + 1
+    }
+    if inline_options:
+        question["answer_options"] = options
+    else:
+        # ДЗ: варианты берутся из банка вопросов (как после question_bank.get_homework_questions)
+        ordered = sorted(options, key=lambda option: option["order_number"])
+        reference_cache.put(QUESTION_SET, ("question", HOMEWORK, question_id), {
+            **question,
+            "answer_options": ordered,
+            "correct_index": correct
+        })
+    return question
+
+
+# === СИМУЛЯТОР ===
+
+_simulator: Optional["QuizLoadSimulator"] = None
+
+
+async def finish_simulated_quiz(chat_id: int, state: FSMContext, bot: Bot):
+    """Завершение теста: вместо сохранения в БД - учет результата, очистка и сообщение с итогом"""
+    data = await state.get_data()
+    results = data.get("question_results") or []
+    correct = sum(1 for result in results if result["is_correct"])
+
+    await cleanup_test_messages(chat_id, data, bot)
+    await cleanup_test_data(chat_id)
+    await state.clear()
+    await bot.send_message(chat_id, f"✅ Тест завершен: {correct}/{len(results)}")
+    _simulator.on_finished(chat_id, len(results))
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class QuizLoadSimulator:
+    """Виртуальные студенты, проходящие тесты через диспетчер и фиктивную сессию бота"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.loop = asyncio.get_running_loop()
+        self.sim_redis: Optional[SimRedis] = None
+        self.storage: Optional[BaseStorage] = None
+        self.bot: Optional[Bot] = None
+        self.dp: Optional[Dispatcher] = None
+        self.limiter: Optional[RateLimitMiddleware] = None
+        self.photo_dir: Optional[str] = None
+
+        self.update_id = 0
+        # Время отправки ответа (для задержки до следующего вопроса) и срок текущего вопроса
+        self.answer_sent_at: Dict[int, float] = {}
+        self.deadlines: Dict[int, float] = {}
+        # Сообщения об ошибках движка студентам ("Тест был прерван" и т.п.)
+        self.errors: Counter = Counter()
+        self.tasks = set()
+        self.finished = asyncio.Event()
+        self.pending = 0
+
+        self.answers = 0
+        self.skipped = 0
+        self.late = 0
+        self.completed = 0
+        self.answered_questions = 0
+        self.answer_latencies: List[float] = []
+        self.timeout_lags: List[float] = []
+        self.sql_statements = 0
+        self.peak_redis_bytes = 0
+
+    # --- Подготовка ---
+
+    async def setup(self):
+        if self.args.photo_source == "file":
+            self.photo_dir = tempfile.mkdtemp(prefix="sim_photos_")
+        if self.args.no_redis:
+            self.storage = MemoryStorage()
+        else:
+            self.sim_redis = SimRedis()
+            redis_manager.redis = self.sim_redis
+            redis_manager.connected = True
+            self.storage = RedisStorage(redis_manager)
+
+        session = RecordingSession(self)
+        if self.args.rate_limit:
+            self.limiter = RateLimitMiddleware()
+            session.middleware(self.limiter)
+        self.bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+        router = Router()
+        for kind in KINDS:
+            register_quiz_handlers(router=router, test_state=getattr(SimQuizStates, kind))
+        self.dp = Dispatcher(storage=self.storage)
+        self.dp.include_router(router)
+
+        # Точный срок каждого вопроса - для опоздания обработки таймаутов
+        schedule = quiz_timers.schedule
+
+        async def schedule_with_deadline(question_uuid: str, timeout_seconds: float, key: StorageKey):
+            self.deadlines[key.chat_id] = time.perf_counter() + timeout_seconds
+            await schedule(question_uuid, timeout_seconds, key)
+
+        quiz_timers.schedule = schedule_with_deadline
+        quiz_timers.start(self.bot, self.storage)
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count_sql)
+
+    async def teardown(self):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._count_sql)
+        await quiz_timers.stop()
+        del quiz_timers.schedule
+        for task in list(self.tasks):
+            task.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.photo_dir:
+            shutil.rmtree(self.photo_dir, ignore_errors=True)
+
+    def _count_sql(self, *args):
+        self.sql_statements += 1
+
+    def _questions(self, kind: str, first_id: int) -> List[Dict[str, Any]]:
+        count = self.args.questions
+        return [
+            make_question(first_id + i, self.rng, self.args.time_limit, self.args.photo_rate,
+                          inline_options=kind != "homework", photo_dir=self.photo_dir)
+            for i in range(count)
+        ]
+
+    # --- Студенты ---
+
+    async def start_student(self, user_id: int, kind: str, questions: List[Dict[str, Any]]):
+        """Начало попытки, как в обработчиках кнопки "Начать тест" """
+        state = FSMContext(self.storage, StorageKey(bot_id=self.bot.id, chat_id=user_id, user_id=user_id))
+        await state.set_state(getattr(SimQuizStates, kind))
+        await state.update_data(
+            user_id=user_id,
+            student_id=user_id - FIRST_USER_ID + 1,
+            questions=questions,
+            q_index=0,
+            score=0,
+            question_results=[],
+            messages_to_delete=[]
+        )
+        await send_next_question(user_id, state, self.bot, finish_simulated_quiz)
+
+    def on_message(self, chat_id: int, message: Message):
+        """Вызов Bot API от движка тестов: отмечаем задержки и планируем ответ студента"""
+        now = time.perf_counter()
+        if message.text:
+            if message.text.startswith("⏰") and chat_id in self.deadlines:
+                self.timeout_lags.append(now - self.deadlines.pop(chat_id))
+            elif message.text.startswith("❌"):
+                # Движок сбросил тест студента - попытка не будет завершена
+                self.errors[message.text.splitlines()[0]] += 1
+                self.answer_sent_at.pop(chat_id, None)
+                self._done()
+            return
+        if message.poll is None:
+            return
+
+        sent_at = self.answer_sent_at.pop(chat_id, None)
+        if sent_at is not None:
+            self.answer_latencies.append(now - sent_at)
+
+        if self.rng.random() < self.args.timeout_rate:
+            self.skipped += 1
+            return
+        delay = self.rng.uniform(self.args.min_delay, self.args.max_delay)
+        if message.poll.close_date and time.time() + delay >= message.poll.close_date.timestamp():
+            # Опрос закроется раньше: Telegram не примет ответ, сработает таймаут
+            self.late += 1
+            return
+        correct = self.rng.random() < self.args.correct_rate
+        option = message.poll.correct_option_id if correct else (message.poll.correct_option_id + 1) % 4
+        self.loop.call_later(delay, lambda: self._spawn(self.answer(chat_id, message.poll.id, option)))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def answer(self, user_id: int, poll_id: str, option: int):
+        self.update_id += 1
+        update = Update(
+            update_id=self.update_id,
+            poll_answer=PollAnswer(
+                poll_id=poll_id,
+                option_ids=[option],
+                user=User(id=user_id, is_bot=False, first_name=f"Student{user_id - FIRST_USER_ID + 1}")
+            )
+        )
+        self.deadlines.pop(user_id, None)
+        self.answer_sent_at[user_id] = time.perf_counter()
+        self.answers += 1
+        await self.dp.feed_update(self.bot, update)
+
+    def on_finished(self, chat_id: int, answered: int):
+        sent_at = self.answer_sent_at.pop(chat_id, None)
+        if sent_at is not None:
+            self.answer_latencies.append(time.perf_counter() - sent_at)
+        self.deadlines.pop(chat_id, None)
+        self.completed += 1
+        self.answered_questions += answered
+        self._done()
+
+    def _done(self):
+        self.pending -= 1
+        if self.pending == 0:
+            self.finished.set()
+
+    # --- Прогон ---
+
+    async def _sample_redis(self):
+        # Объем данных в Redis меряется во время прогона: после завершения тестов FSM очищается
+        while self.sim_redis:
+            self.peak_redis_bytes = max(self.peak_redis_bytes, self.sim_redis.used_bytes())
+            await asyncio.sleep(1)
+
+    async def run(self) -> Dict[str, Any]:
+        await self.setup()
+        # Наборы вопросов: один на вид теста (как у группы, проходящей одно ДЗ)
+        question_sets = {kind: self._questions(kind, (i + 1) * 100_000) for i, kind in enumerate(self.args.kinds)}
+        gc.collect()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.pending = self.args.students
+        self._spawn(self._sample_redis())
+        started = time.perf_counter()
+        ramp = self.args.ramp / max(1, self.args.students)
+        for index in range(self.args.students):
+            user_id = FIRST_USER_ID + index
+            kind = self.args.kinds[index % len(self.args.kinds)]
+            self.loop.call_later(index * ramp, lambda u=user_id, k=kind: self._spawn(
+                self.start_student(u, k, question_sets[k])
+            ))
+
+        try:
+            await asyncio.wait_for(self.finished.wait(), timeout=self.args.max_duration)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Не завершили тест за {self.args.max_duration}с: {self.pending} студентов")
+        elapsed = time.perf_counter() - started
+
+        # Фоновое удаление сообщений завершается до подсчета вызовов
+        await asyncio.sleep(0.1)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        await self.teardown()
+        return self.report(elapsed, rss_before, peak_rss)
+
+    def report(self, elapsed: float, rss_before: int, peak_rss: int) -> Dict[str, Any]:
+        answers = max(1, self.answers)
+        calls: Counter = self.bot.session.calls
+        redis_commands: Counter = self.sim_redis.commands if self.sim_redis else Counter()
+        timer_stats = quiz_timers.get_stats()
+        return {
+            "students": self.args.students,
+            "completed": self.completed,
+            "elapsed": elapsed,
+            "answers": self.answers,
+            "timeouts": timer_stats["timeouts"],
+            "skipped": self.skipped,
+            "late": self.late,
+            "errors": dict(self.errors),
+            "answers_per_second": self.answers / elapsed if elapsed else 0,
+            "questions_per_second": self.answered_questions / elapsed if elapsed else 0,
+            "latency": {name: percentile(self.answer_latencies, share) * 1000
+                        for name, share in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+            "timeout_lag": {name: percentile(self.timeout_lags, share) * 1000
+                            for name, share in (("p50", 0.5), ("p99", 0.99), ("max", 1.0))},
+            "api_calls": dict(calls.most_common()),
+            "api_calls_per_answer": sum(calls.values()) / answers,
+            "redis_commands": dict(redis_commands.most_common()),
+            "redis_per_answer": sum(redis_commands.values()) / answers,
+            "redis_peak_bytes": self.peak_redis_bytes,
+            "sql_statements": self.sql_statements,
+            "sql_per_answer": self.sql_statements / answers,
+            "question_bank": {"hits": reference_cache.hits, "misses": reference_cache.misses},
+            "quiz_sessions": quiz_sessions.get_stats(),
+            "media_registry": media_registry.get_stats(),
+            "photo_uploads_coalesced": single_flight_group.get_stats()["methods"].get("media_registry.upload"),
+            "recent_questions": get_completed_questions_count(),
+            "rss_mb": peak_rss / 1024,
+            "rss_growth_mb": (peak_rss - rss_before) / 1024,
+            "outbound": self.limiter.get_stats() if self.limiter else None,
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    latency, lag = report["latency"], report["timeout_lag"]
+    print(f"\n📊 Студентов: {report['students']}, завершили: {report['completed']} за {report['elapsed']:.1f}с")
+    print(f"   Ответов: {report['answers']}, таймаутов: {report['timeouts']} "
+          f"(без ответа {report['skipped']}, опрос закрылся раньше ответа {report['late']})")
+    for text, count in report["errors"].items():
+        print(f"   ⚠️ {text}: {count}")
+    print(f"   Пропускная способность: {report['answers_per_second']:.1f} ответов/с, "
+          f"{report['questions_per_second']:.1f} вопросов/с")
+    print(f"   Ответ -> следующий вопрос, мс: p50 {latency['p50']:.1f}, p90 {latency['p90']:.1f}, "
+          f"p99 {latency['p99']:.1f}, max {latency['max']:.1f}")
+    print(f"   Опоздание таймаута, мс: p50 {lag['p50']:.1f}, p99 {lag['p99']:.1f}, max {lag['max']:.1f}")
+    print(f"\n📨 Bot API: {report['api_calls_per_answer']:.2f} вызовов на ответ")
+    for method, count in report["api_calls"].items():
+        print(f"   {method}: {count}")
+    print(f"\n🗄️ Redis: {report['redis_per_answer']:.2f} команд на ответ, пик данных {report['redis_peak_bytes'] / 1024:.0f} КБ")
+    for command, count in report["redis_commands"].items():
+        print(f"   {command}: {count}")
+    print(f"\n🐘 SQL-запросов: {report['sql_statements']} ({report['sql_per_answer']:.3f} на ответ), "
+          f"банк вопросов: {report['question_bank']['hits']} попаданий, {report['question_bank']['misses']} промахов")
+    print(f"🖼️ Фото: {report['media_registry']}, совмещенные загрузки: {report['photo_uploads_coalesced']}")
+    print(f"🧩 Сессии тестов: {report['quiz_sessions']}, недавних вопросов: {report['recent_questions']}")
+    print(f"💾 Память (пик RSS): {report['rss_mb']:.0f} МБ, рост за прогон {report['rss_growth_mb']:.0f} МБ")
+    if report["outbound"]:
+        print(f"🚦 Лимит исходящих: {report['outbound']}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Офлайн-симулятор нагрузки на quiz систему")
+    parser.add_argument("--students", type=int, default=1000, help="Количество виртуальных студентов")
+    parser.add_argument("--kinds", default=",".join(KINDS),
+                        help="Виды тестов через запятую: homework, month, trial_ent")
+    parser.add_argument("--questions", type=int, default=10, help="Вопросов в тесте")
+    parser.add_argument("--time-limit", type=int, default=5, help="Время на вопрос (в секундах)")
+    parser.add_argument("--min-delay", type=float, default=0.5, help="Минимальная задержка ответа (в секундах)")
+    parser.add_argument("--max-delay", type=float, default=3.0, help="Максимальная задержка ответа (в секундах)")
+    parser.add_argument("--timeout-rate", type=float, default=0.05, help="Доля вопросов без ответа (таймаут)")
+    parser.add_argument("--correct-rate", type=float, default=0.7, help="Доля правильных ответов")
+    parser.add_argument("--photo-rate", type=float, default=0.2, help="Доля вопросов с фото")
+    parser.add_argument("--photo-source", choices=PHOTO_SOURCES, default="file",
+                        help="Фото вопросов: локальные файлы (загрузка через media_registry) или готовые file_id")
+    parser.add_argument("--ramp", type=float, default=10.0, help="За сколько секунд начинают все студенты")
+    parser.add_argument("--max-duration", type=float, default=600.0, help="Ограничение времени прогона")
+    parser.add_argument("--seed", type=int, default=42, help="Seed поведения студентов")
+    parser.add_argument("--no-redis", action="store_true", help="Без Redis: MemoryStorage и локальные таймеры")
+    parser.add_argument("--rate-limit", action="store_true", help="Включить лимит исходящих запросов Telegram")
+    args = parser.parse_args()
+
+    args.kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = set(args.kinds) - set(KINDS)
+    if unknown or not args.kinds:
+        parser.error(f"Неизвестные виды тестов: {', '.join(sorted(unknown)) or '-'}")
+    if args.min_delay > args.max_delay:
+        parser.error("--min-delay больше --max-delay")
+    return args
+
+
+async def main(args: argparse.Namespace):
+    global _simulator
+    _simulator = QuizLoadSimulator(args)
+    print(f"🚀 Симуляция: {args.students} студентов, тесты {', '.join(args.kinds)}, "
+          f"{args.questions} вопросов по {args.time_limit}с, Redis: {'нет' if args.no_redis else 'в памяти'}")
+    print_report(await _simulator.run())
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -59,7 +59,7 @@ async def show_curator_info(callback: CallbackQuery, state: FSMContext):
 
     subject_id = int(callback.data.replace("curator_", ""))
 
-    # Получаем студента
+    # Получаем студента (нужны его группы)
     student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
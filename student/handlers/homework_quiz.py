@@ -16,9 +16,10 @@ from common.utils import check_if_id_in_callback_data
 from common.quiz_registrator import (
     register_quiz_handlers, send_next_question, cleanup_test_messages, cleanup_test_data
 )
+from common.question_bank import question_bank
+from common.result_events import publish_result_saved, HOMEWORK
 from database import (
-    HomeworkRepository, QuestionRepository, AnswerOptionRepository,
-    HomeworkResultRepository, QuestionResultRepository, StudentRepository
+    HomeworkRepository, HomeworkResultRepository, QuestionResultRepository, StudentRepository
 )
 from common.navigation import log
 from student.handlers.homework import HomeworkStates
@@ -66,13 +67,13 @@ async def handle_test_back_navigation(callback: CallbackQuery, state: FSMContext
         return
 
     # Получаем вопросы домашнего задания
-    questions = await QuestionRepository.get_by_homework(homework_id)
+    questions = await question_bank.get_homework_questions(homework_id)
     if not questions:
         await callback.answer("❌ В этом домашнем задании нет вопросов", show_alert=True)
         return
 
     # Вычисляем среднее время на вопрос для отображения
-    avg_time = sum(q.time_limit for q in questions) // len(questions)
+    avg_time = sum(q['time_limit'] for q in questions) // len(questions)
 
     text = (
         f"🔎 Урок: {homework.lesson.name}\n"
@@ -159,14 +160,14 @@ async def show_homework_confirmation(callback: CallbackQuery, state: FSMContext,
     logging.info(f"Найдено домашнее задание: {homework.name} (ID: {homework.id})")
 
     # Получаем вопросы домашнего задания
-    questions = await QuestionRepository.get_by_homework(homework_id)
+    questions = await question_bank.get_homework_questions(homework_id)
 
     if not questions:
         await callback.answer("❌ В этом домашнем задании нет вопросов", show_alert=True)
         return
 
     # Сохраняем информацию о домашнем задании в состоянии (только ID для избежания проблем с сериализацией)
-    question_ids = [q.id for q in questions]
+    question_ids = [q['id'] for q in questions]
     await state.update_data(
         homework_id=homework_id,
         question_ids=question_ids
@@ -175,7 +176,7 @@ async def show_homework_confirmation(callback: CallbackQuery, state: FSMContext,
     logging.info(f"Сохранены данные в состояние: homework_id={homework_id}, question_ids={question_ids}")
 
     # Вычисляем среднее время на вопрос для отображения
-    avg_time = sum(q.time_limit for q in questions) // len(questions)
+    avg_time = sum(q['time_limit'] for q in questions) // len(questions)
 
     text = (
         f"🔎 Урок: {homework.lesson.name}\n"
@@ -217,7 +218,7 @@ async def start_quiz(callback: CallbackQuery, state: FSMContext):
 
     # Получаем данные заново из базы
     homework = await HomeworkRepository.get_by_id(homework_id)
-    questions = await QuestionRepository.get_by_homework(homework_id)
+    questions = await question_bank.get_homework_questions(homework_id)
 
     if not homework or not questions:
         logging.error(f"Не удалось получить данные из БД: homework={homework is not None}, questions={len(questions) if questions else 0}")
@@ -225,7 +226,7 @@ async def start_quiz(callback: CallbackQuery, state: FSMContext):
         return
 
     # Получаем ID студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.answer("❌ Студент не найден", show_alert=True)
         return
@@ -258,11 +259,11 @@ async def start_quiz(callback: CallbackQuery, state: FSMContext):
         start_time=datetime.now().isoformat(),
         messages_to_delete=messages_to_delete,  # Список сообщений для удаления после теста
         questions=[{
-            'id': q.id,
-            'text': q.text,
-            'photo_path': q.photo_path,
-            'time_limit': q.time_limit,
-            'microtopic_number': q.microtopic_number
+            'id': q['id'],
+            'text': q['text'],
+            'photo_path': q['photo_path'],
+            'time_limit': q['time_limit'],
+            'microtopic_number': q['microtopic_number']
         } for q in questions],
         homework={
             'id': homework.id,
@@ -332,6 +333,8 @@ async def finish_test(chat_id, state: FSMContext, bot):
             await StudentRepository.update_points_and_level(student_id)
             logging.info(f"✅ Обновлены баллы студента {student_id}: +{points_earned} баллов")
 
+        await publish_result_saved(HOMEWORK, student_id)
+
         # Формируем сообщение с результатами
         percentage = round((score / total_questions) * 100, 1) if total_questions > 0 else 0
 
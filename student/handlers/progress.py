@@ -11,6 +11,7 @@ class ProgressStates(StatesGroup):
     main = State()
     subjects = State()
     common_stats = State()
+    group_place = State()
     subject_details = State()
 
 @router.callback_query(F.data == "progress")
@@ -28,7 +29,7 @@ async def show_general_stats(callback: CallbackQuery, state: FSMContext):
     from database import StudentRepository
 
     # Получаем студента по Telegram ID
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
 
     if not student:
         await callback.message.edit_text(
@@ -37,18 +38,66 @@ async def show_general_stats(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    # Получаем общую статистику студента
-    general_stats = await StudentRepository.get_general_stats(student.id)
+    async def render_general_stats() -> str:
+        # Получаем общую статистику студента
+        general_stats = await StudentRepository.get_general_stats(student.id)
+        return (
+            f"Вот твоя краткая статистика 👇\n"
+            f"📊 Баллы: {general_stats.get('total_points', 0)}\n"
+            f"🎯 Уровень: {student.level}\n"
+            f"📋 Выполнено домашних заданий: {general_stats.get('total_completed', 0)}"
+        )
+
+    from common.render_cache import render_cache, student_scope
+    result_text = await render_cache.get_or_render_text(
+        "student_general_stats", (student.id,), render_general_stats, [student_scope(student.id)]
+    )
 
     await callback.message.edit_text(
-        f"Вот твоя краткая статистика 👇\n"
-        f"📊 Баллы: {general_stats.get('total_points', 0)}\n"
-        f"🎯 Уровень: {student.level}\n"
-        f"📋 Выполнено домашних заданий: {general_stats.get('total_completed', 0)}",
+        result_text,
         reply_markup=get_back_to_progress_kb()
     )
     await state.set_state(ProgressStates.common_stats)
 
+@router.callback_query(ProgressStates.main, F.data == "group_place")
+async def show_group_place(callback: CallbackQuery, state: FSMContext):
+    """Показать место студента в рейтинге каждой его группы"""
+    from database import StudentRepository
+    from common.leaderboards import leaderboards, GROUP
+
+    # Нужны группы студента - загружаем сущность одним запросом
+    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+
+    if not student:
+        await callback.message.edit_text(
+            "❌ Студент не найден в системе",
+            reply_markup=get_back_to_progress_kb()
+        )
+        return
+
+    result_text = "🏅 Твое место в рейтинге групп по баллам:\n\n"
+    if not student.groups:
+        result_text += "Ты пока не состоишь ни в одной группе"
+
+    for group in student.groups:
+        subject_name = group.subject.name if group.subject else "Без предмета"
+        result_text += f"👥 {group.name} ({subject_name})\n"
+
+        place = await leaderboards.get_place(GROUP, group.id, student.id)
+        if place:
+            result_text += f"Место: {place['place']} из {place['total']} — {place['points']} баллов\n"
+
+        # Лидеры группы для ориентира
+        for i, leader in enumerate(await leaderboards.top(GROUP, group.id, limit=3), 1):
+            result_text += f"  {i}. {leader['name']} — {leader['points']} баллов\n"
+        result_text += "\n"
+
+    await callback.message.edit_text(
+        result_text,
+        reply_markup=get_back_to_progress_kb()
+    )
+    await state.set_state(ProgressStates.group_place)
+
 @router.callback_query(ProgressStates.main, F.data == "topics_understanding")
 async def show_subjects_list(callback: CallbackQuery, state: FSMContext):
     """Показать список предметов для просмотра понимания по темам"""
@@ -65,7 +114,7 @@ async def show_subject_progress(callback: CallbackQuery, state: FSMContext):
 
     # Получаем ID студента из Telegram ID
     from database import StudentRepository, SubjectRepository
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
 
     if not student:
         await callback.message.edit_text(
@@ -92,6 +141,7 @@ async def show_subject_progress(callback: CallbackQuery, state: FSMContext):
 async def show_detailed_microtopics(callback: CallbackQuery, state: FSMContext):
     """Показать детальную статистику по микротемам"""
     from common.statistics import get_student_microtopics_detailed
+    from common.render_cache import render_cache, student_scope
 
     # Извлекаем student_id и subject_id из callback_data
     parts = callback.data.split("_")
@@ -100,7 +150,11 @@ async def show_detailed_microtopics(callback: CallbackQuery, state: FSMContext):
         subject_id = int(parts[3])
 
         # Получаем детальную статистику
-        result_text = await get_student_microtopics_detailed(student_id, subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "student_microtopics_detailed", (student_id, subject_id),
+            lambda: get_student_microtopics_detailed(student_id, subject_id),
+            [student_scope(student_id)]
+        )
 
         await callback.message.edit_text(
             result_text,
@@ -116,6 +170,7 @@ async def show_detailed_microtopics(callback: CallbackQuery, state: FSMContext):
 async def show_summary_microtopics(callback: CallbackQuery, state: FSMContext):
     """Показать сводку по сильным и слабым темам"""
     from common.statistics import get_student_strong_weak_summary
+    from common.render_cache import render_cache, student_scope
 
     # Извлекаем student_id и subject_id из callback_data
     parts = callback.data.split("_")
@@ -124,7 +179,11 @@ async def show_summary_microtopics(callback: CallbackQuery, state: FSMContext):
         subject_id = int(parts[3])
 
         # Получаем сводку по сильным и слабым темам
-        result_text = await get_student_strong_weak_summary(student_id, subject_id)
+        result_text = await render_cache.get_or_render_text(
+            "student_microtopics_summary", (student_id, subject_id),
+            lambda: get_student_strong_weak_summary(student_id, subject_id),
+            [student_scope(student_id)]
+        )
 
         await callback.message.edit_text(
             result_text,
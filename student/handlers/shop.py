@@ -5,9 +5,10 @@ from aiogram.fsm.state import StatesGroup, State
 
 from common.utils import check_if_id_in_callback_data
 from ..keyboards.shop import get_shop_menu_kb, get_exchange_points_kb, get_back_to_shop_kb, get_bonus_catalog_kb, get_my_bonuses_kb, get_purchase_confirmation_kb, get_item_purchase_confirmation_kb
-from database import StudentRepository, ShopItemRepository, StudentPurchaseRepository, BonusTestRepository, StudentBonusTestRepository, BonusQuestionRepository, BonusAnswerOptionRepository
+from database import StudentRepository, ShopItemRepository, StudentPurchaseRepository, BonusTestRepository, StudentBonusTestRepository, BonusAnswerOptionRepository
 from common.navigation import log
 from common.quiz_registrator import register_quiz_handlers, send_next_question, cleanup_test_messages
+from common.question_bank import question_bank
 import logging
 import asyncio
 
@@ -38,7 +39,7 @@ async def show_shop_menu(callback: CallbackQuery, state: FSMContext):
     await log("show_shop_menu", "student", state)
 
     # Получаем студента по telegram_id
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден. Обратитесь к администратору.",
@@ -47,7 +48,7 @@ async def show_shop_menu(callback: CallbackQuery, state: FSMContext):
         return
 
     # Получаем баланс студента
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     points = balance["points"]
     coins = balance["coins"]
 
@@ -67,7 +68,7 @@ async def show_exchange_options(callback: CallbackQuery, state: FSMContext):
     await log("show_exchange_options", "student", state)
 
     # Получаем текущий баланс студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -75,7 +76,7 @@ async def show_exchange_options(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     points = balance["points"]
 
     await callback.message.edit_text(
@@ -93,7 +94,7 @@ async def process_exchange(callback: CallbackQuery, state: FSMContext):
     exchange_amount = int(callback.data.replace("exchange_", ""))
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -129,7 +130,7 @@ async def show_bonus_catalog(callback: CallbackQuery, state: FSMContext):
     await log("show_bonus_catalog", "student", state)
 
     # Получаем студента и его баланс
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -137,7 +138,7 @@ async def show_bonus_catalog(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     coins = balance["coins"]
 
     # Получаем активные товары из магазина
@@ -212,7 +213,7 @@ async def show_my_bonuses(callback: CallbackQuery, state: FSMContext):
     await log("show_my_bonuses", "student", state)
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -248,7 +249,7 @@ async def show_item_purchase_confirmation(callback: CallbackQuery, state: FSMCon
     item_id = int(callback.data.replace("buy_item_", ""))
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -266,7 +267,7 @@ async def show_item_purchase_confirmation(callback: CallbackQuery, state: FSMCon
         return
 
     # Проверяем баланс
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     if balance["coins"] < item.price:
         await callback.message.edit_text(
             f"❌ Недостаточно монет!\n"
@@ -328,7 +329,7 @@ async def confirm_item_purchase(callback: CallbackQuery, state: FSMContext):
         return
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -346,7 +347,7 @@ async def confirm_item_purchase(callback: CallbackQuery, state: FSMContext):
         return
 
     # Повторно проверяем баланс (на случай изменений)
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     if balance["coins"] < item.price:
         await callback.message.edit_text(
             f"❌ Недостаточно монет!\n"
@@ -401,7 +402,7 @@ async def show_bonus_test_purchase_confirmation(callback: CallbackQuery, state:
     test_id = int(callback.data.replace("buy_bonus_", ""))
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -419,7 +420,7 @@ async def show_bonus_test_purchase_confirmation(callback: CallbackQuery, state:
         return
 
     # Проверяем баланс
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     if balance["coins"] < bonus_test.price:
         await callback.message.edit_text(
             f"❌ Недостаточно монет!\n"
@@ -483,7 +484,7 @@ async def confirm_bonus_test_purchase(callback: CallbackQuery, state: FSMContext
         return
 
     # Получаем студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.message.edit_text(
             "❌ Профиль студента не найден.",
@@ -501,7 +502,7 @@ async def confirm_bonus_test_purchase(callback: CallbackQuery, state: FSMContext
         return
 
     # Повторно проверяем баланс (на случай изменений)
-    balance = await StudentRepository.get_balance(student.id)
+    balance = student.balance
     if balance["coins"] < bonus_test.price:
         await callback.message.edit_text(
             f"❌ Недостаточно монет!\n"
@@ -613,7 +614,7 @@ async def use_bonus_item(callback: CallbackQuery, state: FSMContext):
         return
 
     # Проверяем, что это покупка текущего пользователя
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student or purchase.student_id != student.id:
         await callback.message.edit_text(
             "❌ Это не ваша покупка.",
@@ -677,7 +678,7 @@ async def use_bonus_test(callback: CallbackQuery, state: FSMContext):
         return
 
     # Проверяем, что это покупка текущего пользователя
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student or purchase.student_id != student.id:
         await callback.message.edit_text(
             "❌ Это не ваша покупка.",
@@ -687,7 +688,7 @@ async def use_bonus_test(callback: CallbackQuery, state: FSMContext):
 
     # Получаем вопросы теста
     bonus_test = purchase.bonus_test
-    questions = await BonusQuestionRepository().get_by_bonus_test(bonus_test.id)
+    questions = await question_bank.get_bonus_test_questions(bonus_test.id)
 
     if not questions:
         await callback.message.edit_text(
@@ -706,7 +707,7 @@ async def use_bonus_test(callback: CallbackQuery, state: FSMContext):
     ])
 
     # Определяем диапазон времени для вопросов
-    time_limits = [q.time_limit for q in questions]
+    time_limits = [q['time_limit'] for q in questions]
     min_time = min(time_limits)
     max_time = max(time_limits)
 
@@ -749,14 +750,14 @@ async def start_bonus_test(callback: CallbackQuery, state: FSMContext):
         return
 
     # Получаем вопросы теста
-    questions = await BonusQuestionRepository().get_by_bonus_test(bonus_test_id)
+    questions = await question_bank.get_bonus_test_questions(bonus_test_id)
 
     if not questions:
         await callback.answer("❌ В тесте нет вопросов", show_alert=True)
         return
 
     # Получаем ID студента
-    student = await StudentRepository.get_by_telegram_id(callback.from_user.id)
+    student = await StudentRepository.get_identity_by_telegram_id(callback.from_user.id)
     if not student:
         await callback.answer("❌ Студент не найден", show_alert=True)
         return
@@ -772,10 +773,10 @@ async def start_bonus_test(callback: CallbackQuery, state: FSMContext):
         'question_results': [],
         'messages_to_delete': [],  # Список сообщений для удаления после теста
         'questions': [{
-            'id': q.id,
-            'text': q.text,
-            'photo_path': q.photo_path,
-            'time_limit': q.time_limit,
+            'id': q['id'],
+            'text': q['text'],
+            'photo_path': q['photo_path'],
+            'time_limit': q['time_limit'],
             'microtopic_number': None  # У бонусных тестов нет микротем
         } for q in questions]
     }
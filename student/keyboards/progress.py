@@ -6,6 +6,7 @@ def get_progress_menu_kb() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="📋 Общая статистика", callback_data="general_stats")],
         [InlineKeyboardButton(text="📈 Понимание по темам", callback_data="topics_understanding")],
+        [InlineKeyboardButton(text="🏅 Место в группе", callback_data="group_place")],
          *get_main_menu_back_button()
     ])
 
@@ -1,10 +1,11 @@
-from student.handlers.progress import ProgressStates, show_progress_menu, show_general_stats, show_subjects_list, show_subject_progress
+from student.handlers.progress import ProgressStates, show_progress_menu, show_general_stats, show_subjects_list, show_subject_progress, show_group_place
 
 # Словарь переходов между состояниями
 STATE_TRANSITIONS = {
     ProgressStates.subject_details: ProgressStates.subjects,
     ProgressStates.subjects: ProgressStates.main,
     ProgressStates.common_stats: ProgressStates.main,
+    ProgressStates.group_place: ProgressStates.main,
     ProgressStates.main: None  # None означает возврат в главное меню
 }
 
@@ -12,6 +13,7 @@ STATE_TRANSITIONS = {
 STATE_HANDLERS = {
     ProgressStates.main: show_progress_menu,
     ProgressStates.common_stats: show_general_stats,
+    ProgressStates.group_place: show_group_place,
     ProgressStates.subjects: show_subjects_list,
     ProgressStates.subject_details: show_subject_progress
 }
\ No newline at end of file
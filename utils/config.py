@@ -19,6 +19,9 @@ WEBHOOK_URL = f"{WEBHOOK_HOST}{WEBHOOK_PATH}"
 WEB_SERVER_HOST = getenv("WEB_SERVER_HOST", "0.0.0.0")
 WEB_SERVER_PORT = int(getenv("WEB_SERVER_PORT", "8000"))
 
+# Количество процессов-воркеров в webhook режиме (1 - один процесс, как раньше)
+WORKERS = int(getenv("WORKERS", "1"))
+
 # Redis настройки
 REDIS_ENABLED = getenv("REDIS_ENABLED", "false").lower() == "true"
 REDIS_HOST = getenv("REDIS_HOST", "redis")
@@ -5,14 +5,22 @@ import logging
 import time
 from datetime import datetime, timedelta
 from aiogram import Bot
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import BotCommand
 from database import init_database, close_database
 from utils.config import WEBHOOK_MODE, WEBHOOK_URL, REDIS_ENABLED
-from utils.redis_manager import RedisManager
+from utils.redis_manager import redis_manager
 
 
-async def on_startup(bot: Bot) -> None:
-    """Действия при запуске бота"""
+async def on_startup(bot: Bot, storage: BaseStorage = None, configure: bool = True) -> None:
+    """
+    Действия при запуске бота
+
+    Args:
+        bot: Экземпляр бота
+        storage: Хранилище FSM диспетчера (для таймеров quiz)
+        configure: Настроить команды и webhook (False для воркеров - это делает фронт)
+    """
     try:
         # Инициализируем подключение к базе данных
         await init_database()
@@ -25,7 +33,7 @@ async def on_startup(bot: Bot) -> None:
     # Инициализируем Redis если включен
     if REDIS_ENABLED:
         try:
-            redis_manager = RedisManager()
+            # Подключаем глобальный экземпляр - через него воркеры согласуют версии кэшей
             await redis_manager.connect()
             if redis_manager.connected:
                 logging.info("✅ Redis подключен успешно")
@@ -34,13 +42,29 @@ async def on_startup(bot: Bot) -> None:
         except Exception as e:
             logging.error(f"❌ Ошибка подключения к Redis: {e}")
 
-    # Очищаем зависшие состояния quiz после перезагрузки
+    # Продолжаем незавершенные тесты после перезагрузки и запускаем таймеры вопросов
     try:
         from common.quiz_registrator import cleanup_orphaned_quiz_states
+        from common.quiz_timers import quiz_timers
         await cleanup_orphaned_quiz_states()
+        if storage is not None:
+            quiz_timers.start(bot, storage)
+    except Exception as e:
+        logging.error(f"❌ Ошибка запуска таймеров quiz: {e}")
+
+    # Запускаем фоновый пересчет снимков аналитики
+    try:
+        from common.analytics_snapshots import analytics_snapshots
+        analytics_snapshots.start()
     except Exception as e:
-        logging.error(f"❌ Ошибка очистки зависших состояний quiz: {e}")
+        logging.error(f"❌ Ошибка запуска пересчета снимков аналитики: {e}")
 
+    if configure:
+        await configure_bot(bot)
+
+
+async def configure_bot(bot: Bot) -> None:
+    """Настройка команд и webhook/polling (один раз на развертывание)"""
     # Сначала очищаем все существующие команды
     try:
         await bot.delete_my_commands()
@@ -94,15 +118,27 @@ async def on_startup(bot: Bot) -> None:
             logging.error(f"❌ Ошибка удаления webhook: {e}")
 
 
-async def on_shutdown(bot: Bot) -> None:
-    """Действия при остановке бота"""
+async def on_shutdown(bot: Bot, configure: bool = True) -> None:
+    """Действия при остановке бота (configure=False для воркеров - webhook снимает фронт)"""
+    try:
+        from common.quiz_timers import quiz_timers
+        await quiz_timers.stop()
+    except Exception as e:
+        logging.error(f"❌ Ошибка остановки таймеров quiz: {e}")
+
+    try:
+        from common.analytics_snapshots import analytics_snapshots
+        await analytics_snapshots.stop()
+    except Exception as e:
+        logging.error(f"❌ Ошибка остановки пересчета снимков аналитики: {e}")
+
     try:
         await close_database()
         logging.info("✅ База данных отключена")
     except Exception as e:
         logging.error(f"❌ Ошибка отключения БД: {e}")
     
-    if WEBHOOK_MODE:
+    if configure and WEBHOOK_MODE:
         try:
             await bot.delete_webhook()
             logging.info("✅ Webhook удален")
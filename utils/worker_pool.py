@@ -0,0 +1,239 @@
+"""
+Многопроцессный режим webhook: фронт и воркеры с привязкой пользователей
+
+Фронт (легкий aiohttp-процесс) принимает webhook от Telegram, читает из
+обновления ID пользователя и кладет обновление в очередь воркера
+user_id % WORKERS. Воркеры - отдельные процессы с полным диспетчером; все
+обновления одного пользователя всегда попадают в один воркер, поэтому
+пользовательские кэши процесса (клавиатуры, контекст навигации) остаются
+согласованными, а обработка масштабируется по ядрам. Общие кэши (роли,
+справочники, пулы вопросов, отрисованные экраны) меняются из любого
+воркера, поэтому воркеры сверяют их версии в Redis. Команды и webhook
+настраивает только фронт. Упавший воркер перезапускается с той же очередью.
+
+Каждый воркер периодически публикует свою статистику в Redis, фронт
+отдает ее в /stats вместе со статистикой распределения обновлений.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from aiogram import Bot
+from aiohttp import web
+
+from utils.config import WEBHOOK_PATH, WEB_SERVER_HOST, WEB_SERVER_PORT
+
+# Типы обновлений с пользователем в поле from (poll_answer - в поле user)
+USER_UPDATE_FIELDS = (
+    "message", "edited_message", "callback_query", "inline_query", "chosen_inline_result",
+    "shipping_query", "pre_checkout_query", "my_chat_member", "chat_member", "chat_join_request"
+)
+# Период проверки, живы ли воркеры (в секундах)
+WORKER_CHECK_INTERVAL = 5
+# Статистика воркера в Redis: ключ, период публикации и время жизни (в секундах)
+WORKER_STATS_KEY = "stats:worker:{}"
+WORKER_STATS_INTERVAL = 5
+WORKER_STATS_TTL = 30
+
+
+def get_update_user_id(update: dict) -> Optional[int]:
+    """ID пользователя, от которого пришло обновление (None для опросов и каналов)"""
+    poll_answer = update.get("poll_answer")
+    if poll_answer:
+        return (poll_answer.get("user") or {}).get("id")
+    for field in USER_UPDATE_FIELDS:
+        payload = update.get(field)
+        if payload and payload.get("from"):
+            return payload["from"]["id"]
+    return None
+
+
+def get_worker_index(update: dict, workers: int) -> int:
+    """Номер воркера для обновления: по пользователю, остальные - воркеру 0"""
+    user_id = get_update_user_id(update)
+    return user_id % workers if user_id is not None else 0
+
+
+# === ВОРКЕР ===
+
+async def _publish_worker_stats(index: int, performance_middleware):
+    """Периодически публиковать статистику воркера в Redis для /stats фронта"""
+    from main import collect_stats
+    from utils.redis_manager import redis_manager
+
+    while True:
+        await asyncio.sleep(WORKER_STATS_INTERVAL)
+        if not redis_manager.connected:
+            continue
+        try:
+            await redis_manager.set(
+                WORKER_STATS_KEY.format(index), json.dumps(collect_stats(performance_middleware)), WORKER_STATS_TTL
+            )
+        except Exception as e:
+            logging.error(f"❌ Ошибка публикации статистики воркера {index}: {e}")
+
+
+async def _worker_main(index: int, queue: multiprocessing.Queue):
+    from main import create_bot, create_dispatcher
+
+    bot = create_bot()
+    dp, performance_middleware = await create_dispatcher(bot, configure=False)
+    await dp.emit_startup(bot=bot)
+    logging.info(f"👷 Воркер {index} запущен")
+    stats_task = asyncio.create_task(_publish_worker_stats(index, performance_middleware))
+
+    loop = asyncio.get_running_loop()
+    # Отдельный поток ждет обновления из очереди, не блокируя event loop
+    reader = ThreadPoolExecutor(max_workers=1)
+    tasks = set()
+    try:
+        while True:
+            raw_update = await loop.run_in_executor(reader, queue.get)
+            if raw_update is None:
+                break
+            task = asyncio.create_task(dp.feed_raw_update(bot, json.loads(raw_update)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        stats_task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        reader.shutdown(wait=False)
+
+
+def run_worker(index: int, queue: multiprocessing.Queue):
+    """Точка входа процесса-воркера"""
+    from utils.logging_config import setup_logging
+
+    setup_logging()
+    try:
+        asyncio.run(_worker_main(index, queue))
+    except KeyboardInterrupt:
+        pass
+
+
+# === ФРОНТ ===
+
+class WorkerPool:
+    """Процессы-воркеры и их очереди обновлений"""
+
+    def __init__(self, workers: int):
+        # spawn: воркер не наследует event loop и соединения фронта
+        self._context = multiprocessing.get_context("spawn")
+        self.queues: List[multiprocessing.Queue] = [self._context.Queue() for _ in range(workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.dispatched = [0] * workers
+
+    def _start(self, index: int):
+        process = self._context.Process(
+            target=run_worker, args=(index, self.queues[index]), name=f"bot-worker-{index}", daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self):
+        for index in range(len(self.queues)):
+            self._start(index)
+
+    def ensure_alive(self):
+        """Перезапустить упавшие воркеры (очередь сохраняется, обновления не теряются)"""
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                logging.error(f"❌ Воркер {index} завершился с кодом {process.exitcode}, перезапускаем")
+                self._start(index)
+
+    def dispatch(self, raw_update: bytes) -> int:
+        """Передать обновление воркеру его пользователя"""
+        update = json.loads(raw_update)
+        index = get_worker_index(update, len(self.queues))
+        self.queues[index].put_nowait(raw_update.decode("utf-8"))
+        self.dispatched[index] += 1
+        return index
+
+    def stop(self):
+        for queue in self.queues:
+            queue.put(None)
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=30)
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": len(self.queues),
+            "alive": sum(1 for process in self.processes if process and process.is_alive()),
+            "dispatched": list(self.dispatched),
+        }
+
+    async def get_worker_stats(self) -> List[Optional[dict]]:
+        """Последняя опубликованная статистика воркеров (None - нет данных или нет Redis)"""
+        from utils.redis_manager import redis_manager
+
+        if not redis_manager.connected:
+            return [None] * len(self.queues)
+        result = []
+        for index in range(len(self.queues)):
+            try:
+                raw_stats = await redis_manager.get(WORKER_STATS_KEY.format(index))
+                result.append(json.loads(raw_stats) if raw_stats else None)
+            except Exception as e:
+                logging.error(f"❌ Ошибка чтения статистики воркера {index}: {e}")
+                result.append(None)
+        return result
+
+
+async def run_front(bot: Bot, workers: int):
+    """Запустить фронт: прием webhook, распределение по воркерам, настройка бота"""
+    from utils.config import REDIS_ENABLED
+    from utils.lifecycle import configure_bot, health_check
+    from utils.redis_manager import redis_manager
+
+    # Redis фронта нужен только для чтения статистики воркеров
+    if REDIS_ENABLED:
+        await redis_manager.connect()
+
+    pool = WorkerPool(workers)
+    pool.start()
+
+    async def handle_update(request: web.Request) -> web.Response:
+        try:
+            pool.dispatch(await request.read())
+        except Exception as e:
+            logging.error(f"❌ Ошибка передачи обновления воркеру: {e}")
+        # Telegram не должен повторять обновление - ошибки обрабатывает воркер
+        return web.Response()
+
+    async def workers_stats(request: web.Request) -> web.Response:
+        stats = pool.get_stats()
+        stats["per_worker"] = await pool.get_worker_stats()
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle_update)
+    app.router.add_get("/health", health_check)
+    app.router.add_get("/stats", workers_stats)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEB_SERVER_HOST, WEB_SERVER_PORT)
+    await site.start()
+    logging.info(f"🚀 Фронт webhook на {WEB_SERVER_HOST}:{WEB_SERVER_PORT}, воркеров: {workers}")
+
+    await configure_bot(bot)
+    try:
+        while True:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            pool.ensure_alive()
+    finally:
+        try:
+            await bot.delete_webhook()
+        except Exception as e:
+            logging.error(f"❌ Ошибка удаления webhook: {e}")
+        await runner.cleanup()
+        pool.stop()
+        await bot.session.close()
+        await redis_manager.disconnect()